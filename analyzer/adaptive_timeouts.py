@@ -0,0 +1,96 @@
+# analyzer/adaptive_timeouts.py
+import logging
+import math
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import urlparse
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of `values` (pct in 0..100), or None for an empty list."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class AdaptiveTimeouts:
+    """
+    Derives per-request navigation timeouts from a rolling latency window per host.
+
+    Until a host has ADAPTIVE_TIMEOUT_MIN_SAMPLES navigations the flat
+    config.PAGE_TIMEOUT is used. After that the timeout is
+    p95 x ADAPTIVE_TIMEOUT_MULTIPLIER, clamped to
+    [ADAPTIVE_TIMEOUT_FLOOR, ADAPTIVE_TIMEOUT_CEILING] milliseconds.
+    Timed-out navigations enter the window at the timeout value, so a host that
+    starts timing out pushes its own timeout up instead of spiralling down.
+    """
+
+    def __init__(self):
+        self._samples: Dict[str, Deque[float]] = {}
+        self._chosen: List[int] = []
+        self._adaptive_choices = 0
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).netloc or '').lower().replace('www.', '', 1)
+
+    def _window(self, url: str) -> Deque[float]:
+        host = self._host(url)
+        if host not in self._samples:
+            self._samples[host] = deque(maxlen=config.ADAPTIVE_TIMEOUT_WINDOW)
+        return self._samples[host]
+
+    def record(self, url: str, navigation_seconds: Optional[float] = None, timed_out_after_ms: Optional[int] = None) -> None:
+        """Adds one navigation outcome for the host of `url`."""
+        if timed_out_after_ms is not None:
+            self._window(url).append(timed_out_after_ms / 1000)
+        elif navigation_seconds is not None and navigation_seconds >= 0:
+            self._window(url).append(navigation_seconds)
+
+    def _timeout_from_window(self, window: Deque[float]) -> Optional[int]:
+        if len(window) < config.ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+            return None
+        p95 = percentile(list(window), 95)
+        timeout_ms = int(p95 * 1000 * config.ADAPTIVE_TIMEOUT_MULTIPLIER)
+        return max(config.ADAPTIVE_TIMEOUT_FLOOR, min(config.ADAPTIVE_TIMEOUT_CEILING, timeout_ms))
+
+    def timeout_for(self, url: str) -> int:
+        """Navigation timeout in milliseconds for the next request to the host of `url`."""
+        adaptive_ms = self._timeout_from_window(self._window(url))
+        timeout_ms = adaptive_ms if adaptive_ms is not None else config.PAGE_TIMEOUT
+        if adaptive_ms is not None:
+            self._adaptive_choices += 1
+        self._chosen.append(timeout_ms)
+        return timeout_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """Latency percentiles and chosen timeouts, for the analysis report."""
+        hosts = {}
+        for host, window in self._samples.items():
+            values = list(window)
+            hosts[host] = {
+                'samples': len(values),
+                'p50_seconds': round(percentile(values, 50), 3) if values else None,
+                'p90_seconds': round(percentile(values, 90), 3) if values else None,
+                'p95_seconds': round(percentile(values, 95), 3) if values else None,
+                'current_timeout_ms': self._timeout_from_window(window) or config.PAGE_TIMEOUT,
+            }
+        return {
+            'hosts': hosts,
+            'chosen_timeouts_ms': {
+                'count': len(self._chosen),
+                'adaptive_count': self._adaptive_choices,
+                'min': min(self._chosen) if self._chosen else None,
+                'median': percentile(self._chosen, 50),
+                'max': max(self._chosen) if self._chosen else None,
+            },
+            'multiplier': config.ADAPTIVE_TIMEOUT_MULTIPLIER,
+            'floor_ms': config.ADAPTIVE_TIMEOUT_FLOOR,
+            'ceiling_ms': config.ADAPTIVE_TIMEOUT_CEILING,
+        }
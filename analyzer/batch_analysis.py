@@ -0,0 +1,83 @@
+# analyzer/batch_analysis.py
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional
+
+import analyzer.config as config
+from analyzer.page_budget import PageBudget
+from analyzer.browser_governor import browser_governor
+from analyzer.browser_pool import browser_pool
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+
+async def analyze_urls_batch(
+    urls: List[str],
+    max_open_pages: Optional[int] = None,
+    max_pages_per_domain: Optional[int] = None,
+    max_concurrent_sites: Optional[int] = None,
+    browser_count: Optional[int] = None,
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Analyzes several sites concurrently on one shared pool of browsers.
+
+    Every site gets its own SEOAnalyzer and BrowserContext, but all of them share
+    the same Chromium processes and a single PageBudget, so the number of open pages
+    stays under `max_open_pages` overall and under `max_pages_per_domain` per site.
+    Returns {start_url: analysis} where each analysis has the same shape as
+    analyze_url_standalone's result (None if the site could not be analyzed).
+    """
+    # Imported here because analyzer.seo imports seomainfunctions at module level.
+    from analyzer.seo import SEOAnalyzer
+
+    unique_urls = list(dict.fromkeys(u for u in urls if u and u.strip()))
+    if not unique_urls:
+        return {}
+
+    max_open_pages = max_open_pages or config.BATCH_MAX_OPEN_PAGES
+    max_pages_per_domain = max_pages_per_domain or config.BATCH_MAX_PAGES_PER_DOMAIN
+    max_concurrent_sites = max_concurrent_sites or config.BATCH_MAX_CONCURRENT_SITES
+    browser_count = max(1, min(browser_count or config.BATCH_BROWSER_COUNT, len(unique_urls), browser_governor.max_browsers))
+
+    page_budget = PageBudget(max_open_pages, max_pages_per_domain)
+    site_semaphore = asyncio.Semaphore(max_concurrent_sites)
+    results: Dict[str, Optional[Dict[str, Any]]] = {}
+    start_time = time.time()
+
+    print(f"Batch analysis of {len(unique_urls)} sites: {browser_count} browsers, "
+          f"{max_open_pages} pages max, {max_pages_per_domain} per domain, {max_concurrent_sites} sites at a time")
+
+    async with AsyncExitStack() as browser_leases:
+        # Batch browsers are leased from the warm pool and count against the process-wide governor
+        # like any other session's browser.
+        leases = []
+        for _ in range(browser_count):
+            leases.append(await browser_leases.enter_async_context(browser_pool.lease(f"batch of {len(unique_urls)} sites")))
+
+        async def run_site(index: int, site_url: str):
+            async with site_semaphore:
+                analyzer_instance = SEOAnalyzer()
+                # Sites are spread round-robin over the shared browsers; passing the lease lets each
+                # site's context count its pages toward the pool's recycling.
+                lease = leases[index % len(leases)]
+                try:
+                    # Each site keeps the page-level concurrency the budget allows for its domain.
+                    results[site_url] = await analyzer_instance.analyze_url(
+                        site_url,
+                        concurrency=max_pages_per_domain,
+                        shards=0,
+                        shared_browser=lease,
+                        page_budget=page_budget,
+                    )
+                except Exception as e:
+                    logger.error(f"Batch analysis failed for {site_url}: {e}", exc_info=True)
+                    results[site_url] = None
+
+        await asyncio.gather(*(run_site(i, u) for i, u in enumerate(unique_urls)))
+
+    succeeded = sum(1 for r in results.values() if r)
+    print(f"Batch analysis complete: {succeeded}/{len(unique_urls)} sites analyzed in {round(time.time() - start_time, 2)} seconds "
+          f"(peak {page_budget.peak_open_pages} open pages).")
+    return {u: results.get(u) for u in unique_urls}
@@ -0,0 +1,211 @@
+# analyzer/browser_governor.py
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+BROWSER = 'browser'
+PAGE = 'page'
+
+# Memory usage sources, most specific first: cgroup v2, cgroup v1 (the container limit), then the host.
+_CGROUP_MEMORY_FILES = ('/sys/fs/cgroup/memory.current', '/sys/fs/cgroup/memory/memory.usage_in_bytes')
+
+
+def current_memory_mb() -> Optional[float]:
+    """Memory in use by this container (cgroup) or, outside a container, by the whole host."""
+    for path in _CGROUP_MEMORY_FILES:
+        try:
+            with open(path) as f:
+                return int(f.read().strip()) / (1024 * 1024)
+        except (OSError, ValueError):
+            continue
+    try:
+        meminfo = {}
+        with open('/proc/meminfo') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                meminfo[key] = int(value.split()[0]) # kB
+        return (meminfo['MemTotal'] - meminfo['MemAvailable']) / 1024
+    except (OSError, ValueError, KeyError, IndexError):
+        return None
+
+
+class _Waiter:
+    __slots__ = ('kind', 'label', 'loop', 'future', 'granted')
+
+    def __init__(self, kind: str, label: str, loop: asyncio.AbstractEventLoop):
+        self.kind = kind
+        self.label = label
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class BrowserGovernor:
+    """
+    Process-wide limits for Chromium usage, shared by every Streamlit session.
+
+    - At most `max_browsers` browser processes (crawls, SERP and competitor lookups).
+    - At most `max_pages` open pages across all of them.
+    - No new browser is started while memory use is above `memory_high_water_mb`.
+
+    Sessions run their own event loops in their own threads, so the state is
+    guarded by a threading.Lock and waiters are woken with call_soon_threadsafe.
+    Waiters queue FIFO per resource; `on_queue(position)` is called from the
+    waiter's own loop whenever its position changes (1 = next in line).
+    Browser and page queues are separate: a crawl that already owns a browser
+    must never wait for its pages behind a request for a new browser.
+    """
+
+    def __init__(self, max_browsers: Optional[int] = None, max_pages: Optional[int] = None,
+                 memory_high_water_mb: Optional[float] = None):
+        self.max_browsers = max(1, int(max_browsers or config.GOVERNOR_MAX_BROWSERS))
+        self.max_pages = max(1, int(max_pages or config.GOVERNOR_MAX_OPEN_PAGES))
+        self.memory_high_water_mb = config.GOVERNOR_MEMORY_HIGH_WATER_MB if memory_high_water_mb is None else memory_high_water_mb
+        self._lock = threading.Lock()
+        self._in_use: Dict[str, int] = {BROWSER: 0, PAGE: 0}
+        self._queues: Dict[str, List[_Waiter]] = {BROWSER: [], PAGE: []}
+        self._memory_mb: Optional[float] = None
+        self._memory_read_at = 0.0
+        self.peak_browsers = 0
+        self.peak_pages = 0
+        self.memory_waits = 0
+
+    def _memory_locked(self) -> Optional[float]:
+        now = time.monotonic()
+        if now - self._memory_read_at > 0.5:
+            self._memory_mb = current_memory_mb()
+            self._memory_read_at = now
+        return self._memory_mb
+
+    def memory_above_high_water(self) -> bool:
+        """Whether memory use is at or above the high-water mark, i.e. no new browser may start."""
+        with self._lock:
+            memory = self._memory_locked()
+        return bool(self.memory_high_water_mb) and memory is not None and memory >= self.memory_high_water_mb
+
+    def _can_grant_locked(self, kind: str) -> bool:
+        if kind == BROWSER:
+            if self._in_use[BROWSER] >= self.max_browsers:
+                return False
+            memory = self._memory_locked()
+            if self.memory_high_water_mb and memory is not None and memory >= self.memory_high_water_mb:
+                # Only new browsers wait for memory: pages of running browsers finish and free it.
+                return False
+            return True
+        return self._in_use[PAGE] < self.max_pages
+
+    def _take_locked(self, kind: str) -> None:
+        self._in_use[kind] += 1
+        self.peak_browsers = max(self.peak_browsers, self._in_use[BROWSER])
+        self.peak_pages = max(self.peak_pages, self._in_use[PAGE])
+
+    def _grant_waiting(self) -> None:
+        with self._lock:
+            for kind, queue in self._queues.items():
+                while queue and self._can_grant_locked(kind):
+                    waiter = queue.pop(0)
+                    waiter.granted = True
+                    self._take_locked(kind)
+                    try:
+                        waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+                    except RuntimeError:
+                        # The waiter's loop is gone; hand the slot back.
+                        self._in_use[kind] -= 1
+
+    def queue_position(self, waiter: _Waiter) -> int:
+        with self._lock:
+            queue = self._queues[waiter.kind]
+            return queue.index(waiter) + 1 if waiter in queue else 0
+
+    async def _acquire(self, kind: str, label: str, on_queue: Optional[Callable[[int], None]]) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._queues[kind] and self._can_grant_locked(kind):
+                self._take_locked(kind)
+                return
+            waiter = _Waiter(kind, label, loop)
+            self._queues[kind].append(waiter)
+            if kind == BROWSER and self._in_use[BROWSER] < self.max_browsers:
+                self.memory_waits += 1
+
+        last_position = None
+        try:
+            while True:
+                self._grant_waiting() # memory may have dropped without any release
+                position = self.queue_position(waiter)
+                if position and position != last_position:
+                    last_position = position
+                    logger.info(f"Waiting for a {kind} slot for {label or 'request'}: position {position} in queue")
+                    if on_queue:
+                        try:
+                            on_queue(position)
+                        except Exception as e:
+                            logger.debug(f"on_queue callback failed: {e}")
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), timeout=config.GOVERNOR_POLL_INTERVAL)
+                    return
+                except asyncio.TimeoutError:
+                    continue
+        except BaseException:
+            with self._lock:
+                if waiter in self._queues[kind]:
+                    self._queues[kind].remove(waiter)
+                    waiter = None
+            if waiter is not None and waiter.granted:
+                self._release(kind)
+            raise
+
+    def _release(self, kind: str) -> None:
+        with self._lock:
+            self._in_use[kind] = max(0, self._in_use[kind] - 1)
+        self._grant_waiting()
+
+    @asynccontextmanager
+    async def browser_slot(self, label: str = '', on_queue: Optional[Callable[[int], None]] = None) -> AsyncIterator[None]:
+        """Holds one of the process-wide browser slots; launch the browser inside it."""
+        await self._acquire(BROWSER, label, on_queue)
+        try:
+            yield
+        finally:
+            self._release(BROWSER)
+
+    @asynccontextmanager
+    async def page_slot(self, label: str = '', on_queue: Optional[Callable[[int], None]] = None) -> AsyncIterator[None]:
+        """Holds one of the process-wide open-page slots."""
+        await self._acquire(PAGE, label, on_queue)
+        try:
+            yield
+        finally:
+            self._release(PAGE)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            memory = self._memory_locked()
+            return {
+                'browsers_in_use': self._in_use[BROWSER],
+                'pages_in_use': self._in_use[PAGE],
+                'browsers_queued': len(self._queues[BROWSER]),
+                'pages_queued': len(self._queues[PAGE]),
+                'max_browsers': self.max_browsers,
+                'max_pages': self.max_pages,
+                'memory_mb': round(memory, 1) if memory is not None else None,
+                'memory_high_water_mb': self.memory_high_water_mb,
+                'peak_browsers': self.peak_browsers,
+                'peak_pages': self.peak_pages,
+                'memory_waits': self.memory_waits,
+            }
+
+
+browser_governor = BrowserGovernor()
@@ -0,0 +1,424 @@
+# analyzer/browser_pool.py
+import asyncio
+import atexit
+import itertools
+import logging
+import socket
+import threading
+import time
+import urllib.request
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+import analyzer.config as config
+from analyzer.browser_governor import browser_governor
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+# Lease kinds; each gets browsers launched with its own flags and never shares them with the other.
+CRAWL_LEASE = 'crawl'
+SCRAPER_LEASE = 'scraper'
+
+
+def _launch_args(kind: str) -> List[str]:
+    if kind == SCRAPER_LEASE:
+        return list(config.BROWSER_POOL_LAUNCH_ARGS)
+    return list(config.BROWSER_POOL_CRAWL_LAUNCH_ARGS)
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _endpoint_alive(endpoint: str, timeout: float = 2.0) -> bool:
+    try:
+        with urllib.request.urlopen(f"{endpoint}/json/version", timeout=timeout) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+
+class _WarmBrowser:
+    """A pre-launched Chromium owned by the pool thread, reachable over CDP at `endpoint`."""
+    __slots__ = ('id', 'browser', 'endpoint', 'kind', 'launched_at', 'pages_served', 'leases_served', 'active_leases',
+                 'retiring', 'healthy')
+
+    def __init__(self, browser_id: int, browser: Browser, endpoint: str, kind: str = CRAWL_LEASE):
+        self.id = browser_id
+        self.browser = browser
+        self.endpoint = endpoint
+        self.kind = kind
+        self.launched_at = time.monotonic()
+        self.pages_served = 0
+        self.leases_served = 0
+        self.active_leases = 0
+        self.retiring = False
+        self.healthy = True
+
+
+class BrowserLease:
+    """
+    A browser handed out by BrowserPool.lease(), connected in the caller's event loop.
+    Create contexts through new_context() (or register them with track()) so the pool
+    can count the pages opened on the warm browser.
+    """
+
+    def __init__(self, browser: Browser, warm: bool):
+        self.browser = browser
+        self.warm = warm
+        self.pages_opened = 0
+
+    def track(self, context: BrowserContext) -> BrowserContext:
+        def count_page(_page):
+            self.pages_opened += 1
+        context.on("page", count_page)
+        return context
+
+    async def new_context(self, **context_options: Any) -> BrowserContext:
+        return self.track(await self.browser.new_context(**context_options))
+
+
+class BrowserPool:
+    """
+    Long-lived Chromium processes shared by every session (crawls, SERP and competitor lookups).
+
+    Playwright objects belong to the event loop that created them and each Streamlit
+    session runs its own loop, so the browsers are launched by a dedicated pool thread
+    with a CDP port; a lease connects to one with connect_over_cdp from the caller's
+    loop and works in its own isolated contexts, which are closed when the lease ends.
+
+    - Crawl leases and scraper leases (SERP and competitor lookups) never share a browser:
+      scraper browsers run with anti-detection flags and web security off
+      (config.BROWSER_POOL_LAUNCH_ARGS), crawl browsers keep Chromium's defaults
+      (config.BROWSER_POOL_CRAWL_LAUNCH_ARGS) since they load arbitrary sites.
+    - Up to `size` browsers per lease kind in use are kept warm; a lease goes to the
+      least busy healthy one of its kind. When the cap is reached, an idle browser of
+      the other kind is closed to make room.
+    - A health check (process connected, CDP endpoint answering) runs every
+      BROWSER_POOL_HEALTH_INTERVAL seconds; dead browsers are replaced.
+    - A browser is recycled once it has served `recycle_pages` pages or is older than
+      `recycle_seconds`: it takes no new leases and is relaunched once its leases end.
+    - Leases still take a browser slot of the process-wide governor, so its limits
+      (concurrent browser users, memory high-water mark) keep applying.
+    - Warm browsers hold no governor slot; they have their own cap instead: at most
+      `max_browsers` warm processes, recycled ones included, and none is launched
+      while memory is above the governor's high-water mark. So at most
+      BROWSER_POOL_MAX_BROWSERS + GOVERNOR_MAX_BROWSERS Chromium processes run at once.
+    - If the pool is disabled or no warm browser can be had, the lease falls back to
+      launching a private browser (inside its governor slot), as the scrapers did before.
+    - Playwright objects belong to the event loop that started the driver, so leases
+      cannot use the pool thread's driver; each caller loop starts one driver on its
+      first lease and all its leases share it until the loop shuts down.
+    """
+
+    def __init__(self, size: Optional[int] = None, recycle_pages: Optional[int] = None,
+                 recycle_seconds: Optional[float] = None, max_browsers: Optional[int] = None):
+        self.size = max(1, int(size or config.BROWSER_POOL_SIZE))
+        self.max_browsers = max(self.size, int(max_browsers or config.BROWSER_POOL_MAX_BROWSERS))
+        self.recycle_pages = recycle_pages or config.BROWSER_POOL_RECYCLE_PAGES
+        self.recycle_seconds = recycle_seconds or config.BROWSER_POOL_RECYCLE_SECONDS
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._playwright = None
+        self._browsers: List[_WarmBrowser] = []
+        self._launching = 0
+        self._warm_kinds = {CRAWL_LEASE}
+        self._ids = itertools.count(1)
+        self._drivers_lock = threading.Lock()
+        self._drivers: Dict[asyncio.AbstractEventLoop, asyncio.Future] = {}
+        self.launches = 0
+        self.recycled = 0
+        self.replaced_unhealthy = 0
+        self.fallback_launches = 0
+
+    # --- pool thread ---
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                ready = threading.Event()
+
+                def run():
+                    loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(loop)
+                    self._loop = loop
+                    ready.set()
+                    loop.create_task(self._maintain())
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name='browser-pool', daemon=True)
+                self._thread.start()
+                ready.wait()
+                atexit.register(self.shutdown)
+            return self._loop
+
+    async def _launch(self, kind: str = CRAWL_LEASE) -> _WarmBrowser:
+        self._launching += 1
+        try:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            port = _free_port()
+            browser = await self._playwright.chromium.launch(
+                headless=True,
+                args=[*_launch_args(kind), f'--remote-debugging-port={port}', '--remote-debugging-address=127.0.0.1'],
+            )
+            endpoint = f"http://127.0.0.1:{port}"
+            for _ in range(50):
+                if await asyncio.to_thread(_endpoint_alive, endpoint, 0.5):
+                    break
+                await asyncio.sleep(0.1)
+            warm = _WarmBrowser(next(self._ids), browser, endpoint, kind)
+            self._browsers.append(warm)
+            self.launches += 1
+            logger.info(f"Browser pool: launched warm {kind} browser #{warm.id} at {endpoint}")
+            return warm
+        finally:
+            self._launching -= 1
+
+    async def _close(self, warm: _WarmBrowser) -> bool:
+        if warm not in self._browsers:
+            return False # already closed by a concurrent health check
+        self._browsers.remove(warm)
+        if warm.healthy:
+            self.recycled += 1
+        else:
+            self.replaced_unhealthy += 1
+        try:
+            if warm.browser.is_connected():
+                await warm.browser.close()
+        except Exception as e:
+            logger.debug(f"Browser pool: closing browser #{warm.id} failed: {e}")
+        return True
+
+    def _can_launch(self) -> bool:
+        if len(self._browsers) + self._launching >= self.max_browsers:
+            return False
+        if browser_governor.memory_above_high_water():
+            logger.info("Browser pool: memory is above the high-water mark; not launching a warm browser")
+            return False
+        return True
+
+    def _mark_for_recycling(self, warm: _WarmBrowser) -> None:
+        if warm.retiring:
+            return
+        if warm.pages_served >= self.recycle_pages or time.monotonic() - warm.launched_at >= self.recycle_seconds:
+            warm.retiring = True
+            logger.info(f"Browser pool: recycling browser #{warm.id} after {warm.pages_served} pages")
+
+    async def _check_health(self) -> None:
+        for warm in list(self._browsers):
+            if warm.healthy and (not warm.browser.is_connected() or not await asyncio.to_thread(_endpoint_alive, warm.endpoint)):
+                warm.healthy = False
+                logger.warning(f"Browser pool: browser #{warm.id} failed its health check")
+            self._mark_for_recycling(warm)
+            if warm.active_leases == 0 and (warm.retiring or not warm.healthy):
+                await self._close(warm)
+
+    async def _top_up(self) -> None:
+        for kind in sorted(self._warm_kinds):
+            while (len([w for w in self._browsers if w.kind == kind and w.healthy and not w.retiring]) + self._launching < self.size
+                   and self._can_launch()):
+                try:
+                    await self._launch(kind)
+                except Exception as e:
+                    logger.warning(f"Browser pool: could not launch a warm {kind} browser: {e}")
+                    return
+
+    async def _make_room_for(self, kind: str) -> bool:
+        """Closes an idle browser of another lease kind when the warm cap is reached."""
+        if len(self._browsers) + self._launching < self.max_browsers:
+            return False
+        idle = [w for w in self._browsers if w.kind != kind and w.active_leases == 0]
+        if not idle:
+            return False
+        return await self._close(min(idle, key=lambda w: w.launched_at))
+
+    async def _maintain(self) -> None:
+        while True:
+            try:
+                await self._check_health()
+                await self._top_up()
+            except Exception as e:
+                logger.warning(f"Browser pool maintenance failed: {e}")
+            await asyncio.sleep(config.BROWSER_POOL_HEALTH_INTERVAL)
+
+    async def _checkout_in_pool(self, kind: str = CRAWL_LEASE) -> _WarmBrowser:
+        self._warm_kinds.add(kind)
+        deadline = time.monotonic() + config.BROWSER_POOL_CONNECT_TIMEOUT / 1000
+        while True:
+            candidates = [w for w in self._browsers
+                          if w.kind == kind and w.healthy and not w.retiring and w.browser.is_connected()]
+            if candidates:
+                break
+            if not self._launching:
+                await self._make_room_for(kind)
+                if self._can_launch():
+                    # Cold pool (first use, or every browser is being recycled): launch one right away.
+                    candidates = [await self._launch(kind)]
+                    break
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"no warm browser within {config.BROWSER_POOL_CONNECT_TIMEOUT} ms")
+            # A warm-up launch is under way, or the cap is reached until a recycled browser closes.
+            await asyncio.sleep(0.1)
+        warm = min(candidates, key=lambda w: (w.active_leases, w.pages_served))
+        warm.active_leases += 1
+        warm.leases_served += 1
+        return warm
+
+    async def _checkin_in_pool(self, warm: _WarmBrowser, pages_opened: int, healthy: bool) -> None:
+        warm.active_leases = max(0, warm.active_leases - 1)
+        warm.pages_served += pages_opened
+        if not healthy:
+            warm.healthy = False
+        self._mark_for_recycling(warm)
+        await self._check_health()
+        await self._top_up()
+
+    def _checkin(self, warm: _WarmBrowser, pages_opened: int, healthy: bool = True) -> None:
+        try:
+            asyncio.run_coroutine_threadsafe(self._checkin_in_pool(warm, pages_opened, healthy), self._loop)
+        except RuntimeError:
+            pass # the pool loop is gone (interpreter shutdown)
+
+    # --- callers (any thread, any event loop) ---
+
+    def warm_up(self) -> None:
+        """Starts the pool thread, which launches `size` browsers in the background."""
+        if config.BROWSER_POOL_ENABLED:
+            self._ensure_started()
+
+    async def _run_driver(self, loop: asyncio.AbstractEventLoop, ready: asyncio.Future) -> None:
+        try:
+            async with async_playwright() as p:
+                ready.set_result(p)
+                # Held until the loop shuts down (asyncio.run cancels leftover tasks), which stops the driver.
+                await loop.create_future()
+        except asyncio.CancelledError:
+            if not ready.done():
+                ready.cancel()
+        except Exception as e:
+            logger.warning(f"Browser pool: the Playwright driver of a session loop stopped: {e}")
+            if not ready.done():
+                ready.set_exception(e)
+        finally:
+            with self._drivers_lock:
+                if self._drivers.get(loop) is ready:
+                    del self._drivers[loop]
+
+    async def _driver(self):
+        """The Playwright driver of the caller's event loop, started by its first lease."""
+        loop = asyncio.get_running_loop()
+        with self._drivers_lock:
+            ready = self._drivers.get(loop)
+            if ready is None:
+                ready = loop.create_future()
+                self._drivers[loop] = ready
+                loop.create_task(self._run_driver(loop, ready))
+        return await asyncio.shield(ready)
+
+    async def _checkout(self, kind: str = CRAWL_LEASE) -> Optional[_WarmBrowser]:
+        if not config.BROWSER_POOL_ENABLED:
+            return None
+        loop = self._ensure_started()
+        try:
+            return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._checkout_in_pool(kind), loop))
+        except Exception as e:
+            logger.warning(f"Browser pool: no warm browser available ({e}); launching a private one")
+            return None
+
+    @asynccontextmanager
+    async def lease(self, label: str = '', on_queue: Optional[Callable[[int], None]] = None,
+                    kind: str = CRAWL_LEASE) -> AsyncIterator[BrowserLease]:
+        """
+        Leases a browser for the duration of the block. Contexts created on it are
+        closed when the block ends; the warm browser itself stays up for the next lease.
+        `kind` is CRAWL_LEASE or SCRAPER_LEASE and picks the browser's launch flags.
+        """
+        async with browser_governor.browser_slot(label, on_queue=on_queue):
+            p = await self._driver()
+            warm = await self._checkout(kind)
+            browser = None
+            lease = None
+            healthy = True
+            try:
+                if warm is not None:
+                    try:
+                        browser = await p.chromium.connect_over_cdp(warm.endpoint, timeout=config.BROWSER_POOL_CONNECT_TIMEOUT)
+                    except Exception as e:
+                        logger.warning(f"Browser pool: could not connect to browser #{warm.id}: {e}")
+                        healthy = False
+                if browser is None:
+                    self.fallback_launches += 1
+                    browser = await p.chromium.launch(headless=True, args=_launch_args(kind))
+                lease = BrowserLease(browser, warm=warm is not None and healthy)
+                try:
+                    yield lease
+                finally:
+                    try:
+                        if browser.is_connected():
+                            # For a CDP connection this closes our contexts and disconnects; the browser keeps running.
+                            await browser.close()
+                    except Exception as e:
+                        logger.debug(f"Browser pool: releasing lease for {label} failed: {e}")
+            finally:
+                if warm is not None:
+                    self._checkin(warm, lease.pages_opened if lease else 0, healthy)
+
+    def stats(self) -> Dict[str, Any]:
+        browsers = []
+        if self._loop is not None:
+            try:
+                browsers = asyncio.run_coroutine_threadsafe(self._browser_stats(), self._loop).result(timeout=2)
+            except Exception:
+                browsers = []
+        return {
+            'enabled': config.BROWSER_POOL_ENABLED,
+            'size': self.size,
+            'browsers': browsers,
+            'launches': self.launches,
+            'recycled': self.recycled,
+            'replaced_unhealthy': self.replaced_unhealthy,
+            'fallback_launches': self.fallback_launches,
+        }
+
+    async def _browser_stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [{
+            'id': w.id,
+            'kind': w.kind,
+            'age_seconds': round(now - w.launched_at, 1),
+            'pages_served': w.pages_served,
+            'leases_served': w.leases_served,
+            'active_leases': w.active_leases,
+            'retiring': w.retiring,
+            'healthy': w.healthy,
+        } for w in self._browsers]
+
+    async def _shutdown_in_pool(self) -> None:
+        browsers, self._browsers = self._browsers, []
+        for warm in browsers:
+            try:
+                if warm.browser.is_connected():
+                    await warm.browser.close()
+            except Exception as e:
+                logger.debug(f"Browser pool: closing browser #{warm.id} failed: {e}")
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        if self._loop is None or not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown_in_pool(), self._loop).result(timeout=timeout)
+        except Exception as e:
+            logger.debug(f"Browser pool shutdown incomplete: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+browser_pool = BrowserPool()
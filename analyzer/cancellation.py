@@ -0,0 +1,122 @@
+# analyzer/cancellation.py
+import asyncio
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+
+class AnalysisCancelled(Exception):
+    """Raised at a cooperative checkpoint once the analysis' CancelHandle was cancelled."""
+
+
+class CancelHandle:
+    """
+    Cancel handle for one analysis.
+
+    cancel() may be called from any thread (e.g. another Streamlit session).
+    The analysis notices it through wait(), which runs in the analysis' own
+    event loop, and through poll()/raise_if_cancelled() at cooperative
+    checkpoints. An optional `probe` (e.g. "is the user's session still
+    connected?") is checked on every poll and cancels the handle once it
+    returns True.
+    """
+
+    def __init__(self, label: str = '', probe: Optional[Callable[[], bool]] = None):
+        self.label = label
+        self.reason: Optional[str] = None
+        self._probe = probe
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = 'cancelled') -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            waiters = list(self._waiters)
+        logger.info(f"Cancelling analysis {self.label or ''}: {reason}")
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass # the waiting loop is already closed
+
+    def poll(self) -> bool:
+        """Runs the probe (if any) and returns whether the analysis should stop."""
+        if not self.cancelled and self._probe is not None:
+            try:
+                if self._probe():
+                    self.cancel('session ended')
+            except Exception as e:
+                logger.debug(f"Cancel probe failed for {self.label}: {e}")
+        return self.cancelled
+
+    def raise_if_cancelled(self) -> None:
+        if self.poll():
+            raise AnalysisCancelled(self.reason)
+
+    async def wait(self, poll_interval: Optional[float] = None) -> None:
+        """Returns once the handle is cancelled, polling the probe every `poll_interval` seconds."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._waiters.append((loop, event))
+        try:
+            while not event.is_set():
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=poll_interval or config.CANCEL_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    if self.poll():
+                        return
+        finally:
+            with self._lock:
+                if (loop, event) in self._waiters:
+                    self._waiters.remove((loop, event))
+
+
+class CancelRegistry:
+    """
+    Process-wide map of running analyses, one per key (the Streamlit session).
+    Starting a new analysis for a key cancels the one that key was still running.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handles: Dict[str, CancelHandle] = {}
+
+    def start(self, key: str, label: str = '', probe: Optional[Callable[[], bool]] = None) -> CancelHandle:
+        handle = CancelHandle(label=label, probe=probe)
+        with self._lock:
+            previous = self._handles.get(key)
+            self._handles[key] = handle
+        if previous is not None:
+            previous.cancel('superseded by a new analysis')
+        return handle
+
+    def cancel(self, key: str, reason: str = 'cancelled by user') -> bool:
+        with self._lock:
+            handle = self._handles.get(key)
+        if handle is None:
+            return False
+        handle.cancel(reason)
+        return True
+
+    def finish(self, key: str, handle: CancelHandle) -> None:
+        with self._lock:
+            if self._handles.get(key) is handle:
+                del self._handles[key]
+
+
+cancel_registry = CancelRegistry()
@@ -0,0 +1,132 @@
+# analyzer/checkpoint.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+CHECKPOINT_FORMAT_VERSION = 1
+
+
+def _snapshot(value: Any) -> Any:
+    """Copies the containers of `value` (sets become lists) so it can be serialized while the crawl goes on."""
+    if isinstance(value, dict):
+        return {key: _snapshot(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_snapshot(item) for item in value]
+    return value
+
+
+class CrawlCheckpoint:
+    """
+    Local checkpoint file for one analysis, keyed by the normalized start URL.
+
+    analyze_url_standalone saves its crawl state (frontier, visited set, per-page
+    results, running aggregates and the start-page LLM findings) after the start
+    page and then every CHECKPOINT_EVERY_PAGES pages. If the process dies, the
+    next analysis of the same URL picks the state up instead of rendering every
+    page again. The file is removed once an analysis completes.
+
+    During the crawl, save_soon() only copies the state's containers on the event loop;
+    encoding and writing happen in a worker thread, and a newer state replaces one that
+    is still waiting to be written. flush() waits for the pending writes.
+    """
+
+    def __init__(self, start_url: str, directory: Optional[str] = None):
+        self.start_url = start_url
+        self.directory = directory or config.CHECKPOINT_DIR
+        digest = hashlib.sha1(start_url.encode('utf-8')).hexdigest()[:20]
+        self.path = os.path.join(self.directory, f"{digest}.json")
+        self._pages_since_save = 0
+        self._pending: Optional[Dict[str, Any]] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Returns the saved state, or None if there is no usable checkpoint."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            self.delete()
+            return None
+
+        if data.get('version') != CHECKPOINT_FORMAT_VERSION or data.get('start_url') != self.start_url:
+            logger.info(f"Ignoring checkpoint {self.path}: written for another format or URL.")
+            return None
+        age = time.time() - data.get('saved_at', 0)
+        if age > config.CHECKPOINT_MAX_AGE_SECONDS:
+            logger.info(f"Discarding checkpoint for {self.start_url}: {age / 3600:.1f} hours old.")
+            self.delete()
+            return None
+        return data.get('state')
+
+    def _payload(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'version': CHECKPOINT_FORMAT_VERSION,
+            'start_url': self.start_url,
+            'saved_at': time.time(),
+            'state': _snapshot(state),
+        }
+
+    def _write(self, payload: Dict[str, Any]) -> None:
+        """Writes `payload` atomically (temp file + rename) so a crash never leaves half a checkpoint."""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            encoded = json.dumps(payload, ensure_ascii=False)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(encoded)
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write checkpoint for {self.start_url}: {e}")
+
+    def save(self, state: Dict[str, Any]) -> None:
+        """Writes `state` right away, blocking the caller."""
+        self._pages_since_save = 0
+        self._write(self._payload(state))
+
+    def save_soon(self, state: Dict[str, Any]) -> None:
+        """Snapshots `state` now and writes it from a worker thread (needs a running event loop)."""
+        self._pages_since_save = 0
+        self._pending = self._payload(state)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self) -> None:
+        while self._pending is not None:
+            payload, self._pending = self._pending, None
+            await asyncio.to_thread(self._write, payload)
+
+    async def flush(self) -> None:
+        """Waits until every state passed to save_soon() is on disk."""
+        if self._writer is not None:
+            await asyncio.shield(self._writer)
+
+    def page_done(self, state_factory) -> None:
+        """Counts one finished page and saves `state_factory()` every CHECKPOINT_EVERY_PAGES pages."""
+        self._pages_since_save += 1
+        if self._pages_since_save >= config.CHECKPOINT_EVERY_PAGES:
+            self.save_soon(state_factory())
+
+    async def discard(self) -> None:
+        """Drops states not yet written, waits for a write in progress and removes the file."""
+        self._pending = None
+        await self.flush()
+        self.delete()
+
+    def delete(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove checkpoint {self.path}: {e}")
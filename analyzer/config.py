@@ -9,12 +9,117 @@ analyzer/config.py
 MAX_PAGES_TO_ANALYZE = 27
 MAX_LINKS_TO_DISCOVER = 175
 PAGE_TIMEOUT = 25000  # milliseconds
+RETRY_PAGE_TIMEOUT = 12000  # milliseconds; smaller navigation budget for retried pages
+RETRY_MAX_ATTEMPTS = 3 # Total attempts per URL (first try included) before it is reported as failed
+RETRY_BASE_DELAY = 2.0 # seconds; backoff before the first retry, doubled for each further retry
+RETRY_MAX_DELAY = 30.0 # seconds; cap for the retry backoff
+ADAPTIVE_TIMEOUT_MULTIPLIER = 3.0 # Navigation timeout = host p95 latency x this
+ADAPTIVE_TIMEOUT_FLOOR = 5000 # milliseconds; never time out faster than this
+ADAPTIVE_TIMEOUT_CEILING = PAGE_TIMEOUT # milliseconds; never wait longer than the flat timeout
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = 5 # Navigations per host before the adaptive timeout kicks in
+ADAPTIVE_TIMEOUT_WINDOW = 50 # Most recent navigations per host kept for the percentiles
+QUIESCENCE_QUIET_WINDOW = 500 # milliseconds without DOM churn or network activity that count as "settled"
+QUIESCENCE_MAX_MUTATIONS = 5 # Mutations tolerated inside the quiet window (tickers, carousels)
+QUIESCENCE_MAX_WAIT = 10000 # milliseconds; give up waiting for a busy page after this
+QUIESCENCE_POLL_INTERVAL = 50 # milliseconds between in-page checks of the mutation window
+QUIESCENCE_WAIT_ALL_PAGES = False # Also wait for quiescence on crawled sub-pages (the start page always waits)
 NAVIGATION_TIMEOUT = 45000 # 45 seconds for navigation actions
 EXPECT_TIMEOUT = 20000 # 20 seconds for expect assertions (Playwright)
 
 #MAX_CATEGORY_PAGES_TO_SCAN = 25
-CRAWL_DELAY_MIN = 0.5
-CRAWL_DELAY_MAX = 1.0
+CRAWL_CONCURRENCY = 6 # Maximum crawl workers (open pages) per analysis; can be overridden per run
+PAGE_POOL_MAX_IDLE = CRAWL_CONCURRENCY # Reset pages kept per crawl context for the next URL; each keeps its page slot
+PAGE_POOL_MAX_USES = 50 # Navigations before a pooled page is replaced by a fresh one
+PAGE_POOL_RESET_TIMEOUT = 5000 # milliseconds; resetting a returned page to about:blank
+
+# HTTP-first crawling: sub-pages are fetched with aiohttp and parsed without a browser,
+# falling back to Playwright for pages (or whole sites) whose content is rendered by JavaScript
+HTTP_FIRST_ENABLED = True
+HTTP_FIRST_TIMEOUT = 20000 # milliseconds for one plain HTTP fetch
+HTTP_FIRST_MAX_CONNECTIONS = 10 # Pooled connections of the HTTP-first session
+HTTP_FIRST_MAX_BYTES = 5 * 1024 * 1024 # Larger bodies are cut off before parsing
+HTTP_FIRST_MIN_TEXT_CHARS = 200 # Raw HTML with less visible text than this (plus scripts) counts as client-rendered
+HTTP_FIRST_MIN_TEXT_RATIO = 0.5 # Start page probe: raw HTML must carry this share of the rendered text
+HTTP_FIRST_SITE_FALLBACK_PAGES = 5 # Client-rendered pages before the whole site switches to the browser...
+HTTP_FIRST_SITE_FALLBACK_RATIO = 0.5 # ...if they are at least this share of the pages fetched so far
+
+# JavaScript-disabled crawling: the start page is rendered with JS on and off (see js_mode.py)
+JS_MODE_DETECTION = True
+JS_MODE_MAX_DIFFERENCE = 0.1 # Share of text or links the JS-off render may lose and still be used
+JS_MODE_CACHE_MAX_AGE_SECONDS = 7 * 24 * 3600 # Per-domain decisions are probed again after this
+
+# DOM snapshot mode: crawled pages are released right after navigation plus one
+# DOMSnapshot.captureSnapshot, and all extractors run in Python on the snapshot
+DOM_SNAPSHOT_MODE = False
+DOM_SNAPSHOT_STORE_DIR = None # e.g. '.seobot_snapshots'; keeps every snapshot for re-extraction without recrawling
+
+# Adaptive per-host politeness (replaces fixed sleeps between pages)
+POLITENESS_INITIAL_CONCURRENCY = 3 # Parallel requests per host before any feedback
+POLITENESS_ADDITIVE_INCREASE = 0.5 # Added to a host's limit per healthy response
+POLITENESS_BACKOFF_FACTOR = 0.5 # Multiplies a host's limit on 429/503, failures or rising TTFB
+POLITENESS_LATENCY_RISE_FACTOR = 2.0 # TTFB above baseline x this counts as overload
+POLITENESS_LATENCY_SMOOTHING = 0.3 # EWMA weight of the newest TTFB sample
+POLITENESS_MIN_INTERVAL_STEP = 0.5 # seconds; first spacing between request starts after a backoff
+POLITENESS_MAX_INTERVAL = 10.0 # seconds; cap for the spacing between request starts
+POLITENESS_MAX_RETRY_AFTER = 60.0 # seconds; longest Retry-After pause we honor
+CRAWL_SHARDS = 0 # Worker processes (each with its own browser) for sharded crawling; 0 or 1 disables sharding
+CRAWL_SHARD_CONCURRENCY = 2 # Pages open at the same time inside each shard process
+
+# Shared Postgres frontier (several worker containers crawl one big site, see pg_frontier.py)
+PG_FRONTIER_ENABLED = False # Needs psycopg (or psycopg2) and a DSN
+PG_FRONTIER_DSN = None # e.g. 'postgresql://seobot:secret@db:5432/seobot'; falls back to the CRAWL_FRONTIER_DSN env variable
+PG_FRONTIER_LEASE_SECONDS = 120 # A claimed URL is handed to another worker if not finished within this
+PG_FRONTIER_WORKER_LANES = 2 # Pages crawled at once by each `python -m analyzer.pg_frontier` worker
+PG_FRONTIER_POLL_INTERVAL = 2.0 # seconds a worker waits when nothing is claimable but the job is not drained
+
+# Batch (multi-site) analysis limits
+BATCH_MAX_OPEN_PAGES = 8 # Pages open at once across all sites of a batch
+BATCH_MAX_PAGES_PER_DOMAIN = 3 # Pages open at once for any single site of a batch
+BATCH_MAX_CONCURRENT_SITES = 4 # Sites crawled at the same time
+BATCH_BROWSER_COUNT = 1 # Chromium processes shared by the batch
+
+# Novelty-based early stopping
+NOVELTY_STOP_ENABLED = False # Stop the crawl once pages stop adding new content
+NOVELTY_WINDOW = 5 # Pages over which the mean gain is measured
+NOVELTY_GAIN_THRESHOLD = 0.15 # Stop when the mean gain of the window falls below this (0..1)
+NOVELTY_MIN_PAGES = 8 # Never stop before this many pages were analyzed
+
+# URL-template clustering (e.g. /urun/<slug>, /blog/<yyyy>/<slug>)
+CLUSTER_SAMPLING_ENABLED = True # Crawl a sample per URL template instead of the first N URLs in sort order
+CLUSTER_SAMPLE_SIZE = 5 # URLs crawled per template
+CLUSTER_MIN_VARIANTS = 5 # Distinct values at one path position (under the same parent) that make it a placeholder
+
+# Crawl checkpoints (resume an interrupted analysis of the same URL)
+CHECKPOINT_ENABLED = True
+CHECKPOINT_DIR = '.seobot_checkpoints' # Relative to the working directory (the mounted /app volume in Docker)
+CHECKPOINT_EVERY_PAGES = 3 # Finished pages between checkpoint writes
+CHECKPOINT_MAX_AGE_SECONDS = 6 * 3600 # Older checkpoints are discarded instead of resumed
+CANCEL_POLL_INTERVAL = 1.0 # seconds between checks of an analysis' cancel probe (e.g. session still connected)
+
+# Process-wide browser governor (all sessions: crawls, SERP and competitor lookups)
+GOVERNOR_MAX_BROWSERS = 3 # Chromium processes running at once
+GOVERNOR_MAX_OPEN_PAGES = 12 # Pages open at once across all browsers
+GOVERNOR_MEMORY_HIGH_WATER_MB = 4096 # No new browser starts while memory use is above this (container limit is 5 GB)
+GOVERNOR_POLL_INTERVAL = 1.0 # seconds between queue position / memory re-checks of a waiting request
+
+# Warm browser pool (long-lived Chromium processes leased to crawls, SERP and competitor lookups)
+BROWSER_POOL_ENABLED = True # False launches a private browser per request, as before
+BROWSER_POOL_SIZE = 2 # Chromium processes kept warm; every lease gets its own isolated contexts
+BROWSER_POOL_MAX_BROWSERS = BROWSER_POOL_SIZE + 1 # Warm processes at most, including ones being recycled (not counted by the governor)
+BROWSER_POOL_RECYCLE_PAGES = 300 # Relaunch a browser after it has served this many pages
+BROWSER_POOL_RECYCLE_SECONDS = 30 * 60 # Relaunch a browser once it is older than this
+BROWSER_POOL_HEALTH_INTERVAL = 30.0 # seconds between health checks of the warm browsers
+BROWSER_POOL_CONNECT_TIMEOUT = 15000 # milliseconds; connecting to a warm browser over CDP
+BROWSER_POOL_LAUNCH_ARGS = [
+    '--no-sandbox', '--disable-blink-features=AutomationControlled',
+    '--disable-web-security', '--disable-features=VizDisplayCompositor',
+    '--disable-dev-shm-usage', '--no-first-run', '--disable-extensions',
+    '--disable-default-apps'
+] # SERP and competitor lookups only: anti-detection flags, web security off
+BROWSER_POOL_CRAWL_LAUNCH_ARGS = [
+    '--disable-dev-shm-usage', '--no-first-run', '--disable-extensions',
+    '--disable-default-apps'
+] # Crawl browsers load arbitrary sites, so they keep the same-origin policy and Chromium's defaults
 # Browser Configuration
 
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/129.0.0.0 Safari/537.36"
@@ -230,12 +335,22 @@ EXCLUDE_PATTERNS = [
 ]
 
 
+# Crawl frontier priority rules: the first rule whose pattern occurs in a URL sets its priority class.
+# Lower classes are crawled first; within a class, shallower pages come first.
+FRONTIER_PRIORITY_RULES = [
+    {'patterns': ['/blog', '/icerik'], 'priority': 0},
+    {'patterns': ['/about', '/contact', '/services', '/products'], 'priority': 1},
+]
+FRONTIER_DEFAULT_PRIORITY = 2
+
 # Product Related URL Patterns
 PRODUCT_PATTERNS = ['/product/', '/urun/', '/ürün/', '/item/','/shop']
 
 # Resource Types to Block When Crawling (for performance)
 BLOCKED_RESOURCES = ['image', 'stylesheet', 'font', 'media','other_resource_type_if_not_needed', 'other' , 'script'] # Keep 'script' if not essential for content
 
+REQUEST_BLOCKING_MODE = 'cdp' # 'cdp': blocked in the browser (Network.setBlockedURLs + Fetch patterns); 'route': Python callback per request
+
 # Domains to Block When Crawling (analytics, ads, etc.)
 BLOCKED_DOMAINS = [
     'google-analytics.com', 
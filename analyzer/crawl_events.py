@@ -0,0 +1,72 @@
+# analyzer/crawl_events.py
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+# Phases reported by CrawlProgress
+PHASE_SITEMAP = 'sitemap'
+PHASE_START_PAGE = 'start_page'
+PHASE_CRAWLING = 'crawling'
+
+
+@dataclass(frozen=True)
+class PageResult:
+    """One analyzed page; the same fields as an entry of analysis['page_statistics']."""
+    url: str
+    cleaned_text: str
+    title: Optional[str]
+    headings_count: int
+    images_count: int
+    missing_alt_tags_count: int
+    has_mobile_viewport: bool
+    cleaned_content_length: int
+    is_start_page: bool = False
+    # Network outcome (see page_timing.py); None where it was not measured
+    status_code: Optional[int] = None
+    redirect_chain: Optional[List[Dict[str, Any]]] = None
+    ttfb_seconds: Optional[float] = None
+    dom_content_loaded_seconds: Optional[float] = None
+    transfer_bytes: Optional[int] = None
+    requests_count: Optional[int] = None
+    blocked_requests_count: Optional[int] = None
+    failed_requests_count: Optional[int] = None
+
+    def to_page_stats(self) -> Dict[str, Any]:
+        return {
+            'url': self.url,
+            'cleaned_text': self.cleaned_text,
+            'title': self.title,
+            'headings_count': self.headings_count,
+            'images_count': self.images_count,
+            'missing_alt_tags_count': self.missing_alt_tags_count,
+            'has_mobile_viewport': self.has_mobile_viewport,
+            'cleaned_content_length': self.cleaned_content_length,
+            'status_code': self.status_code,
+            'redirect_chain': self.redirect_chain,
+            'ttfb_seconds': self.ttfb_seconds,
+            'dom_content_loaded_seconds': self.dom_content_loaded_seconds,
+            'transfer_bytes': self.transfer_bytes,
+            'requests_count': self.requests_count,
+            'blocked_requests_count': self.blocked_requests_count,
+            'failed_requests_count': self.failed_requests_count,
+        }
+
+
+@dataclass(frozen=True)
+class CrawlProgress:
+    """Snapshot of the crawl's progress."""
+    phase: str
+    pages_analyzed: int
+    max_pages: int
+    queued: int = 0
+    in_flight: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class AnalysisComplete:
+    """Last event of a stream: the same aggregate dict analyze_url returns (None if the analysis failed)."""
+    analysis: Optional[Dict[str, Any]] = field(default=None)
+
+
+CrawlEvent = Union[PageResult, CrawlProgress, AnalysisComplete]
@@ -0,0 +1,104 @@
+# analyzer/crawl_pool.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+
+class CrawlWorkerPool:
+    """
+    Sliding-window crawl engine. N long-lived async workers pull URLs from the
+    shared frontier and refill their slot as soon as the previous page finishes,
+    so one slow page no longer stalls the rest of a fixed-size batch.
+
+    The pool itself knows nothing about Playwright or report bookkeeping:
+    - `fetch(url)` does the actual page work and returns a result (or raises).
+    - `on_result(url, result_or_exception)` records the result and may push new
+      URLs into the frontier.
+    - `has_capacity(in_flight)` tells the pool whether another page may be started.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        fetch: Callable[[str], Awaitable[Any]],
+        on_result: Callable[[str, Any], None],
+        has_capacity: Callable[[int], bool],
+    ):
+        self.concurrency = max(1, int(concurrency))
+        self.fetch = fetch
+        self.on_result = on_result
+        self.has_capacity = has_capacity
+        self.in_flight = 0
+        self.pages_started = 0
+        self._stopped = False
+        self._frontier_changed: Optional[asyncio.Event] = None
+
+    def stop(self) -> None:
+        """Asks all workers to exit after their current page."""
+        self._stopped = True
+        self._notify()
+
+    def _notify(self) -> None:
+        if self._frontier_changed is not None:
+            self._frontier_changed.set()
+
+    async def _worker(self, worker_id: int, frontier) -> None:
+        while not self._stopped:
+            if not self.has_capacity(self.in_flight):
+                # Pages still in flight may fail and free capacity again, so only
+                # exit once nothing else can change the picture.
+                if self.in_flight == 0:
+                    break
+                await self._wait_for_change()
+                continue
+
+            url = frontier.pop()
+            if url is None:
+                # Parked retries keep the crawl alive: sleep until the next one is due or a page finishes.
+                retry_in = frontier.next_retry_in()
+                if self.in_flight == 0 and retry_in is None:
+                    break
+                await self._wait_for_change(retry_in)
+                continue
+
+            self.in_flight += 1
+            self.pages_started += 1
+            logger.debug(f"Worker {worker_id} picked {url} ({self.in_flight} in flight, {len(frontier)} queued)")
+            try:
+                result = await self.fetch(url)
+            except Exception as e:
+                result = e
+            finally:
+                self.in_flight -= 1
+
+            try:
+                self.on_result(url, result)
+            except Exception as e:
+                logger.error(f"Worker {worker_id} failed to record result for {url}: {e}", exc_info=True)
+            finally:
+                self._notify()
+
+    async def _wait_for_change(self, timeout: Optional[float] = None) -> None:
+        self._frontier_changed.clear()
+        try:
+            await asyncio.wait_for(self._frontier_changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, frontier) -> int:
+        """
+        Runs the workers until the frontier is exhausted, capacity is reached or
+        stop() is called. `frontier` must provide pop() -> Optional[str],
+        next_retry_in() -> Optional[float] and len() (see frontier.CrawlFrontier). Returns the number of pages that were started.
+        """
+        self._frontier_changed = asyncio.Event()
+        workers = [asyncio.create_task(self._worker(i, frontier)) for i in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                if not worker.done():
+                    worker.cancel()
+        return self.pages_started
@@ -0,0 +1,210 @@
+# analyzer/crawl_shards.py
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+# Spawn (not fork) so worker processes never inherit Streamlit's threads or a running event loop.
+_MP_CONTEXT = multiprocessing.get_context('spawn')
+
+
+def _shard_worker_main(shard_id: int, task_queue, result_queue, settings: Dict[str, Any]) -> None:
+    """Entry point of a shard process: runs its own event loop, browser and page loop."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(_shard_worker_loop(shard_id, task_queue, result_queue, settings))
+    except Exception as e:
+        logger.error(f"Shard {shard_id} exited with error: {e}", exc_info=True)
+
+
+async def _shard_worker_loop(shard_id: int, task_queue, result_queue, settings: Dict[str, Any]) -> None:
+    # Imported here so the coordinator can import this module without pulling in Playwright twice
+    # and to avoid a circular import with seomainfunctions.
+    from playwright.async_api import async_playwright
+    from analyzer import seomainfunctions
+    from analyzer.seo import SEOAnalyzer
+    from analyzer.page_pool import PagePool
+
+    analyzer_instance = SEOAnalyzer()
+    analyzer_instance.site_base_for_normalization = settings['site_base_for_normalization']
+    analyzer_instance.start_domain_normal_part = settings['start_domain_normal_part']
+
+    loop = asyncio.get_running_loop()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            context = await seomainfunctions._new_crawl_context(browser, javascript_enabled=settings.get('javascript_enabled', True))
+            page_pool = PagePool(context, max_idle=settings['lanes'], page_factory=seomainfunctions._new_crawl_page)
+
+            async def lane():
+                while True:
+                    task = await loop.run_in_executor(None, task_queue.get)
+                    if task is None:
+                        break
+                    task_id, url_to_crawl, page_timeout = task
+                    result_queue.put(('started', task_id, shard_id))
+                    try:
+                        async with page_pool.page() as page:
+                            page_result = await seomainfunctions._process_page_standalone(
+                                analyzer_instance,
+                                page, url_to_crawl,
+                                settings['start_domain_normal_part'],
+                                settings['site_base_for_normalization'],
+                                settings['exclude_patterns'],
+                                header_snippets_to_remove=settings['header_snippets'],
+                                footer_snippets_to_remove=settings['footer_snippets'],
+                                needless_info_snippets_to_remove=settings['needless_info_snippets'],
+                                skip_link_extraction=settings['skip_link_extraction'],
+                                page_timeout=page_timeout
+                            )
+                        result_queue.put(('result', task_id, page_result))
+                    except Exception as e:
+                        result_queue.put(('error', task_id, f"{type(e).__name__}: {e}"))
+
+            await asyncio.gather(*(lane() for _ in range(settings['lanes'])))
+        finally:
+            if browser.is_connected():
+                await browser.close()
+    logger.info(f"Shard {shard_id} finished.")
+
+
+class ShardedPageFetcher:
+    """
+    Coordinator side of the sharded crawl mode.
+
+    The coordinator (the normal analyze_url_standalone process) keeps the frontier,
+    dedup sets and report aggregates. K spawned worker processes each run their own
+    Chromium and `_process_page_standalone` loop, so text cleaning and link
+    normalization run on other CPU cores. `fetch(url)` has the same contract as the
+    local fetch used by CrawlWorkerPool: it returns the page result dict or raises.
+    """
+
+    def __init__(self, num_shards: int, lanes_per_shard: int, settings: Dict[str, Any]):
+        self.num_shards = max(1, int(num_shards))
+        self.lanes_per_shard = max(1, int(lanes_per_shard))
+        self.settings = dict(settings, lanes=self.lanes_per_shard)
+        self._task_queue = _MP_CONTEXT.Queue()
+        self._result_queue = _MP_CONTEXT.Queue()
+        self._processes: List[Any] = []
+        self._task_ids = itertools.count()
+        self._pending: Dict[int, Any] = {}    # task_id -> (future, loop)
+        self._started_on: Dict[int, int] = {} # task_id -> shard_id
+        self._lock = threading.Lock()
+        self._closing = False
+        self._reader: Optional[threading.Thread] = None
+
+    @property
+    def total_lanes(self) -> int:
+        return self.num_shards * self.lanes_per_shard
+
+    def start(self) -> None:
+        for shard_id in range(self.num_shards):
+            process = _MP_CONTEXT.Process(
+                target=_shard_worker_main,
+                args=(shard_id, self._task_queue, self._result_queue, self.settings),
+                name=f"seobot-crawl-shard-{shard_id}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._reader = threading.Thread(target=self._read_results, name="seobot-shard-reader", daemon=True)
+        self._reader.start()
+        logger.info(f"Started {self.num_shards} crawl shards with {self.lanes_per_shard} lanes each.")
+
+    async def fetch(self, url: str, page_timeout: Optional[int] = None) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        task_id = next(self._task_ids)
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("Sharded fetcher is closed")
+            self._pending[task_id] = (future, loop)
+        self._task_queue.put((task_id, url, page_timeout))
+        return await future
+
+    def _resolve(self, task_id: int, result: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            entry = self._pending.pop(task_id, None)
+            self._started_on.pop(task_id, None)
+        if not entry:
+            return
+        future, loop = entry
+
+        def _set():
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        loop.call_soon_threadsafe(_set)
+
+    def _fail_tasks_of_dead_shards(self) -> None:
+        dead_shards = {i for i, process in enumerate(self._processes) if not process.is_alive()}
+        if not dead_shards:
+            return
+        with self._lock:
+            if len(dead_shards) == len(self._processes):
+                orphaned = list(self._pending.keys())
+            else:
+                orphaned = [task_id for task_id, shard_id in self._started_on.items() if shard_id in dead_shards]
+        for task_id in orphaned:
+            self._resolve(task_id, error=RuntimeError("Crawl shard process died while processing the page"))
+
+    def _read_results(self) -> None:
+        while True:
+            try:
+                message = self._result_queue.get(timeout=1.0)
+            except queue.Empty:
+                self._fail_tasks_of_dead_shards()
+                if self._closing and not any(process.is_alive() for process in self._processes):
+                    break
+                continue
+            except (EOFError, OSError):
+                break
+
+            kind, task_id, payload = message
+            if kind == 'started':
+                with self._lock:
+                    if task_id in self._pending:
+                        self._started_on[task_id] = payload
+            elif kind == 'result':
+                self._resolve(task_id, result=payload)
+            else:
+                self._resolve(task_id, error=RuntimeError(payload))
+
+    def close(self, timeout: float = 15.0, terminate: bool = False) -> None:
+        """
+        Stops all shard processes. Blocking; call via asyncio.to_thread from async code.
+        The shards finish the pages already queued (up to `timeout` seconds each) unless
+        `terminate` is set, e.g. for a cancelled crawl, which stops them right away.
+        """
+        with self._lock:
+            self._closing = True
+        if terminate:
+            # Queued tasks are dropped; do not wait for them to be flushed to the dead shards.
+            self._task_queue.cancel_join_thread()
+        else:
+            for _ in range(self.total_lanes):
+                self._task_queue.put(None)
+        for process in self._processes:
+            if not terminate:
+                process.join(timeout)
+                if process.is_alive():
+                    logger.warning(f"Crawl shard {process.name} did not exit in time, terminating it.")
+            if process.is_alive():
+                process.terminate()
+                process.join(5)
+        if self._reader:
+            self._reader.join(5)
+        with self._lock:
+            leftover = list(self._pending.keys())
+        for task_id in leftover:
+            self._resolve(task_id, error=RuntimeError("Sharded fetcher closed before the page was processed"))
+        logger.info("All crawl shards stopped.")
@@ -0,0 +1,126 @@
+# analyzer/dom_snapshot.py
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from playwright.async_api import Page
+
+import analyzer.config as config
+from analyzer.http_fetch import PageHtmlParser, parse_html
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+FORMAT_CDP = 'cdp' # DOMSnapshot.captureSnapshot payload
+FORMAT_HTML = 'html' # Serialized DOM (page.content()) where CDP is unavailable
+
+_ELEMENT_NODE = 1
+_TEXT_NODE = 3
+# Text nodes without a layout object are not rendered (display:none, collapsed whitespace),
+# but these parents still need their text for the title and JSON-LD.
+_UNRENDERED_TEXT_PARENTS = {'title', 'script'}
+
+
+async def capture_dom_snapshot(page: Page) -> Dict[str, Any]:
+    """
+    One serialized snapshot of the rendered page: DOMSnapshot.captureSnapshot over CDP
+    (node tree plus which nodes have a layout box), or the serialized HTML as a fallback.
+    Everything the extractors need is in the snapshot, so the page can be released right after.
+    """
+    snapshot = {'url': page.url, 'captured_at': time.time()}
+    try:
+        session = await page.context.new_cdp_session(page)
+        try:
+            snapshot['cdp'] = await session.send('DOMSnapshot.captureSnapshot', {'computedStyles': []})
+            snapshot['format'] = FORMAT_CDP
+        finally:
+            try:
+                await session.detach()
+            except Exception:
+                pass
+    except Exception as e:
+        logger.debug(f"DOMSnapshot.captureSnapshot unavailable for {page.url} ({e}); serializing the DOM instead")
+        snapshot['html'] = await page.content()
+        snapshot['format'] = FORMAT_HTML
+    return snapshot
+
+
+def parse_snapshot(snapshot: Dict[str, Any]) -> PageHtmlParser:
+    """Runs the offline extractors (http_fetch.PageHtmlParser) over a captured snapshot."""
+    if snapshot.get('format') != FORMAT_CDP:
+        return parse_html(snapshot.get('html') or '', snapshot.get('url') or '')
+
+    payload = snapshot['cdp']
+    strings = payload.get('strings', [])
+    document = payload['documents'][0] # Main frame; iframes are separate documents
+    nodes = document['nodes']
+
+    def string_at(index: int) -> str:
+        return strings[index] if 0 <= index < len(strings) else ''
+
+    base_url = string_at(document.get('baseURL', -1)) or snapshot.get('url') or ''
+    parser = PageHtmlParser(base_url)
+    rendered = set(document.get('layout', {}).get('nodeIndex', []))
+    parent_indexes = nodes.get('parentIndex', [])
+    node_types = nodes.get('nodeType', [])
+    node_names = nodes.get('nodeName', [])
+    node_values = nodes.get('nodeValue', [])
+    attributes = nodes.get('attributes', [])
+
+    # Nodes come in document order, so the open elements form a stack: before a node is visited,
+    # every open element that is not one of its ancestors gets closed.
+    open_nodes = [] # (node index, tag or None for non-element nodes)
+    for index, node_type in enumerate(node_types):
+        parent_index = parent_indexes[index] if index < len(parent_indexes) else -1
+        while open_nodes and open_nodes[-1][0] != parent_index:
+            _, open_tag = open_nodes.pop()
+            if open_tag:
+                parser.handle_endtag(open_tag)
+        tag = string_at(node_names[index]).lower() if node_type == _ELEMENT_NODE else ''
+        if tag and not tag.startswith('::'): # ::before / ::after pseudo-elements stay transparent
+            raw_attributes = attributes[index] if index < len(attributes) else []
+            attr_list = [(string_at(raw_attributes[i]).lower(), string_at(raw_attributes[i + 1]))
+                         for i in range(0, len(raw_attributes) - 1, 2)]
+            parser.handle_starttag(tag, attr_list)
+            open_nodes.append((index, tag))
+        elif node_type == _TEXT_NODE:
+            parent_tag = open_nodes[-1][1] if open_nodes else None
+            if index in rendered or parent_tag in _UNRENDERED_TEXT_PARENTS:
+                parser.handle_data(string_at(node_values[index]) if index < len(node_values) else '')
+            open_nodes.append((index, None))
+        else:
+            open_nodes.append((index, None)) # document, shadow roots, comments: transparent
+    while open_nodes:
+        _, open_tag = open_nodes.pop()
+        if open_tag:
+            parser.handle_endtag(open_tag)
+    parser.title = ' '.join(parser.title.split())
+    return parser
+
+
+def snapshot_path(url: str, directory: Optional[str] = None) -> str:
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:20]
+    return os.path.join(directory or config.DOM_SNAPSHOT_STORE_DIR, f"{digest}.json.gz")
+
+
+def save_snapshot(url: str, snapshot: Dict[str, Any], directory: Optional[str] = None) -> Optional[str]:
+    """Keeps a snapshot (gzipped JSON, keyed by URL) so new extractors can run on it without recrawling."""
+    path = snapshot_path(url, directory)
+    tmp_path = f"{path}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(dict(snapshot, page_url=url), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Could not store the DOM snapshot of {url}: {e}")
+        return None
+
+
+def load_snapshot(path: str) -> Dict[str, Any]:
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
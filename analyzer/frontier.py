@@ -0,0 +1,217 @@
+# analyzer/frontier.py
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+# URL states tracked by the frontier
+QUEUED = 'queued'
+RETRY_WAIT = 'retry_wait'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+FAILED = 'failed'
+
+
+@dataclass(frozen=True)
+class PatternRule:
+    """Scores a URL into `priority_class` when any of `patterns` occurs in its lowercased form."""
+    patterns: Tuple[str, ...]
+    priority_class: int
+
+    def __call__(self, url: str) -> Optional[int]:
+        lowered = url.lower()
+        return self.priority_class if any(p in lowered for p in self.patterns) else None
+
+
+# A scoring rule is any callable url -> priority class (lower crawls first), or None if it does not apply.
+ScoringRule = Callable[[str], Optional[int]]
+
+
+def rules_from_config(rule_specs: Optional[Sequence[Dict]] = None) -> List[ScoringRule]:
+    """Builds PatternRules from config.FRONTIER_PRIORITY_RULES-style dicts."""
+    specs = config.FRONTIER_PRIORITY_RULES if rule_specs is None else rule_specs
+    return [PatternRule(tuple(p.lower() for p in spec['patterns']), int(spec['priority'])) for spec in specs]
+
+
+def score_url(url: str, rules: Iterable[ScoringRule], default_class: Optional[int] = None) -> int:
+    """Returns the priority class of the first matching rule, or the default class."""
+    for rule in rules:
+        priority_class = rule(url)
+        if priority_class is not None:
+            return priority_class
+    return config.FRONTIER_DEFAULT_PRIORITY if default_class is None else default_class
+
+
+class CrawlFrontier:
+    """
+    Priority frontier for the crawl.
+
+    - O(1) membership through a url -> state dict (queued / in_flight / done / failed).
+    - A heap keyed by (priority class, discovery depth, insertion order), so important
+      sections are crawled first and shallow pages before deep ones.
+    - Priority classes come from pluggable scoring rules (see PatternRule) instead of
+      hard-coded substring checks.
+    - Failed URLs can be parked in a delayed retry queue (schedule_retry); they are
+      moved back into the heap once their backoff has elapsed.
+    """
+
+    def __init__(self, scoring_rules: Optional[Sequence[ScoringRule]] = None):
+        self.scoring_rules: List[ScoringRule] = list(scoring_rules) if scoring_rules is not None else rules_from_config()
+        self._heap: List[Tuple[int, int, int, str]] = []
+        self._states: Dict[str, str] = {}
+        self._depths: Dict[str, int] = {}
+        self._entry_seq: Dict[str, int] = {} # url -> sequence number of its live heap entry
+        self._counter = itertools.count()
+        self._queued = 0
+        self._delayed: List[Tuple[float, int, str]] = [] # (ready_at, seq, url) waiting for a retry
+        self._retry_waiting = 0
+        self._attempts: Dict[str, int] = {}
+
+    def score(self, url: str) -> int:
+        return score_url(url, self.scoring_rules)
+
+    def add(self, url: str, depth: int = 0, priority_class: Optional[int] = None) -> bool:
+        """Queues `url` unless the frontier has already seen it. Returns True if it was added."""
+        if url in self._states:
+            return False
+        self._depths[url] = depth
+        self._push(url, priority_class)
+        return True
+
+    def _push(self, url: str, priority_class: Optional[int]) -> None:
+        priority = self.score(url) if priority_class is None else priority_class
+        seq = next(self._counter)
+        heapq.heappush(self._heap, (priority, self._depths.get(url, 0), seq, url))
+        self._entry_seq[url] = seq
+        self._set_state(url, QUEUED)
+        self._queued += 1
+
+    def add_many(self, urls: Iterable[str], depth: int = 0) -> int:
+        return sum(1 for u in urls if self.add(u, depth))
+
+    def mark_seen(self, url: str, state: str = DONE, depth: int = 0) -> None:
+        """Registers a URL that was handled outside the frontier (e.g. the start page)."""
+        if self._states.get(url) == QUEUED:
+            self._queued -= 1
+        self._set_state(url, state)
+        self._depths.setdefault(url, depth)
+
+    def _set_state(self, url: str, state: str) -> None:
+        previous = self._states.get(url)
+        if previous == RETRY_WAIT and state != RETRY_WAIT:
+            self._retry_waiting -= 1
+        elif state == RETRY_WAIT and previous != RETRY_WAIT:
+            self._retry_waiting += 1
+        self._states[url] = state
+
+    def _release_due_retries(self) -> None:
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, url = heapq.heappop(self._delayed)
+            if self._states.get(url) == RETRY_WAIT:
+                self._push(url, None)
+
+    def pop(self) -> Optional[str]:
+        """Returns the best queued URL and marks it in flight, or None if nothing is queued."""
+        self._release_due_retries()
+        while self._heap:
+            _, _, seq, url = heapq.heappop(self._heap)
+            if self._states.get(url) != QUEUED or self._entry_seq.get(url) != seq:
+                continue # stale entry
+            self._states[url] = IN_FLIGHT
+            self._queued -= 1
+            self._attempts[url] = self._attempts.get(url, 0) + 1
+            return url
+        return None
+
+    def schedule_retry(self, url: str, delay_seconds: float) -> None:
+        """Parks `url` in the delayed retry queue; pop() hands it out again after `delay_seconds`."""
+        if self._states.get(url) == QUEUED:
+            return
+        self._set_state(url, RETRY_WAIT)
+        heapq.heappush(self._delayed, (time.monotonic() + max(0.0, delay_seconds), next(self._counter), url))
+
+    def next_retry_in(self) -> Optional[float]:
+        """Seconds until the next parked retry becomes due, or None if no retry is waiting."""
+        while self._delayed and self._states.get(self._delayed[0][2]) != RETRY_WAIT:
+            heapq.heappop(self._delayed)
+        if not self._delayed:
+            return None
+        return max(0.0, self._delayed[0][0] - time.monotonic())
+
+    def attempts(self, url: str) -> int:
+        """How many times `url` has been handed out by pop()."""
+        return self._attempts.get(url, 0)
+
+    def requeue(self, url: str, priority_class: Optional[int] = None) -> None:
+        """Puts an in-flight or failed URL back into the queue."""
+        if self._states.get(url) == QUEUED:
+            return
+        self._push(url, priority_class)
+
+    def mark_done(self, url: str) -> None:
+        self.mark_seen(url, DONE)
+
+    def mark_failed(self, url: str) -> None:
+        self.mark_seen(url, FAILED)
+
+    def state(self, url: str) -> Optional[str]:
+        return self._states.get(url)
+
+    def depth_of(self, url: str) -> int:
+        return self._depths.get(url, 0)
+
+    def queued_urls(self) -> List[str]:
+        """Queued URLs in crawl order (for checkpoints and logging)."""
+        return [url for _, _, seq, url in sorted(self._heap)
+                if self._states.get(url) == QUEUED and self._entry_seq.get(url) == seq]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable state for checkpoints (see checkpoint.py)."""
+        return {
+            'queued': self.queued_urls(),
+            'states': dict(self._states),
+            'depths': dict(self._depths),
+            'attempts': dict(self._attempts),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any], scoring_rules: Optional[Sequence[ScoringRule]] = None) -> 'CrawlFrontier':
+        """
+        Rebuilds a frontier from snapshot(). Pages that were in flight or waiting for a
+        retry when the snapshot was taken never finished, so they are queued again.
+        """
+        frontier = cls(scoring_rules)
+        frontier._depths.update(snapshot.get('depths', {}))
+        frontier._attempts.update(snapshot.get('attempts', {}))
+        queued = list(snapshot.get('queued', []))
+        for url, state in snapshot.get('states', {}).items():
+            if state in (DONE, FAILED):
+                frontier._states[url] = state
+            elif state in (IN_FLIGHT, RETRY_WAIT) and url not in queued:
+                queued.append(url)
+        for url in queued:
+            frontier._push(url, None)
+        return frontier
+
+    def counts(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, RETRY_WAIT: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        for state in self._states.values():
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._states
+
+    def __len__(self) -> int:
+        """Number of URLs waiting to be crawled, including parked retries."""
+        return self._queued + self._retry_waiting
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
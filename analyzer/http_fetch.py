@@ -0,0 +1,492 @@
+# analyzer/http_fetch.py
+"""
+HTTP-first page fetching: most crawled pages are server-rendered (and the crawl blocks
+external scripts anyway), so they are fetched with aiohttp and parsed in one pass with
+html.parser. Pages that look client-rendered fall back to the browser, per page, and the
+whole site switches to the browser when that keeps happening or when the start-page probe
+shows the raw HTML missing most of the rendered text.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from html.parser import HTMLParser
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+import aiohttp
+
+import analyzer.config as config
+from analyzer.link_extractor import (
+    SOURCE_CONTENT, SOURCE_FOOTER, SOURCE_INTERACTIVE, SOURCE_NAV, SOURCE_PAGINATION, SOURCE_STRUCTURED_DATA,
+)
+from analyzer.methods import extract_text
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+MODE_HTTP = 'http'
+MODE_BROWSER = 'browser'
+
+_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+_NO_TEXT_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'head', 'title', 'iframe', 'object', 'canvas'}
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'fieldset', 'figcaption', 'figure',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre',
+    'section', 'table', 'td', 'th', 'tr', 'ul',
+}
+# The same regions as the in-page link extractor's NAV / FOOTER / PAGINATION selectors
+_NAV_CLASSES = {'nav', 'navigation', 'menu', 'navbar', 'main-menu', 'primary-menu'}
+_FOOTER_CLASSES = {'footer', 'site-footer'}
+_PAGINATION_CLASSES = {'pagination', 'nav-links', 'wp-pagenavi', 'blog-pagination'}
+_SPA_ROOT_IDS = {'root', 'app', '__next', '__nuxt', '___gatsby', 'svelte'}
+_ONCLICK_URL_RE = re.compile(r"""['"`]([^'"`]+)['"`]""")
+
+
+class PageHtmlParser(HTMLParser):
+    """
+    Single-pass extractor over raw HTML with the same outputs as the in-page extractors
+    (page_metrics.py, link_extractor.py): title, headings by level, images / missing alt,
+    viewport, meta tags, canonical, lang, an innerText-like text and tagged raw links.
+    """
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.title = ''
+        self.headings = {f'h{level}': 0 for level in range(1, 7)}
+        self.images_count = 0
+        self.missing_alt_tags_count = 0
+        self.has_mobile_viewport = False
+        self.meta: Dict[str, str] = {}
+        self.canonical: Optional[str] = None
+        self.lang: Optional[str] = None
+        self.links: Dict[str, Set[str]] = {}
+        self.script_count = 0
+        self.spa_markers: Set[str] = set()
+        self.noscript_text = ''
+        self._text_parts: List[str] = []
+        self._stack: List[Tuple[str, str]] = [] # (tag, region or '')
+        self._region_depth = {SOURCE_NAV: 0, SOURCE_FOOTER: 0, SOURCE_PAGINATION: 0}
+        self._no_text_depth = 0
+        self._in_title = False
+        self._in_noscript = False
+        self._itemscope_depth = 0
+        self._json_ld: Optional[List[str]] = None
+
+    def _add_link(self, raw_url: str, source: str) -> None:
+        raw_url = (raw_url or '').strip()
+        if raw_url:
+            self.links.setdefault(urljoin(self.base_url, raw_url), set()).add(source)
+
+    def _region_of(self, tag: str, attrs: Dict[str, str]) -> str:
+        classes = set((attrs.get('class') or '').lower().split())
+        role = (attrs.get('role') or '').lower()
+        if classes & _PAGINATION_CLASSES:
+            return SOURCE_PAGINATION
+        if tag in ('nav', 'header') or role == 'navigation' or classes & _NAV_CLASSES:
+            return SOURCE_NAV
+        if tag == 'footer' or role == 'contentinfo' or classes & _FOOTER_CLASSES:
+            return SOURCE_FOOTER
+        return ''
+
+    def _link_source(self) -> str:
+        for region in (SOURCE_PAGINATION, SOURCE_NAV, SOURCE_FOOTER):
+            if self._region_depth[region]:
+                return region
+        return SOURCE_CONTENT
+
+    def handle_starttag(self, tag: str, attr_list) -> None:
+        attrs = {name: (value or '') for name, value in attr_list}
+        if tag in _BLOCK_TAGS:
+            self._text_parts.append('\n')
+
+        if tag == 'html':
+            self.lang = attrs.get('lang') or None
+        elif tag == 'base' and attrs.get('href'):
+            self.base_url = urljoin(self.base_url, attrs['href'])
+        elif tag == 'title' and not self.title:
+            self._in_title = True
+        elif tag == 'meta':
+            key = (attrs.get('name') or attrs.get('property') or attrs.get('http-equiv') or '').strip().lower()
+            if key and key not in self.meta:
+                self.meta[key] = attrs.get('content', '')[:500]
+            if attrs.get('name') == 'viewport':
+                self.has_mobile_viewport = True
+        elif tag == 'link' and 'canonical' in (attrs.get('rel') or '').lower().split() and attrs.get('href'):
+            self.canonical = self.canonical or urljoin(self.base_url, attrs['href'])
+        elif tag in self.headings:
+            self.headings[tag] += 1
+        elif tag == 'img':
+            self.images_count += 1
+            if not attrs.get('alt', '').strip():
+                self.missing_alt_tags_count += 1
+        elif tag == 'script':
+            self.script_count += 1
+            if (attrs.get('type') or '').lower() == 'application/ld+json':
+                self._json_ld = []
+        elif tag == 'noscript':
+            self._in_noscript = True
+
+        element_id = (attrs.get('id') or '').lower()
+        if element_id in _SPA_ROOT_IDS:
+            self.spa_markers.add(f'#{element_id}')
+        for marker in ('ng-app', 'data-reactroot', 'data-v-app'):
+            if marker in attrs:
+                self.spa_markers.add(marker)
+
+        if 'itemprop' in attrs and self._itemscope_depth and re.search('url|href', attrs['itemprop'], re.I):
+            value = (attrs.get('content') or attrs.get('href') or '').strip()
+            if value.startswith(('http://', 'https://')):
+                self._add_link(value, SOURCE_STRUCTURED_DATA)
+
+        if tag == 'a' and 'href' in attrs:
+            classes = set(attrs.get('class', '').lower().split())
+            source = SOURCE_PAGINATION if classes & {'next', 'page-numbers'} else self._link_source()
+            self._add_link(attrs['href'], source)
+        elif attrs.get('data-href') or attrs.get('data-url') or (tag == 'button' and attrs.get('onclick')):
+            target = attrs.get('data-href') or attrs.get('data-url') or attrs.get('onclick')
+            if 'javascript:' not in target:
+                if 'location.href' in target or 'window.open' in target:
+                    match = _ONCLICK_URL_RE.search(target)
+                    if match:
+                        target = match.group(1)
+                self._add_link(target, SOURCE_INTERACTIVE)
+
+        if tag in _VOID_TAGS:
+            return
+        region = self._region_of(tag, attrs)
+        if region:
+            self._region_depth[region] += 1
+        if 'itemscope' in attrs:
+            self._itemscope_depth += 1
+            region += '+itemscope'
+        if tag in _NO_TEXT_TAGS:
+            self._no_text_depth += 1
+        self._stack.append((tag, region))
+
+    def handle_startendtag(self, tag: str, attr_list) -> None:
+        self.handle_starttag(tag, attr_list)
+        if tag not in _VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == 'title':
+            self._in_title = False
+        elif tag == 'noscript':
+            self._in_noscript = False
+        elif tag == 'script' and self._json_ld is not None:
+            self._collect_json_ld(''.join(self._json_ld))
+            self._json_ld = None
+        if tag in _BLOCK_TAGS:
+            self._text_parts.append('\n')
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return # stray end tag
+        while self._stack:
+            open_tag, region = self._stack.pop()
+            if region.endswith('+itemscope'):
+                self._itemscope_depth -= 1
+                region = region[:-len('+itemscope')]
+            if region:
+                self._region_depth[region] -= 1
+            if open_tag in _NO_TEXT_TAGS:
+                self._no_text_depth -= 1
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data
+        if self._json_ld is not None:
+            self._json_ld.append(data)
+        if self._in_noscript:
+            self.noscript_text += data
+        if not self._no_text_depth:
+            self._text_parts.append(data)
+
+    def _collect_json_ld(self, raw: str) -> None:
+        def walk(value):
+            if isinstance(value, str):
+                if value.startswith(('http://', 'https://')):
+                    self._add_link(value, SOURCE_STRUCTURED_DATA)
+            elif isinstance(value, dict):
+                for item in value.values():
+                    walk(item)
+            elif isinstance(value, list):
+                for item in value:
+                    walk(item)
+        try:
+            walk(json.loads(raw))
+        except ValueError:
+            pass
+
+    @property
+    def text(self) -> str:
+        lines = (' '.join(line.split()) for line in ''.join(self._text_parts).split('\n'))
+        return '\n'.join(line for line in lines if line)
+
+
+def parse_html(html: str, base_url: str) -> PageHtmlParser:
+    parser = PageHtmlParser(base_url)
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception as e:
+        logger.debug(f"HTML parsing stopped early for {base_url}: {e}")
+    parser.title = ' '.join(parser.title.split())
+    return parser
+
+
+def client_rendered_reason(parsed: PageHtmlParser) -> Optional[str]:
+    """Why the raw HTML is probably not what users see (content rendered by JavaScript), or None."""
+    text_length = len(parsed.text)
+    if text_length >= config.HTTP_FIRST_MIN_TEXT_CHARS:
+        return None
+    if parsed.spa_markers:
+        return 'spa_shell'
+    if 'javascript' in parsed.noscript_text.lower():
+        return 'noscript_notice'
+    if parsed.script_count:
+        return 'little_text'
+    return None
+
+
+def filter_internal_links(raw_links: Dict[str, Set[str]], base_domain_check_part: str,
+                          exclude_patterns: List[str]) -> Dict[str, Set[str]]:
+    """The in-page extractor's filters: http(s), same domain (www-insensitive), no exclude pattern."""
+    base_domain = base_domain_check_part.lower()
+    lowered_patterns = [p.lower() for p in exclude_patterns]
+    internal = {}
+    for url, sources in raw_links.items():
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            continue
+        hostname = parsed.hostname.lower()
+        if (hostname[4:] if hostname.startswith('www.') else hostname) != base_domain:
+            continue
+        lowered = url.lower()
+        if any(p in lowered for p in lowered_patterns):
+            continue
+        internal[url] = sources
+    return internal
+
+
+def apply_parsed_page(analyzer_instance, result: Dict[str, Any], landed_url: str, parsed: PageHtmlParser,
+                      skip_link_extraction: bool = False) -> Dict[str, Any]:
+    """
+    Fills a page result (the shape _process_page_standalone returns) from an offline parse:
+    metrics, landed-URL checks, cleaned text and tagged internal links. Used for raw HTML
+    fetched over HTTP and for DOM snapshots of rendered pages (dom_snapshot.py).
+    """
+    result.update({
+        'title': parsed.title, 'headings_count': sum(parsed.headings.values()), 'headings_by_level': parsed.headings,
+        'images_count': parsed.images_count, 'missing_alt_tags_count': parsed.missing_alt_tags_count,
+        'has_mobile_viewport': parsed.has_mobile_viewport, 'cleaned_content_length': 0,
+        'meta_tags': parsed.meta, 'canonical_url': parsed.canonical, 'html_lang': parsed.lang,
+    })
+    site_base = analyzer_instance.site_base_for_normalization
+    domain = analyzer_instance.start_domain_normal_part
+    normalized_landed_url = analyzer_instance._normalize_url(landed_url, site_base)
+    if not normalized_landed_url:
+        result['error'] = f"Landed on a URL outside the site: {landed_url}"
+        return result
+    if urlparse(normalized_landed_url).netloc.replace('www.', '', 1).lower() != domain.lower():
+        result['error'] = f"Redirected off site to {normalized_landed_url}"
+        return result
+    result['url'] = normalized_landed_url
+
+    text_content = parsed.text
+    if text_content:
+        try:
+            result['cleaned_text'] = extract_text(
+                text_content,
+                header_snippets=analyzer_instance.identified_header_texts,
+                footer_snippets=analyzer_instance.identified_footer_texts,
+                needless_info_snippets=analyzer_instance.identified_needless_info_texts,
+            )
+        except Exception as extract_error:
+            logging.error(f"extract_text failed for {normalized_landed_url}: {extract_error}")
+            result['cleaned_text'] = text_content
+    result['cleaned_content_length'] = len(result['cleaned_text'])
+
+    if not skip_link_extraction:
+        tagged_links: Dict[str, Set[str]] = {}
+        for link_str, sources in filter_internal_links(parsed.links, domain, config.EXCLUDE_PATTERNS).items():
+            normalized_link = analyzer_instance._normalize_url(link_str, site_base)
+            if normalized_link:
+                tagged_links.setdefault(normalized_link, set()).update(sources)
+        result['link_sources'] = {link: sorted(sources) for link, sources in tagged_links.items()}
+        result['new_links'] = set(tagged_links)
+    return result
+
+
+class HttpFirstFetcher:
+    """
+    Crawl fetch function (same signature and result shape as the browser fetch) that tries a
+    plain HTTP request first and falls back to `browser_fetch` for pages that need rendering.
+    """
+
+    def __init__(self, analyzer_instance, browser_fetch: Callable[..., Awaitable[Dict[str, Any]]],
+                 skip_link_extraction: bool = False):
+        self.analyzer = analyzer_instance
+        self.browser_fetch = browser_fetch
+        self.skip_link_extraction = skip_link_extraction
+        self.site_mode = MODE_HTTP
+        self.site_mode_reason: Optional[str] = None
+        self.probe: Optional[Dict[str, Any]] = None
+        self.pages = {MODE_HTTP: 0, MODE_BROWSER: 0}
+        self.fallback_reasons: Dict[str, int] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={'User-Agent': config.USER_AGENT, 'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8'},
+                connector=aiohttp.TCPConnector(limit=config.HTTP_FIRST_MAX_CONNECTIONS, limit_per_host=config.HTTP_FIRST_MAX_CONNECTIONS),
+                timeout=aiohttp.ClientTimeout(total=config.HTTP_FIRST_TIMEOUT / 1000),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def fetch_html(self, url_to_fetch: str, page_timeout: Optional[int] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Downloads a page; returns (navigation outcome, decoded HTML or None if not HTML).
+        `page_timeout` (milliseconds, e.g. the adaptive per-host timeout) shortens HTTP_FIRST_TIMEOUT but never extends it.
+        """
+        timeout_ms = min(page_timeout, config.HTTP_FIRST_TIMEOUT) if page_timeout else config.HTTP_FIRST_TIMEOUT
+        outcome = {'status_code': None, 'retry_after': None, 'ttfb_seconds': None, 'final_url': url_to_fetch,
+                   'fetch_seconds': None, 'transfer_bytes': 0, 'redirect_chain': [], 'truncated': False}
+        started = time.monotonic()
+        async with self._get_session().get(url_to_fetch, allow_redirects=True,
+                                           timeout=aiohttp.ClientTimeout(total=timeout_ms / 1000)) as response:
+            outcome['ttfb_seconds'] = time.monotonic() - started
+            outcome['status_code'] = response.status
+            outcome['retry_after'] = response.headers.get('Retry-After')
+            outcome['final_url'] = str(response.url)
+            outcome['redirect_chain'] = [{'url': str(r.url), 'status': r.status} for r in response.history]
+            content_type = response.headers.get('Content-Type', '').lower()
+            if content_type and 'html' not in content_type:
+                outcome['fetch_seconds'] = time.monotonic() - started
+                return outcome, None
+            # content.read(n) returns whatever is buffered so far, not n bytes: read to EOF or the cap.
+            chunks, size = [], 0
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > config.HTTP_FIRST_MAX_BYTES:
+                    outcome['truncated'] = True
+                    break
+            body = b''.join(chunks)[:config.HTTP_FIRST_MAX_BYTES]
+            if outcome['truncated']:
+                logger.warning(f"{url_to_fetch} is larger than {config.HTTP_FIRST_MAX_BYTES} bytes; parsing the first part only")
+            outcome['transfer_bytes'] = len(body)
+            outcome['fetch_seconds'] = time.monotonic() - started
+            encoding = response.charset
+            if not encoding:
+                try:
+                    encoding = response.get_encoding()
+                except Exception:
+                    encoding = 'utf-8'
+            try:
+                return outcome, body.decode(encoding or 'utf-8', errors='replace')
+            except LookupError:
+                return outcome, body.decode('utf-8', errors='replace')
+
+    def _page_result(self, url_to_fetch: str, outcome: Dict[str, Any], parsed: PageHtmlParser) -> Dict[str, Any]:
+        result = {
+            'url': None, 'cleaned_text': '', 'new_links': set(), 'link_context': {}, 'link_sources': {},
+            'status_code': outcome['status_code'], 'ttfb_seconds': outcome['ttfb_seconds'],
+            'retry_after': outcome['retry_after'],
+            # Not a browser navigation: kept out of the adaptive navigation timeouts.
+            'navigation_seconds': None, 'fetch_seconds': outcome['fetch_seconds'],
+            'transfer_bytes': outcome['transfer_bytes'], 'redirect_chain': outcome['redirect_chain'],
+            'dom_content_loaded_seconds': None, 'requests_count': len(outcome['redirect_chain']) + 1,
+            'blocked_requests_count': 0, 'failed_requests_count': 0, 'truncated': outcome['truncated'],
+            'timed_out': False, 'dynamic_wait': None, 'error': None, 'retryable': False, 'fetch_mode': MODE_HTTP,
+        }
+        return apply_parsed_page(self.analyzer, result, outcome['final_url'], parsed, self.skip_link_extraction)
+
+    async def _browser(self, url_to_fetch: str, page_timeout: Optional[int], reason: str) -> Dict[str, Any]:
+        self.fallback_reasons[reason] = self.fallback_reasons.get(reason, 0) + 1
+        self.pages[MODE_BROWSER] += 1
+        result = await self.browser_fetch(url_to_fetch, page_timeout=page_timeout)
+        result.setdefault('fetch_mode', MODE_BROWSER)
+        result['fetch_fallback_reason'] = reason
+        return result
+
+    def _maybe_switch_site(self) -> None:
+        browser_pages = sum(self.fallback_reasons.get(r, 0) for r in ('spa_shell', 'noscript_notice', 'little_text'))
+        total = browser_pages + self.pages[MODE_HTTP]
+        if (self.site_mode == MODE_HTTP and browser_pages >= config.HTTP_FIRST_SITE_FALLBACK_PAGES
+                and browser_pages / total >= config.HTTP_FIRST_SITE_FALLBACK_RATIO):
+            self.site_mode = MODE_BROWSER
+            self.site_mode_reason = f"{browser_pages}/{total} pages looked client-rendered"
+            logger.info(f"HTTP-first fetching disabled for this site: {self.site_mode_reason}")
+
+    async def fetch(self, url_to_fetch: str, page_timeout: Optional[int] = None) -> Dict[str, Any]:
+        if self.site_mode == MODE_BROWSER:
+            return await self._browser(url_to_fetch, page_timeout, 'site_mode')
+        try:
+            outcome, html = await self.fetch_html(url_to_fetch, page_timeout=page_timeout)
+        except asyncio.TimeoutError:
+            return await self._browser(url_to_fetch, page_timeout, 'http_timeout')
+        except aiohttp.ClientError as e:
+            logger.debug(f"HTTP fetch of {url_to_fetch} failed ({e}); using the browser")
+            return await self._browser(url_to_fetch, page_timeout, 'http_error')
+        if outcome['status_code'] in (401, 403):
+            # Bot walls and challenges often let a real browser through.
+            return await self._browser(url_to_fetch, page_timeout, f"http_{outcome['status_code']}")
+        if html is None:
+            result = self._page_result(url_to_fetch, outcome, parse_html('', outcome['final_url']))
+            result['url'] = None
+            result['error'] = 'Not an HTML page'
+            return result
+
+        parsed = parse_html(html, outcome['final_url'])
+        reason = client_rendered_reason(parsed)
+        if reason and outcome['status_code'] not in (429, 503):
+            result = await self._browser(url_to_fetch, page_timeout, reason)
+            self._maybe_switch_site()
+            return result
+        self.pages[MODE_HTTP] += 1
+        return self._page_result(url_to_fetch, outcome, parsed)
+
+    async def probe_site(self, start_url: str, rendered_cleaned_text: str) -> Dict[str, Any]:
+        """
+        Compares the start page's raw HTML with its rendered text; if HTTP sees less than
+        HTTP_FIRST_MIN_TEXT_RATIO of the rendered text, the whole site is crawled in the browser.
+        """
+        probe = {'url': start_url, 'rendered_length': len(rendered_cleaned_text or ''), 'http_length': 0, 'reason': None}
+        try:
+            outcome, html = await self.fetch_html(start_url)
+            parsed = parse_html(html or '', outcome['final_url'])
+            http_text = extract_text(
+                parsed.text,
+                header_snippets=self.analyzer.identified_header_texts,
+                footer_snippets=self.analyzer.identified_footer_texts,
+                needless_info_snippets=self.analyzer.identified_needless_info_texts,
+            ) if parsed.text else ''
+            probe['http_length'] = len(http_text)
+            probe['reason'] = client_rendered_reason(parsed)
+        except Exception as e:
+            probe['reason'] = f"http_error: {type(e).__name__}"
+        ratio = probe['http_length'] / probe['rendered_length'] if probe['rendered_length'] else 1.0
+        probe['text_ratio'] = round(ratio, 3)
+        if probe['reason'] or ratio < config.HTTP_FIRST_MIN_TEXT_RATIO:
+            self.site_mode = MODE_BROWSER
+            self.site_mode_reason = probe['reason'] or f"raw HTML has {ratio:.0%} of the rendered text"
+            logger.info(f"HTTP-first fetching disabled for {start_url}: {self.site_mode_reason}")
+        self.probe = probe
+        return probe
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'site_mode': self.site_mode,
+            'site_mode_reason': self.site_mode_reason,
+            'probe': self.probe,
+            'pages': dict(self.pages),
+            'fallback_reasons': dict(self.fallback_reasons),
+        }
@@ -0,0 +1,80 @@
+# analyzer/js_mode.py
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+SOURCE_PROBE = 'probe'
+SOURCE_CACHE = 'cache'
+SOURCE_DEFAULT = 'default' # Detection off, probe failed or nothing to crawl
+
+_cache_lock = threading.Lock() # Sessions of the same process share one cache file
+
+
+def compare_js_results(js_on: Dict[str, Any], js_off: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compares the start page rendered with and without JavaScript (page results of
+    _process_page_standalone). JavaScript counts as needed when the JS-off page loses more
+    than JS_MODE_MAX_DIFFERENCE of the text or of the internal links.
+    """
+    def ratio(off_value: int, on_value: int) -> float:
+        return off_value / on_value if on_value else 1.0
+
+    text_ratio = ratio(len(js_off.get('cleaned_text') or ''), len(js_on.get('cleaned_text') or ''))
+    link_ratio = ratio(len(js_off.get('new_links') or ()), len(js_on.get('new_links') or ()))
+    threshold = 1.0 - config.JS_MODE_MAX_DIFFERENCE
+    return {
+        'javascript_enabled': not (js_off.get('url') and text_ratio >= threshold and link_ratio >= threshold),
+        'text_ratio': round(text_ratio, 3),
+        'link_ratio': round(link_ratio, 3),
+    }
+
+
+class JsModeCache:
+    """
+    Per-domain JavaScript decisions (one JSON file next to the crawl checkpoints), so the next
+    analysis of a domain skips the probe until the entry is JS_MODE_CACHE_MAX_AGE_SECONDS old.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.path = os.path.join(directory or config.CHECKPOINT_DIR, 'js_modes.json')
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable JavaScript mode cache {self.path}: {e}")
+            return {}
+
+    def get(self, domain: str) -> Optional[Dict[str, Any]]:
+        with _cache_lock:
+            entry = self._read().get(domain)
+        if not entry or time.time() - entry.get('decided_at', 0) > config.JS_MODE_CACHE_MAX_AGE_SECONDS:
+            return None
+        return entry
+
+    def put(self, domain: str, decision: Dict[str, Any]) -> None:
+        """Stores `decision` for `domain` (atomically, temp file + rename) and drops expired entries."""
+        now = time.time()
+        with _cache_lock:
+            data = {d: e for d, e in self._read().items()
+                    if now - e.get('decided_at', 0) <= config.JS_MODE_CACHE_MAX_AGE_SECONDS}
+            data[domain] = dict(decision, decided_at=now)
+            tmp_path = f"{self.path}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Could not write JavaScript mode cache {self.path}: {e}")
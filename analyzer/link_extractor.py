@@ -0,0 +1,123 @@
+# analyzer/link_extractor.py
+import logging
+from typing import Dict, List
+
+from playwright.async_api import Page
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+# Sources a link can be tagged with
+SOURCE_NAV = 'nav'
+SOURCE_CONTENT = 'content'
+SOURCE_FOOTER = 'footer'
+SOURCE_PAGINATION = 'pagination'
+SOURCE_STRUCTURED_DATA = 'structured-data'
+SOURCE_INTERACTIVE = 'interactive' # data-href / data-url / onclick navigation
+
+# Visits every candidate element once. Each element's sources are found with closest()
+# on combined selectors (the selectors of the former nav / blog / pagination strategies),
+# and the domain and exclude-pattern filters run in the page, so only internal,
+# de-duplicated links cross the IPC boundary.
+LINK_EXTRACTOR_SCRIPT = """
+(params) => {
+    const baseDomain = params.baseDomain.toLowerCase();
+    const excludePatterns = params.excludePatterns.map(p => p.toLowerCase());
+    const NAV = 'nav, .nav, .navigation, .menu, .navbar, header, [role="navigation"], .main-menu, .primary-menu';
+    const FOOTER = 'footer, .footer, .site-footer, [role="contentinfo"]';
+    const PAGINATION = '.pagination, .nav-links, .wp-pagenavi, .blog-pagination, a.next, a.page-numbers';
+    const links = new Map();
+    let elementsVisited = 0;
+
+    const add = (rawUrl, source) => {
+        let url;
+        try {
+            url = new URL(rawUrl, document.baseURI);
+        } catch (e) {
+            return;
+        }
+        if (url.protocol !== 'http:' && url.protocol !== 'https:') return;
+        if (url.hostname.replace(/^www\\./i, '').toLowerCase() !== baseDomain) return;
+        const href = url.href;
+        const lowered = href.toLowerCase();
+        if (excludePatterns.some(p => lowered.includes(p))) return;
+        let sources = links.get(href);
+        if (!sources) {
+            sources = new Set();
+            links.set(href, sources);
+        }
+        sources.add(source);
+    };
+
+    const candidates = document.querySelectorAll(
+        'a[href], [data-href], [data-url], button[onclick], [itemscope] [itemprop*="url"], [itemscope] [itemprop*="href"]'
+    );
+    for (const el of candidates) {
+        elementsVisited += 1;
+        const itemprop = el.getAttribute('itemprop');
+        if (itemprop && /url|href/i.test(itemprop) && el.closest('[itemscope]')) {
+            const content = el.getAttribute('content') || el.getAttribute('href') || el.textContent;
+            if (content && /^https?:\\/\\//.test(content.trim())) add(content.trim(), 'structured-data');
+        }
+
+        let target = null;
+        let interactive = false;
+        if (el.tagName === 'A' && el.hasAttribute('href')) {
+            target = el.href;
+        } else {
+            const attr = el.getAttribute('data-href') || el.getAttribute('data-url') || el.getAttribute('onclick');
+            if (attr && !attr.includes('javascript:')) {
+                target = attr;
+                if (attr.includes('location.href') || attr.includes('window.open')) {
+                    const match = attr.match(/['"`]([^'"`]+)['"`]/);
+                    if (match) target = match[1];
+                }
+                interactive = true;
+            }
+        }
+        if (!target) continue;
+
+        if (interactive) {
+            add(target, 'interactive');
+        } else if (el.closest(PAGINATION)) {
+            add(target, 'pagination');
+        } else if (el.closest(NAV)) {
+            add(target, 'nav');
+        } else if (el.closest(FOOTER)) {
+            add(target, 'footer');
+        } else {
+            add(target, 'content');
+        }
+    }
+
+    for (const script of document.querySelectorAll('script[type="application/ld+json"]')) {
+        const walk = (value) => {
+            if (typeof value === 'string') {
+                if (value.startsWith('http://') || value.startsWith('https://')) add(value, 'structured-data');
+            } else if (value && typeof value === 'object') {
+                Object.values(value).forEach(walk);
+            }
+        };
+        try {
+            walk(JSON.parse(script.textContent));
+        } catch (e) {}
+    }
+
+    return {
+        links: Array.from(links, ([href, sources]) => [href, Array.from(sources)]),
+        elementsVisited: elementsVisited
+    };
+}
+"""
+
+
+async def extract_page_links(page: Page, base_domain_check_part: str, exclude_patterns: List[str]) -> Dict[str, List[str]]:
+    """
+    Internal links of the loaded page as {absolute_url: [sources]}, found in a single DOM pass.
+    Sources are nav, content, footer, pagination, structured-data and interactive.
+    """
+    payload = await page.evaluate(
+        LINK_EXTRACTOR_SCRIPT, {"baseDomain": base_domain_check_part, "excludePatterns": list(exclude_patterns)}
+    )
+    links = {href: sources for href, sources in payload.get('links', [])}
+    logger.debug(f"Link extractor visited {payload.get('elementsVisited', 0)} elements and kept {len(links)} internal links on {page.url}")
+    return links
@@ -0,0 +1,95 @@
+# analyzer/novelty.py
+import logging
+import re
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+_TOKEN_RE = re.compile(r"\w{3,}", re.UNICODE)
+_TITLE_SEPARATOR_RE = re.compile(r"\s+[|\-–—:·»]\s+")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def title_pattern(title: Optional[str]) -> str:
+    """
+    Reduces a title to its template: the page-specific first segment becomes '*'
+    and digits become '#', so 'Red Shoe 42 | Shop' and 'Blue Bag | Shop' share '* | shop'.
+    """
+    if not title:
+        return ''
+    segments = _TITLE_SEPARATOR_RE.split(title.strip().lower())
+    if len(segments) > 1:
+        segments[0] = '*'
+    return ' | '.join(_DIGITS_RE.sub('#', s) for s in segments)
+
+
+class NoveltyTracker:
+    """
+    Measures the marginal information gain of each crawled page.
+
+    Gain is the mean of the page's share of previously unseen tokens, share of
+    previously unseen internal links and whether its title pattern is new (each
+    in 0..1). Once at least NOVELTY_MIN_PAGES pages were observed and the mean
+    gain of the last NOVELTY_WINDOW pages stays below NOVELTY_GAIN_THRESHOLD,
+    should_stop() turns True.
+    """
+
+    def __init__(self, window: Optional[int] = None, threshold: Optional[float] = None, min_pages: Optional[int] = None):
+        self.window = window or config.NOVELTY_WINDOW
+        self.threshold = config.NOVELTY_GAIN_THRESHOLD if threshold is None else threshold
+        self.min_pages = config.NOVELTY_MIN_PAGES if min_pages is None else min_pages
+        self._tokens: Set[str] = set()
+        self._links: Set[str] = set()
+        self._title_patterns: Set[str] = set()
+        self._recent: Deque[float] = deque(maxlen=self.window)
+        self.pages_observed = 0
+
+    def observe(self, cleaned_text: Optional[str], title: Optional[str], links: Optional[Iterable[str]] = None) -> float:
+        """Records one page and returns its gain."""
+        components: List[float] = []
+
+        tokens = set(_TOKEN_RE.findall((cleaned_text or '').lower()))
+        if tokens:
+            components.append(len(tokens - self._tokens) / len(tokens))
+            self._tokens |= tokens
+
+        links = set(links or ())
+        if links:
+            components.append(len(links - self._links) / len(links))
+            self._links |= links
+
+        pattern = title_pattern(title)
+        if pattern:
+            components.append(0.0 if pattern in self._title_patterns else 1.0)
+            self._title_patterns.add(pattern)
+
+        gain = sum(components) / len(components) if components else 0.0
+        self._recent.append(gain)
+        self.pages_observed += 1
+        return gain
+
+    def window_gain(self) -> Optional[float]:
+        if not self._recent:
+            return None
+        return sum(self._recent) / len(self._recent)
+
+    def should_stop(self) -> bool:
+        if self.pages_observed < self.min_pages or len(self._recent) < self.window:
+            return False
+        return self.window_gain() < self.threshold
+
+    def stats(self) -> Dict[str, Any]:
+        window_gain = self.window_gain()
+        return {
+            'pages_observed': self.pages_observed,
+            'unique_tokens': len(self._tokens),
+            'unique_internal_links': len(self._links),
+            'unique_title_patterns': len(self._title_patterns),
+            'window_gain': round(window_gain, 4) if window_gain is not None else None,
+            'recent_gains': [round(g, 4) for g in self._recent],
+            'threshold': self.threshold,
+            'window': self.window,
+        }
@@ -0,0 +1,51 @@
+# analyzer/page_budget.py
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+
+class PageBudget:
+    """
+    Limits how many Playwright pages may be open at once, both in total and per domain.
+    Shared by every crawl that runs on the same event loop (e.g. a batch of sites),
+    so concurrent analyses queue for pages instead of piling them up.
+    """
+
+    def __init__(self, max_open_pages: int, max_pages_per_domain: Optional[int] = None):
+        self.max_open_pages = max(1, int(max_open_pages))
+        self.max_pages_per_domain = max(1, int(max_pages_per_domain)) if max_pages_per_domain else None
+        self._global = asyncio.Semaphore(self.max_open_pages)
+        self._per_domain: Dict[str, asyncio.Semaphore] = {}
+        self.open_pages = 0
+        self.peak_open_pages = 0
+
+    def _domain_semaphore(self, domain: str) -> Optional[asyncio.Semaphore]:
+        if not self.max_pages_per_domain:
+            return None
+        key = (domain or '').lower().replace('www.', '', 1)
+        if key not in self._per_domain:
+            self._per_domain[key] = asyncio.Semaphore(self.max_pages_per_domain)
+        return self._per_domain[key]
+
+    @asynccontextmanager
+    async def slot(self, domain: str) -> AsyncIterator[None]:
+        """Holds one page slot for `domain` for the duration of the block."""
+        domain_semaphore = self._domain_semaphore(domain)
+        # Take the per-domain slot first so a busy domain does not sit on global slots while it waits.
+        if domain_semaphore:
+            await domain_semaphore.acquire()
+        try:
+            await self._global.acquire()
+            try:
+                self.open_pages += 1
+                self.peak_open_pages = max(self.peak_open_pages, self.open_pages)
+                yield
+            finally:
+                self.open_pages -= 1
+                self._global.release()
+        finally:
+            if domain_semaphore:
+                domain_semaphore.release()
@@ -0,0 +1,70 @@
+# analyzer/page_metrics.py
+import logging
+from typing import Any, Dict
+
+from playwright.async_api import Page
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+# Collects every per-page metric in one evaluate() call instead of a round trip per
+# title / heading count / image / alt attribute / viewport check.
+PAGE_METRICS_SCRIPT = """
+() => {
+    const headings = {h1: 0, h2: 0, h3: 0, h4: 0, h5: 0, h6: 0};
+    for (const el of document.querySelectorAll('h1,h2,h3,h4,h5,h6')) {
+        headings[el.tagName.toLowerCase()] += 1;
+    }
+
+    const images = document.querySelectorAll('img');
+    let missingAlt = 0;
+    for (const img of images) {
+        const alt = img.getAttribute('alt');
+        if (alt === null || alt.trim() === '') missingAlt += 1;
+    }
+
+    const meta = {};
+    for (const el of document.querySelectorAll('meta[name], meta[property], meta[http-equiv]')) {
+        const key = (el.getAttribute('name') || el.getAttribute('property') || el.getAttribute('http-equiv') || '').trim().toLowerCase();
+        if (key && !(key in meta)) meta[key] = (el.getAttribute('content') || '').slice(0, 500);
+    }
+    const canonical = document.querySelector('link[rel="canonical"]');
+
+    return {
+        title: document.title || '',
+        headings: headings,
+        images_count: images.length,
+        missing_alt_tags_count: missingAlt,
+        has_mobile_viewport: document.querySelector('meta[name="viewport"]') !== null,
+        meta: meta,
+        canonical: canonical ? canonical.href : null,
+        lang: document.documentElement ? (document.documentElement.getAttribute('lang') || null) : null,
+        text: document.body ? document.body.innerText : ''
+    };
+}
+"""
+
+
+def empty_page_metrics() -> Dict[str, Any]:
+    return {
+        'title': '',
+        'headings': {f'h{level}': 0 for level in range(1, 7)},
+        'images_count': 0,
+        'missing_alt_tags_count': 0,
+        'has_mobile_viewport': False,
+        'meta': {},
+        'canonical': None,
+        'lang': None,
+        'text': '',
+    }
+
+
+async def extract_page_metrics(page: Page) -> Dict[str, Any]:
+    """
+    Title, heading counts by level, image / missing-alt counts, viewport presence,
+    meta tags, canonical, lang and body innerText of the loaded page, in one round trip.
+    """
+    metrics = empty_page_metrics()
+    payload = await page.evaluate(PAGE_METRICS_SCRIPT)
+    if isinstance(payload, dict):
+        metrics.update(payload)
+    return metrics
@@ -0,0 +1,154 @@
+# analyzer/page_pool.py
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from playwright.async_api import BrowserContext, Page
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+
+class PagePool:
+    """
+    Reusable pages of one BrowserContext.
+
+    Creating and closing a page per URL pays target and renderer setup every time.
+    A leased page is reset when it comes back (listeners registered through listen()
+    are removed, the page navigates to about:blank) and handed to the next worker.
+    A page is replaced instead of reused if it crashed or was closed, if the lease
+    ended with an exception (the page may be in any state), after `max_uses`
+    navigations, or if the reset itself fails.
+    At most `max_idle` pages are kept; leases beyond that create pages as usual.
+    `page_factory(context)` opens new pages (e.g. with request blocking installed).
+
+    `slot()` (e.g. a PageBudget / browser governor page slot) is held by every open page,
+    idle ones included, from before it is created until it is closed, so pooled pages
+    count against the open-page limits. While a lease of this pool waits for a slot,
+    returned pages are closed instead of pooled, which frees the slot it waits for.
+    Call close() when the crawl is done to hand the idle pages' slots back.
+    """
+
+    def __init__(self, context: BrowserContext, max_idle: Optional[int] = None, max_uses: Optional[int] = None,
+                 page_factory: Optional[Callable[[BrowserContext], Awaitable[Page]]] = None,
+                 slot: Optional[Callable[[], AsyncContextManager[None]]] = None):
+        self.context = context
+        self.page_factory = page_factory
+        self.slot = slot
+        self.max_idle = config.PAGE_POOL_MAX_IDLE if max_idle is None else max_idle
+        self.max_uses = max_uses or config.PAGE_POOL_MAX_USES
+        self._idle: List[Page] = []
+        self._uses: Dict[Page, int] = {}
+        self._crashed: set = set()
+        self._listeners: Dict[Page, List[Tuple[str, Callable[..., Any]]]] = {}
+        self._slots: Dict[Page, AsyncExitStack] = {}
+        self._waiting_for_slot = 0
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+        self.replaced = 0
+
+    async def _new_page(self) -> Page:
+        page_slot = AsyncExitStack()
+        if self.slot is not None:
+            self._waiting_for_slot += 1
+            try:
+                await page_slot.enter_async_context(self.slot())
+            finally:
+                self._waiting_for_slot -= 1
+        try:
+            page = await self.page_factory(self.context) if self.page_factory else await self.context.new_page()
+        except BaseException:
+            await page_slot.aclose()
+            raise
+        page.on("crash", lambda crashed_page: self._crashed.add(crashed_page))
+        self._uses[page] = 0
+        self._slots[page] = page_slot
+        self.created += 1
+        return page
+
+    def listen(self, page: Page, event: str, handler: Callable[..., Any]) -> None:
+        """Registers an event handler for the current lease only; it is removed when the page is reset."""
+        page.on(event, handler)
+        self._listeners.setdefault(page, []).append((event, handler))
+
+    def _clear_listeners(self, page: Page) -> None:
+        for event, handler in self._listeners.pop(page, []):
+            try:
+                page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+    async def _discard(self, page: Page) -> None:
+        self._clear_listeners(page)
+        self._uses.pop(page, None)
+        self._crashed.discard(page)
+        try:
+            if not page.is_closed():
+                try:
+                    await page.close()
+                except Exception as e:
+                    logger.debug(f"Closing a pooled page failed: {e}")
+        finally:
+            page_slot = self._slots.pop(page, None)
+            if page_slot is not None:
+                await page_slot.aclose()
+
+    async def _give_back(self, page: Page, failed: bool) -> None:
+        self._clear_listeners(page)
+        if page.is_closed() or page in self._crashed:
+            self.replaced += 1
+            await self._discard(page)
+            return
+        if (failed or self._closed or self._waiting_for_slot or self._uses.get(page, 0) >= self.max_uses
+                or len(self._idle) >= self.max_idle):
+            await self._discard(page)
+            return
+        try:
+            # Stops whatever the last URL was still loading and drops its DOM and timers.
+            await page.goto('about:blank', timeout=config.PAGE_POOL_RESET_TIMEOUT)
+        except Exception as e:
+            logger.debug(f"Resetting a pooled page failed, replacing it: {e}")
+            self.replaced += 1
+            await self._discard(page)
+            return
+        if self._closed or self._waiting_for_slot:
+            # The pool closed or a lease started waiting for a slot during the reset.
+            await self._discard(page)
+            return
+        self._idle.append(page)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Leases a page for one navigation; it is reset and pooled (or replaced) afterwards."""
+        page = None
+        while self._idle and page is None:
+            candidate = self._idle.pop()
+            if candidate.is_closed() or candidate in self._crashed:
+                self.replaced += 1
+                await self._discard(candidate)
+            else:
+                page = candidate
+                self.reused += 1
+        if page is None:
+            page = await self._new_page()
+        self._uses[page] = self._uses.get(page, 0) + 1
+        failed = False
+        try:
+            yield page
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            await self._give_back(page, failed)
+
+    async def close(self) -> None:
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for page in idle:
+            await self._discard(page)
+
+    def stats(self) -> Dict[str, int]:
+        return {'created': self.created, 'reused': self.reused, 'replaced': self.replaced, 'idle': len(self._idle),
+                'open': len(self._slots)}
@@ -0,0 +1,137 @@
+# analyzer/page_timing.py
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from playwright.async_api import Page, Response
+
+from analyzer.adaptive_timeouts import percentile
+from analyzer.request_blocking import route_blocker
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+# Navigation Timing (document) plus Resource Timing (sub-resources loaded so far), one round trip.
+# Times are milliseconds from navigation start; transferSize is 0 for cached or cross-origin
+# entries without Timing-Allow-Origin.
+NAVIGATION_TIMING_SCRIPT = """
+() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    let resourceBytes = 0;
+    for (const entry of performance.getEntriesByType('resource')) resourceBytes += entry.transferSize || 0;
+    if (!nav) return {resourceBytes: resourceBytes};
+    return {
+        responseStart: nav.responseStart,
+        domContentLoaded: nav.domContentLoadedEventEnd || nav.domContentLoadedEventStart,
+        loadEventEnd: nav.loadEventEnd,
+        redirectCount: nav.redirectCount,
+        documentBytes: nav.transferSize || 0,
+        resourceBytes: resourceBytes
+    };
+}
+"""
+
+# Per-page fields this module adds to page results and analysis['page_statistics'] entries
+TIMING_FIELDS = (
+    'status_code', 'redirect_chain', 'ttfb_seconds', 'dom_content_loaded_seconds',
+    'transfer_bytes', 'requests_count', 'blocked_requests_count', 'failed_requests_count',
+)
+
+
+class PageNetworkRecorder:
+    """
+    Counts a page's requests while it navigates: all requests, requests dropped by the crawl's
+    blocking rules (CDP or route) and other failed requests. Attach before goto, detach after.
+    """
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.requests_count = 0
+        self.blocked_requests_count = 0
+        self.failed_requests_count = 0
+        self._blocker = route_blocker()
+
+    def _on_request(self, request) -> None:
+        self.requests_count += 1
+
+    def _on_request_failed(self, request) -> None:
+        failure = request.failure or ''
+        if 'BLOCKED_BY_CLIENT' in failure or self._blocker.should_block(request.url, request.resource_type):
+            self.blocked_requests_count += 1
+        else:
+            self.failed_requests_count += 1
+
+    def attach(self) -> None:
+        self.page.on("request", self._on_request)
+        self.page.on("requestfailed", self._on_request_failed)
+
+    def detach(self) -> None:
+        for event, handler in (("request", self._on_request), ("requestfailed", self._on_request_failed)):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+
+async def redirect_chain(response: Optional[Response]) -> List[Dict[str, Any]]:
+    """The hops before the final document response, oldest first, as [{'url', 'status'}]."""
+    if response is None:
+        return []
+    chain = []
+    request = response.request.redirected_from
+    while request is not None:
+        hop_response = await request.response()
+        chain.append({'url': request.url, 'status': hop_response.status if hop_response else None})
+        request = request.redirected_from
+    chain.reverse()
+    return chain
+
+
+async def navigation_timing(page: Page) -> Dict[str, Any]:
+    """Navigation / Resource Timing of the loaded page; an empty dict if the page cannot be evaluated."""
+    try:
+        timing = await page.evaluate(NAVIGATION_TIMING_SCRIPT)
+        return timing if isinstance(timing, dict) else {}
+    except Exception as e:
+        logger.debug(f"Navigation timing unavailable for {page.url}: {e}")
+        return {}
+
+
+def _distribution(values: List[float], digits: int) -> Optional[Dict[str, Any]]:
+    if not values:
+        return None
+    rounded = (lambda value: round(value, digits)) if digits else (lambda value: int(round(value)))
+    return {
+        'count': len(values),
+        'p50': rounded(percentile(values, 50)),
+        'p90': rounded(percentile(values, 90)),
+        'p95': rounded(percentile(values, 95)),
+        'max': rounded(max(values)),
+    }
+
+
+def timing_stats(pages: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Status code counts and timing / size percentiles over page statistics, for the analysis report."""
+    status_counts: Dict[str, int] = {}
+    ttfb, dom_content_loaded, transfer_bytes = [], [], []
+    redirected_pages = blocked_requests = failed_requests = 0
+    for page in pages:
+        if page.get('status_code') is not None:
+            status_counts[str(page['status_code'])] = status_counts.get(str(page['status_code']), 0) + 1
+        if page.get('ttfb_seconds') is not None:
+            ttfb.append(page['ttfb_seconds'])
+        if page.get('dom_content_loaded_seconds') is not None:
+            dom_content_loaded.append(page['dom_content_loaded_seconds'])
+        if page.get('transfer_bytes'):
+            transfer_bytes.append(page['transfer_bytes'])
+        if page.get('redirect_chain'):
+            redirected_pages += 1
+        blocked_requests += page.get('blocked_requests_count') or 0
+        failed_requests += page.get('failed_requests_count') or 0
+    return {
+        'status_codes': status_counts,
+        'redirected_pages_count': redirected_pages,
+        'blocked_requests_count': blocked_requests,
+        'failed_requests_count': failed_requests,
+        'ttfb_seconds': _distribution(ttfb, 3),
+        'dom_content_loaded_seconds': _distribution(dom_content_loaded, 3),
+        'transfer_bytes': _distribution(transfer_bytes, 0),
+    }
@@ -0,0 +1,378 @@
+# analyzer/pg_frontier.py
+"""
+Postgres-backed shared crawl frontier, so several worker containers can crawl one large site.
+
+The coordinator (analyze_url_standalone with `pg_frontier=`) processes the start page,
+creates a job, seeds the table with its queued URLs and then crawls alongside any
+other workers. Extra workers join with:
+
+    python -m analyzer.pg_frontier --job <job_id> [--dsn postgresql://...]
+
+Workers claim URLs with `FOR UPDATE SKIP LOCKED`, run the normal
+`_process_page_standalone` logic and write each page's statistics and newly found
+links back to the table. Any DB-API 2.0 connection using the 'format' paramstyle
+works (psycopg 3 / psycopg2), so tests can inject a connection to a local Postgres.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import analyzer.config as config
+from analyzer.frontier import rules_from_config, score_url
+from analyzer.politeness import THROTTLE_STATUS_CODES
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+# Optional dependency: only needed when no connection is injected.
+try:
+    import psycopg # psycopg 3
+except ImportError:
+    try:
+        import psycopg2 as psycopg
+    except ImportError:
+        psycopg = None
+
+SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS crawl_jobs (
+        job_id TEXT PRIMARY KEY,
+        start_url TEXT NOT NULL,
+        settings JSONB NOT NULL,
+        status TEXT NOT NULL DEFAULT 'running',
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS crawl_frontier (
+        job_id TEXT NOT NULL REFERENCES crawl_jobs (job_id) ON DELETE CASCADE,
+        url TEXT NOT NULL,
+        depth INTEGER NOT NULL DEFAULT 0,
+        priority INTEGER NOT NULL DEFAULT 2,
+        state TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        worker_id TEXT,
+        leased_at TIMESTAMPTZ,
+        ready_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        error TEXT,
+        result JSONB,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (job_id, url)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS crawl_frontier_claim_idx ON crawl_frontier (job_id, state, priority, depth, created_at)",
+]
+
+# Page statistics written back per page (the fields of analysis['page_statistics'] entries).
+PAGE_STAT_FIELDS = (
+    'url', 'cleaned_text', 'title', 'headings_count', 'images_count',
+    'missing_alt_tags_count', 'has_mobile_viewport', 'cleaned_content_length',
+    # page_timing.TIMING_FIELDS
+    'status_code', 'redirect_chain', 'ttfb_seconds', 'dom_content_loaded_seconds',
+    'transfer_bytes', 'requests_count', 'blocked_requests_count', 'failed_requests_count',
+)
+
+
+def connect(dsn: Optional[str] = None):
+    """Opens a connection with the installed driver. Raises if psycopg is missing or no DSN is configured."""
+    if psycopg is None:
+        raise RuntimeError("The Postgres frontier needs a driver: pip install 'psycopg[binary]' (or psycopg2-binary)")
+    dsn = dsn or config.PG_FRONTIER_DSN or os.getenv('CRAWL_FRONTIER_DSN')
+    if not dsn:
+        raise ValueError("No Postgres DSN: set config.PG_FRONTIER_DSN or the CRAWL_FRONTIER_DSN environment variable")
+    return psycopg.connect(dsn)
+
+
+class PgFrontier:
+    """
+    Job and frontier tables for distributed crawls.
+
+    The DB-API connection is blocking, so every call runs in a thread; a lock
+    serializes use of the single connection between this process' lanes.
+    """
+
+    def __init__(self, connection, worker_id: Optional[str] = None):
+        self._conn = connection
+        self._lock = threading.Lock()
+        self._rules = rules_from_config()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    def _execute(self, sql: str, params: Iterable[Any] = (), fetch: Optional[str] = None, many: bool = False):
+        with self._lock:
+            cursor = self._conn.cursor()
+            try:
+                if many:
+                    cursor.executemany(sql, params)
+                else:
+                    cursor.execute(sql, tuple(params))
+                if fetch == 'rowcount':
+                    rows = cursor.rowcount
+                else:
+                    rows = cursor.fetchall() if fetch == 'all' else cursor.fetchone() if fetch == 'one' else None
+                self._conn.commit()
+                return rows
+            except Exception:
+                self._conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    async def _run(self, sql: str, params: Iterable[Any] = (), fetch: Optional[str] = None, many: bool = False):
+        return await asyncio.to_thread(self._execute, sql, params, fetch, many)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def ensure_schema(self) -> None:
+        for statement in SCHEMA_STATEMENTS:
+            await self._run(statement)
+
+    async def create_job(self, start_url: str, settings: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        await self._run(
+            "INSERT INTO crawl_jobs (job_id, start_url, settings) VALUES (%s, %s, %s::jsonb)",
+            (job_id, start_url, json.dumps(settings)),
+        )
+        return job_id
+
+    async def job(self, job_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The given job, or the oldest running one when `job_id` is None."""
+        if job_id:
+            row = await self._run("SELECT job_id, start_url, settings, status FROM crawl_jobs WHERE job_id = %s", (job_id,), 'one')
+        else:
+            row = await self._run(
+                "SELECT job_id, start_url, settings, status FROM crawl_jobs WHERE status = 'running' ORDER BY created_at LIMIT 1",
+                (), 'one')
+        if not row:
+            return None
+        settings = row[2] if isinstance(row[2], dict) else json.loads(row[2])
+        return {'job_id': row[0], 'start_url': row[1], 'settings': settings, 'status': row[3]}
+
+    async def finish_job(self, job_id: str, status: str = 'done') -> None:
+        await self._run("UPDATE crawl_jobs SET status = %s WHERE job_id = %s", (status, job_id))
+
+    async def add_urls(self, job_id: str, urls: Iterable[Tuple[str, int]], max_urls: Optional[int] = None) -> int:
+        """Queues (url, depth) pairs that the job has not seen yet, up to `max_urls` rows per job."""
+        urls = list(urls)
+        if not urls:
+            return 0
+        if max_urls is not None:
+            row = await self._run("SELECT count(*) FROM crawl_frontier WHERE job_id = %s", (job_id,), 'one')
+            urls = urls[:max(0, max_urls - row[0])]
+        rows = [(job_id, url, depth, score_url(url, self._rules)) for url, depth in urls]
+        await self._run(
+            "INSERT INTO crawl_frontier (job_id, url, depth, priority) VALUES (%s, %s, %s, %s) "
+            "ON CONFLICT (job_id, url) DO NOTHING",
+            rows, many=True,
+        )
+        return len(rows)
+
+    async def claim(self, job_id: str) -> Optional[Tuple[str, int, int]]:
+        """
+        Leases the best ready URL to this worker: (url, depth, attempts) or None.
+        Leases older than PG_FRONTIER_LEASE_SECONDS (a worker died mid-page) can be claimed again.
+        """
+        return await self._run(
+            """
+            WITH next AS (
+                SELECT url FROM crawl_frontier
+                WHERE job_id = %s
+                  AND ready_at <= now()
+                  AND (state = 'queued'
+                       OR (state = 'in_flight' AND leased_at < now() - make_interval(secs => %s)))
+                ORDER BY priority, depth, created_at
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE crawl_frontier AS f
+            SET state = 'in_flight', worker_id = %s, leased_at = now(), attempts = f.attempts + 1
+            FROM next
+            WHERE f.job_id = %s AND f.url = next.url
+            RETURNING f.url, f.depth, f.attempts
+            """,
+            (job_id, config.PG_FRONTIER_LEASE_SECONDS, self.worker_id, job_id),
+            'one',
+        )
+
+    async def complete(self, job_id: str, url: str, page_stats: Dict[str, Any]) -> bool:
+        """
+        Stores the page's result. Returns False (and changes nothing) when this worker no longer
+        holds the lease, i.e. it expired and another worker claimed the URL.
+        """
+        updated = await self._run(
+            "UPDATE crawl_frontier SET state = 'done', result = %s::jsonb, error = NULL "
+            "WHERE job_id = %s AND url = %s AND worker_id = %s AND state = 'in_flight'",
+            (json.dumps(page_stats), job_id, url, self.worker_id), 'rowcount',
+        )
+        return updated > 0
+
+    async def fail(self, job_id: str, url: str, error: str, retryable: bool, attempts: int) -> bool:
+        """
+        Parks a retryable failure with exponential backoff, or marks the URL as failed for good.
+        Like complete(), returns False when the lease has passed to another worker.
+        """
+        if retryable and attempts < config.RETRY_MAX_ATTEMPTS:
+            backoff = min(config.RETRY_MAX_DELAY, config.RETRY_BASE_DELAY * (2 ** (attempts - 1))) * random.uniform(0.8, 1.2)
+            updated = await self._run(
+                "UPDATE crawl_frontier SET state = 'queued', error = %s, ready_at = now() + make_interval(secs => %s) "
+                "WHERE job_id = %s AND url = %s AND worker_id = %s AND state = 'in_flight'",
+                (error, backoff, job_id, url, self.worker_id), 'rowcount',
+            )
+        else:
+            updated = await self._run(
+                "UPDATE crawl_frontier SET state = 'failed', error = %s "
+                "WHERE job_id = %s AND url = %s AND worker_id = %s AND state = 'in_flight'",
+                (error, job_id, url, self.worker_id), 'rowcount',
+            )
+        return updated > 0
+
+    async def counts(self, job_id: str) -> Dict[str, int]:
+        rows = await self._run("SELECT state, count(*) FROM crawl_frontier WHERE job_id = %s GROUP BY state", (job_id,), 'all')
+        return {state: count for state, count in rows}
+
+    async def results(self, job_id: str) -> List[Dict[str, Any]]:
+        rows = await self._run(
+            "SELECT result FROM crawl_frontier WHERE job_id = %s AND state = 'done' AND result IS NOT NULL ORDER BY leased_at",
+            (job_id,), 'all')
+        return [r[0] if isinstance(r[0], dict) else json.loads(r[0]) for r in rows]
+
+    async def failures(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        rows = await self._run(
+            "SELECT url, error, attempts FROM crawl_frontier WHERE job_id = %s AND state = 'failed'", (job_id,), 'all')
+        return {url: {'reason': error or 'Unknown error', 'attempts': attempts} for url, error, attempts in rows}
+
+
+async def crawl_job(
+    frontier: PgFrontier,
+    job_id: str,
+    fetch: Callable[[str, int], Awaitable[Dict[str, Any]]],
+    lanes: int,
+    settings: Dict[str, Any],
+) -> int:
+    """
+    Runs `lanes` claim -> fetch -> write-back loops for the job until its queue is
+    drained or it has `settings['max_pages']` finished pages. `fetch` gets the URL and its
+    attempt number (1 for the first try). Returns the pages this worker finished.
+    """
+    finished = 0
+    # Lanes of this worker count and claim one at a time, so they cannot all claim the last free page.
+    # Separate workers can still overshoot max_pages by a page or two; the coordinator caps the report.
+    claim_lock = asyncio.Lock()
+
+    async def lane():
+        nonlocal finished
+        while True:
+            async with claim_lock:
+                counts = await frontier.counts(job_id)
+                if counts.get('done', 0) >= settings['max_pages']:
+                    return
+                claimed = await frontier.claim(job_id) if counts.get('done', 0) + counts.get('in_flight', 0) < settings['max_pages'] else None
+            if claimed is None:
+                if not counts.get('queued') and not counts.get('in_flight'):
+                    return
+                await asyncio.sleep(config.PG_FRONTIER_POLL_INTERVAL)
+                continue
+
+            url, depth, attempts = claimed
+            try:
+                page_result = await fetch(url, attempts)
+            except Exception as e:
+                await frontier.fail(job_id, url, f"{type(e).__name__}: {e}", retryable=True, attempts=attempts)
+                continue
+
+            if not page_result.get('url'):
+                await frontier.fail(job_id, url, page_result.get('error') or 'Unknown error',
+                                    page_result.get('retryable', False), attempts)
+                continue
+            if page_result.get('status_code') in THROTTLE_STATUS_CODES:
+                await frontier.fail(job_id, url, f"HTTP {page_result['status_code']}", True, attempts)
+                continue
+
+            if not await frontier.complete(job_id, url, {field: page_result.get(field) for field in PAGE_STAT_FIELDS}):
+                # The lease expired mid-page and another worker owns the URL now; its result counts.
+                logger.info(f"Lease on {url} passed to another worker; dropping this worker's result.")
+                continue
+            finished += 1
+            if not settings.get('skip_link_extraction') and page_result.get('new_links'):
+                new_links = sorted(page_result['new_links'], key=lambda link: (score_url(link, frontier._rules), link))
+                await frontier.add_urls(job_id, [(link, depth + 1) for link in new_links],
+                                        max_urls=config.MAX_LINKS_TO_DISCOVER)
+
+    await asyncio.gather(*(lane() for _ in range(max(1, lanes))))
+    return finished
+
+
+async def run_worker(job_id: Optional[str] = None, dsn: Optional[str] = None, lanes: Optional[int] = None, connection=None) -> int:
+    """Entry point of an extra worker container: joins a running job with its own browser."""
+    # Imported here: seomainfunctions imports this module.
+    from playwright.async_api import async_playwright
+    from analyzer import seomainfunctions
+    from analyzer.seo import SEOAnalyzer
+    from analyzer.browser_governor import browser_governor
+    from analyzer.page_pool import PagePool
+
+    owns_connection = connection is None
+    frontier = PgFrontier(connection or connect(dsn))
+    job = await frontier.job(job_id)
+    if not job or job['status'] != 'running':
+        logger.info(f"No running crawl job {job_id or ''} to join.")
+        if owns_connection:
+            frontier.close()
+        return 0
+    settings = job['settings']
+
+    analyzer_instance = SEOAnalyzer()
+    analyzer_instance.site_base_for_normalization = settings['site_base_for_normalization']
+    analyzer_instance.start_domain_normal_part = settings['start_domain_normal_part']
+
+    async with browser_governor.browser_slot(f"crawl job {job['job_id']}"), async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            context = await seomainfunctions._new_crawl_context(browser, javascript_enabled=settings.get('javascript_enabled', True))
+            page_pool = PagePool(context, max_idle=lanes or config.PG_FRONTIER_WORKER_LANES,
+                                 page_factory=seomainfunctions._new_crawl_page,
+                                 slot=lambda: seomainfunctions._page_slot(None, settings['start_domain_normal_part']))
+
+            async def fetch(url_to_fetch, attempts):
+                async with page_pool.page() as page:
+                    return await seomainfunctions._process_page_standalone(
+                        analyzer_instance,
+                        page, url_to_fetch,
+                        settings['start_domain_normal_part'],
+                        settings['site_base_for_normalization'],
+                        settings['exclude_patterns'],
+                        header_snippets_to_remove=settings['header_snippets'],
+                        footer_snippets_to_remove=settings['footer_snippets'],
+                        needless_info_snippets_to_remove=settings['needless_info_snippets'],
+                        skip_link_extraction=settings['skip_link_extraction'],
+                        page_timeout=config.RETRY_PAGE_TIMEOUT if attempts > 1 else None,
+                    )
+
+            try:
+                finished = await crawl_job(frontier, job['job_id'], fetch, lanes or config.PG_FRONTIER_WORKER_LANES, settings)
+            finally:
+                await page_pool.close()
+        finally:
+            if browser.is_connected():
+                await browser.close()
+            if owns_connection:
+                frontier.close()
+    logger.info(f"Worker {frontier.worker_id} finished {finished} pages for job {job['job_id']}.")
+    return finished
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Join a distributed crawl job as an extra worker.")
+    parser.add_argument('--job', help="Job id printed by the coordinator (default: oldest running job)")
+    parser.add_argument('--dsn', help="Postgres DSN (default: config.PG_FRONTIER_DSN / CRAWL_FRONTIER_DSN)")
+    parser.add_argument('--lanes', type=int, help="Pages crawled at once by this worker")
+    args = parser.parse_args()
+    asyncio.run(run_worker(args.job, args.dsn, args.lanes))
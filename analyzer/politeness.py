@@ -0,0 +1,166 @@
+# analyzer/politeness.py
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Optional
+from urllib.parse import urlparse
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header (delta-seconds or HTTP-date) into seconds from now."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        logger.debug(f"Unparseable Retry-After header: {value!r}")
+        return None
+
+
+class _HostState:
+    """AIMD state for a single host."""
+
+    def __init__(self, host: str, initial_limit: float):
+        self.host = host
+        self.limit = initial_limit
+        self.in_flight = 0
+        self.min_interval = 0.0
+        self.last_start = 0.0
+        self.paused_until = 0.0
+        self.latency_fast: Optional[float] = None
+        self.latency_baseline: Optional[float] = None
+        self.condition = asyncio.Condition()
+        # Counters for the report
+        self.requests = 0
+        self.backoffs = 0
+        self.throttled_responses = 0
+        self.retry_after_pauses = 0
+        self.peak_limit = initial_limit
+
+
+class PolitenessController:
+    """
+    Adaptive per-host rate controller used instead of fixed random sleeps.
+
+    - Each host starts at POLITENESS_INITIAL_CONCURRENCY parallel requests and gains
+      POLITENESS_ADDITIVE_INCREASE per healthy response, up to `max_concurrency`.
+    - On 429/503, failed navigations or a TTFB that rises above
+      POLITENESS_LATENCY_RISE_FACTOR x the host's baseline, the limit is multiplied by
+      POLITENESS_BACKOFF_FACTOR and a spacing between request starts is introduced.
+    - Retry-After pauses the host until the given time (capped at POLITENESS_MAX_RETRY_AFTER).
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.initial_concurrency = max(1, min(config.POLITENESS_INITIAL_CONCURRENCY, self.max_concurrency))
+        self._hosts: Dict[str, _HostState] = {}
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return (urlparse(url).netloc or '').lower().replace('www.', '', 1)
+
+    def _state(self, url: str) -> _HostState:
+        host = self.host_of(url)
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(host, float(self.initial_concurrency))
+        return self._hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Waits until the host of `url` may receive another request and holds that slot."""
+        state = self._state(url)
+        async with state.condition:
+            while True:
+                now = time.monotonic()
+                wait = max(state.paused_until - now, state.last_start + state.min_interval - now, 0.0)
+                if wait <= 0 and state.in_flight < max(1, int(state.limit)):
+                    break
+                try:
+                    await asyncio.wait_for(state.condition.wait(), timeout=wait if wait > 0 else None)
+                except asyncio.TimeoutError:
+                    pass
+            state.in_flight += 1
+            state.requests += 1
+            state.last_start = time.monotonic()
+        try:
+            yield
+        finally:
+            async with state.condition:
+                state.in_flight -= 1
+                state.condition.notify_all()
+
+    def record(
+        self,
+        url: str,
+        status_code: Optional[int],
+        latency_seconds: Optional[float],
+        retry_after_seconds: Optional[float] = None,
+        failed: bool = False,
+    ) -> None:
+        """Feeds the outcome of one request back into the host's rate."""
+        state = self._state(url)
+
+        throttled = status_code in THROTTLE_STATUS_CODES
+        latency_rising = False
+        if latency_seconds is not None and not throttled and not failed:
+            alpha = config.POLITENESS_LATENCY_SMOOTHING
+            state.latency_fast = latency_seconds if state.latency_fast is None else \
+                alpha * latency_seconds + (1 - alpha) * state.latency_fast
+            if state.latency_baseline is None:
+                state.latency_baseline = latency_seconds
+            latency_rising = state.latency_fast > state.latency_baseline * config.POLITENESS_LATENCY_RISE_FACTOR
+            if not latency_rising:
+                # The baseline follows healthy latencies slowly so a gradual drift is not mistaken for overload.
+                state.latency_baseline = 0.05 * state.latency_fast + 0.95 * state.latency_baseline
+
+        if throttled or failed or latency_rising:
+            state.limit = max(1.0, state.limit * config.POLITENESS_BACKOFF_FACTOR)
+            state.min_interval = min(
+                config.POLITENESS_MAX_INTERVAL,
+                max(config.POLITENESS_MIN_INTERVAL_STEP, state.min_interval * 2)
+            )
+            state.backoffs += 1
+            if throttled:
+                state.throttled_responses += 1
+            reason = f"status {status_code}" if throttled else ("failed request" if failed else
+                     f"TTFB {state.latency_fast:.2f}s vs baseline {state.latency_baseline:.2f}s")
+            logger.info(f"Backing off {state.host}: {reason}. Limit now {state.limit:.1f}, spacing {state.min_interval:.2f}s")
+        else:
+            state.limit = min(float(self.max_concurrency), state.limit + config.POLITENESS_ADDITIVE_INCREASE)
+            state.min_interval = state.min_interval / 2 if state.min_interval > 0.05 else 0.0
+            state.peak_limit = max(state.peak_limit, state.limit)
+
+        if retry_after_seconds is not None and (throttled or failed):
+            pause = min(retry_after_seconds, config.POLITENESS_MAX_RETRY_AFTER)
+            state.paused_until = max(state.paused_until, time.monotonic() + pause)
+            state.retry_after_pauses += 1
+            logger.info(f"Honoring Retry-After for {state.host}: pausing {pause:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-host summary for the analysis report."""
+        return {
+            host: {
+                'requests': state.requests,
+                'final_concurrency': round(state.limit, 2),
+                'peak_concurrency': round(state.peak_limit, 2),
+                'backoffs': state.backoffs,
+                'throttled_responses': state.throttled_responses,
+                'retry_after_pauses': state.retry_after_pauses,
+                'baseline_ttfb_seconds': round(state.latency_baseline, 3) if state.latency_baseline is not None else None,
+            }
+            for host, state in self._hosts.items()
+        }
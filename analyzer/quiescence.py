@@ -0,0 +1,153 @@
+# analyzer/quiescence.py
+import asyncio
+import logging
+import time
+import weakref
+from typing import Any, Dict, Optional, Set
+
+from playwright.async_api import Page, Request
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+# Requests that stay open by design and would keep a page "busy" forever
+_LONG_LIVED_RESOURCE_TYPES = {'eventsource', 'websocket'}
+
+# Requests in flight per page, for pages registered with track_requests()
+_in_flight: 'weakref.WeakKeyDictionary[Page, Set[Request]]' = weakref.WeakKeyDictionary()
+
+# Resolves once document.readyState is 'complete' and the MutationObserver saw at most
+# `maxMutations` mutations during the last `quietMs`, or after `maxWaitMs`.
+# Scrolling to the middle first lets lazy loaders (IntersectionObserver) kick in.
+DOM_QUIET_SCRIPT = """
+(params) => new Promise((resolve) => {
+    const start = performance.now();
+    const batches = []; // [timestamp, mutation count]
+    let mutations = 0;
+    const observer = new MutationObserver((records) => {
+        mutations += records.length;
+        batches.push([performance.now(), records.length]);
+    });
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    if (params.scroll && document.body) window.scrollTo(0, document.body.scrollHeight / 2);
+
+    const finish = (settled) => {
+        observer.disconnect();
+        if (params.scroll) window.scrollTo(0, 0);
+        resolve({settled: settled, mutations: mutations, waitedMs: performance.now() - start, readyState: document.readyState});
+    };
+    const tick = () => {
+        const now = performance.now();
+        while (batches.length && now - batches[0][0] > params.quietMs) batches.shift();
+        const recent = batches.reduce((sum, batch) => sum + batch[1], 0);
+        if (now - start >= params.quietMs && document.readyState === 'complete' && recent <= params.maxMutations) {
+            return finish(true);
+        }
+        if (now - start >= params.maxWaitMs) return finish(false);
+        setTimeout(tick, params.pollMs);
+    };
+    tick();
+})
+"""
+
+
+def track_requests(page: Page) -> None:
+    """
+    Keeps track of the page's requests in flight for its whole lifetime, so a later
+    wait_for_quiescence also waits for requests that started before the wait (e.g. during goto).
+    Call right after creating the page.
+    """
+    pending: Set[Request] = set()
+    _in_flight[page] = pending
+
+    def on_request(request):
+        if request.resource_type not in _LONG_LIVED_RESOURCE_TYPES:
+            pending.add(request)
+
+    page.on("request", on_request)
+    page.on("requestfinished", pending.discard)
+    page.on("requestfailed", pending.discard)
+
+
+async def wait_for_quiescence(page: Page, max_wait_ms: Optional[int] = None, quiet_ms: Optional[int] = None,
+                              scroll: bool = True) -> Dict[str, Any]:
+    """
+    Waits until the page is quiet: the DOM mutation rate has settled (MutationObserver window)
+    and no request is still in flight, for `quiet_ms`.
+    Static pages resolve after about `quiet_ms`; busy pages give up after `max_wait_ms`.
+    Requests that started before the wait are only seen on pages registered with
+    track_requests(); on other pages only requests started since the wait began count.
+
+    Returns {'waited_ms', 'settled', 'mutations', 'requests', 'pending_requests', 'reason'},
+    where reason is 'quiet', 'dom' or 'network' (what was still busy at the deadline) or 'error'.
+    """
+    max_wait_ms = max_wait_ms or config.QUIESCENCE_MAX_WAIT
+    quiet_ms = quiet_ms or config.QUIESCENCE_QUIET_WINDOW
+    started = time.monotonic()
+    pending = set(_in_flight.get(page, ()))
+    seen_requests = len(pending)
+    last_network_activity = started
+
+    def on_request(request):
+        nonlocal seen_requests, last_network_activity
+        if request.resource_type in _LONG_LIVED_RESOURCE_TYPES:
+            return
+        pending.add(request)
+        seen_requests += 1
+        last_network_activity = time.monotonic()
+
+    def on_request_done(request):
+        nonlocal last_network_activity
+        if request in pending:
+            pending.discard(request)
+            last_network_activity = time.monotonic()
+
+    page.on("request", on_request)
+    page.on("requestfinished", on_request_done)
+    page.on("requestfailed", on_request_done)
+    info = {'waited_ms': 0, 'settled': False, 'mutations': 0, 'requests': 0, 'pending_requests': 0, 'reason': 'dom'}
+    try:
+        first_round = True
+        while True:
+            remaining_ms = max_wait_ms - (time.monotonic() - started) * 1000
+            if remaining_ms <= 0:
+                break
+            dom = await asyncio.wait_for(
+                page.evaluate(DOM_QUIET_SCRIPT, {
+                    'quietMs': quiet_ms, 'maxWaitMs': remaining_ms, 'pollMs': config.QUIESCENCE_POLL_INTERVAL,
+                    'maxMutations': config.QUIESCENCE_MAX_MUTATIONS, 'scroll': scroll and first_round,
+                }),
+                timeout=remaining_ms / 1000 + 2,
+            )
+            first_round = False
+            info['mutations'] += dom.get('mutations', 0)
+            if not dom.get('settled'):
+                info['reason'] = 'dom'
+                break
+            network_quiet_ms = (time.monotonic() - last_network_activity) * 1000
+            if not pending and network_quiet_ms >= quiet_ms:
+                info['settled'] = True
+                info['reason'] = 'quiet'
+                break
+            info['reason'] = 'network'
+            if not pending:
+                # Only the tail of the quiet window is left to wait out.
+                await asyncio.sleep(min(quiet_ms - network_quiet_ms, max(0.0, remaining_ms)) / 1000)
+                if not pending and (time.monotonic() - last_network_activity) * 1000 >= quiet_ms:
+                    info['settled'] = True
+                    info['reason'] = 'quiet'
+                    break
+    except Exception as e:
+        info['reason'] = 'error'
+        logger.warning(f"Quiescence wait for {page.url} failed: {type(e).__name__} - {e}")
+    finally:
+        for event, handler in (("request", on_request), ("requestfinished", on_request_done), ("requestfailed", on_request_done)):
+            try:
+                page.remove_listener(event, handler)
+            except Exception:
+                pass
+    info['waited_ms'] = round((time.monotonic() - started) * 1000)
+    info['requests'] = seen_requests
+    info['pending_requests'] = len(pending)
+    return info
@@ -0,0 +1,122 @@
+# analyzer/request_blocking.py
+import asyncio
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from playwright.async_api import Page, Route
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+MODE_CDP = 'cdp'
+MODE_ROUTE = 'route'
+
+# Playwright resource types -> CDP Network.ResourceType
+CDP_RESOURCE_TYPES = {
+    'document': 'Document', 'stylesheet': 'Stylesheet', 'image': 'Image', 'media': 'Media',
+    'font': 'Font', 'script': 'Script', 'texttrack': 'TextTrack', 'xhr': 'XHR', 'fetch': 'Fetch',
+    'eventsource': 'EventSource', 'websocket': 'WebSocket', 'manifest': 'Manifest',
+    'ping': 'Ping', 'cspviolationreport': 'CSPViolationReport', 'prefetch': 'Prefetch',
+    'signedexchange': 'SignedExchange', 'other': 'Other',
+}
+
+# File extensions that identify a blocked resource type from the URL alone, so the browser
+# can drop these requests without asking anyone.
+RESOURCE_TYPE_EXTENSIONS = {
+    'image': ('png', 'jpg', 'jpeg', 'gif', 'webp', 'avif', 'svg', 'ico', 'bmp'),
+    'stylesheet': ('css',),
+    'font': ('woff', 'woff2', 'ttf', 'otf', 'eot'),
+    'media': ('mp4', 'webm', 'ogg', 'mp3', 'wav', 'm4a', 'mov'),
+    'script': ('js', 'mjs'),
+}
+
+
+def blocked_url_patterns(blocked_domains: Optional[Iterable[str]] = None,
+                         blocked_resources: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Network.setBlockedURLs patterns ('*' wildcards). BLOCKED_DOMAINS entries are matched as
+    substrings of the URL, like the route callback did; resource types become extension patterns.
+    """
+    domains = config.BLOCKED_DOMAINS if blocked_domains is None else blocked_domains
+    resources = config.BLOCKED_RESOURCES if blocked_resources is None else blocked_resources
+    patterns = []
+    for fragment in dict.fromkeys(d for d in domains if d):
+        patterns.append(f"*{fragment}*")
+    for resource_type in resources:
+        for extension in RESOURCE_TYPE_EXTENSIONS.get(resource_type, ()):
+            patterns.append(f"*.{extension}")
+            patterns.append(f"*.{extension}?*")
+    return patterns
+
+
+def fetch_block_patterns(blocked_resources: Optional[Iterable[str]] = None) -> List[Dict[str, str]]:
+    """Fetch.enable patterns pausing only requests of blocked resource types that no URL pattern caught."""
+    resources = config.BLOCKED_RESOURCES if blocked_resources is None else blocked_resources
+    cdp_types = dict.fromkeys(CDP_RESOURCE_TYPES[r] for r in resources if r in CDP_RESOURCE_TYPES)
+    return [{'urlPattern': '*', 'resourceType': cdp_type, 'requestStage': 'Request'} for cdp_type in cdp_types]
+
+
+class RouteBlocker:
+    """Fallback route handler (non-Chromium browsers or CDP failures) with the rules compiled once."""
+
+    def __init__(self, blocked_domains: Optional[Iterable[str]] = None, blocked_resources: Optional[Iterable[str]] = None):
+        domains = config.BLOCKED_DOMAINS if blocked_domains is None else blocked_domains
+        resources = config.BLOCKED_RESOURCES if blocked_resources is None else blocked_resources
+        self.blocked_types = frozenset(resources)
+        fragments = [re.escape(d) for d in dict.fromkeys(d for d in domains if d)]
+        self._domain_re = re.compile('|'.join(fragments)) if fragments else None
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        return resource_type in self.blocked_types or bool(self._domain_re and self._domain_re.search(url))
+
+    async def __call__(self, route: Route) -> None:
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            await route.abort()
+        else:
+            await route.continue_()
+
+
+_route_blocker: Optional[RouteBlocker] = None
+
+
+def route_blocker() -> RouteBlocker:
+    global _route_blocker
+    if _route_blocker is None:
+        _route_blocker = RouteBlocker()
+    return _route_blocker
+
+
+async def _fail_paused_request(session, event: Dict[str, Any]) -> None:
+    try:
+        await session.send('Fetch.failRequest', {'requestId': event['requestId'], 'errorReason': 'BlockedByClient'})
+    except Exception as e:
+        logger.debug(f"Fetch.failRequest failed for {event.get('request', {}).get('url')}: {e}")
+
+
+async def install_page_blocking(page: Page, mode: Optional[str] = None) -> str:
+    """
+    Blocks BLOCKED_DOMAINS and BLOCKED_RESOURCES for `page` and returns the mode used.
+
+    'cdp': Network.setBlockedURLs drops URL-pattern matches inside the browser; Fetch.enable
+    pauses only requests of blocked resource types that no pattern caught, and those are
+    failed right away. Requests that are allowed never reach Python.
+    'route': one Python callback per request (used if CDP is unavailable, e.g. Firefox/WebKit).
+    """
+    mode = mode or config.REQUEST_BLOCKING_MODE
+    if mode == MODE_CDP:
+        try:
+            session = await page.context.new_cdp_session(page)
+            await session.send('Network.enable')
+            await session.send('Network.setBlockedURLs', {'urls': blocked_url_patterns()})
+            patterns = fetch_block_patterns()
+            if patterns:
+                session.on('Fetch.requestPaused', lambda event: asyncio.ensure_future(_fail_paused_request(session, event)))
+                await session.send('Fetch.enable', {'patterns': patterns})
+            return MODE_CDP
+        except Exception as e:
+            logger.warning(f"CDP request blocking unavailable ({e}); falling back to route interception")
+    await page.route("**/*", route_blocker())
+    return MODE_ROUTE
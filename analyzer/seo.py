@@ -1,12 +1,18 @@
 
 import logging
-import asyncio # For _wait_for_dynamic_content and type hints
+import asyncio # For the streaming analysis API
 from dotenv import load_dotenv
-from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError # For helper methods and type hints
-from typing import Set, Dict, List, Any, Optional # For type hints
+from playwright.async_api import Browser, Page # For helper methods and type hints
+from typing import Set, Dict, List, Any, Optional, Callable, AsyncIterator, Union # For type hints
 from urllib.parse import urlparse, urljoin, urlunparse # For helper methods
 
 from analyzer.seoreportsaver import SEOReportSaver
+from analyzer.browser_pool import BrowserLease
+from analyzer.page_budget import PageBudget
+from analyzer.cancellation import CancelHandle
+from analyzer.crawl_events import AnalysisComplete, CrawlEvent
+from analyzer.link_extractor import extract_page_links
+from analyzer.quiescence import wait_for_quiescence
 # analyzer.config, analyzer.methods, analyzer.sitemap, analyzer.llm_analysis_start (changed to llm_analysis_mainpage.)
 # are now primarily used by seomainfunctions.py
 
@@ -95,352 +101,45 @@ class SEOAnalyzer:
             return None
 
 
-    async def _extract_internal_links_from_page_enhanced(self, page: Page, base_domain_check_part: str, site_canonical_base_url: str, exclude_patterns: List[str]) -> Set[str]:
-        """Enhanced link extraction with multiple strategies and better error handling."""
-
-        # Strategy 1: Enhanced JavaScript extraction with better error handling
-        try:
-            links_js_enhanced_result = await page.evaluate("""
-                (params) => {
-                    const baseDomain = params.baseDomain;
-                    const excludePatterns = params.excludePatterns;
-                    const links = new Set();
-                    const allowedSchemes = ['http:', 'https:'];
-
-                    const anchors = Array.from(document.querySelectorAll('a[href]'));
-                    const buttons = Array.from(document.querySelectorAll('button[onclick], [data-href], [data-url]'));
-
-                    anchors.forEach(link => {
-                        try {
-                            if (!link.href) return;
-                            const absoluteUrl = new URL(link.href, document.baseURI).href;
-                            const linkUrl = new URL(absoluteUrl);
-                            if (!allowedSchemes.includes(linkUrl.protocol)) return;
-                            const linkDomain = linkUrl.hostname.replace(/^www\\./i, '');
-                            if (linkDomain.toLowerCase() === baseDomain.toLowerCase()) { // case-insensitive domain check
-                                const shouldExclude = excludePatterns.some(pattern => {
-                                    return absoluteUrl.toLowerCase().includes(pattern.toLowerCase());
-                                });
-                                if (!shouldExclude) {
-                                    links.add(absoluteUrl);
-                                }
-                            }
-                        } catch (e) {
-                            // console.warn('Error processing link:', link.href, e); // Kept commented as per original
-                        }
-                    });
-
-                    buttons.forEach(btn => {
-                        try {
-                            const href = btn.getAttribute('data-href') ||
-                                       btn.getAttribute('data-url') ||
-                                       btn.getAttribute('onclick');
-                            if (href && !href.includes('javascript:')) {
-                                let extractedUrl = href;
-                                if (href.includes('location.href') || href.includes('window.open')) {
-                                    const urlMatch = href.match(/['"`]([^'"`]+)['"`]/);
-                                    if (urlMatch) extractedUrl = urlMatch[1];
-                                }
-                                try {
-                                    const absoluteUrl = new URL(extractedUrl, document.baseURI).href;
-                                    const linkUrl = new URL(absoluteUrl);
-                                    if (allowedSchemes.includes(linkUrl.protocol)) {
-                                        const linkDomain = linkUrl.hostname.replace(/^www\\./i, '');
-                                        if (linkDomain.toLowerCase() === baseDomain.toLowerCase()) { // case-insensitive
-                                            const shouldExclude = excludePatterns.some(pattern =>
-                                                absoluteUrl.toLowerCase().includes(pattern.toLowerCase())
-                                            );
-                                            if (!shouldExclude) {
-                                                links.add(absoluteUrl);
-                                            }
-                                        }
-                                    }
-                                } catch (e) {}
-                            }
-                        } catch (e) {
-                            // console.warn('Error processing button/element:', e); // Kept commented
-                        }
-                    });
-                    return {
-                        links: Array.from(links),
-                        anchorsFound: anchors.length,
-                        buttonsFound: buttons.length
-                    };
-                }
-            """, {"baseDomain": base_domain_check_part, "excludePatterns": exclude_patterns})
-
-            logging.info(f"Found {links_js_enhanced_result['anchorsFound']} anchor tags and {links_js_enhanced_result['buttonsFound']} interactive elements on {page.url}")
-            links_js_enhanced_links = links_js_enhanced_result.get('links', [])
-
-        except Exception as e:
-            logging.error(f"Enhanced JS link extraction failed for {page.url}: {e}")
-            links_js_enhanced_links = []
-
-        # Strategy 2: Playwright's built-in link detection as backup
-        try:
-            playwright_links_locators = await page.locator('a[href]').all()
-            playwright_urls = []
-
-            for link_element in playwright_links_locators:
-                try:
-                    href = await link_element.get_attribute('href')
-                    if href:
-                        absolute_url = urljoin(page.url, href) # Use current page URL as base
-                        parsed = urlparse(absolute_url)
-
-                        if (parsed.scheme in ('http', 'https') and
-                            parsed.netloc.replace('www.', '', 1).lower() == base_domain_check_part.lower()):
-
-                            if not any(exclude.lower() in absolute_url.lower() for exclude in exclude_patterns):
-                                playwright_urls.append(absolute_url)
-                except Exception: # Skip individual link errors
-                    continue
-            if playwright_urls:
-                 logging.info(f"Playwright method found {len(playwright_urls)} potential links on {page.url}")
-
-        except Exception as e:
-            logging.warning(f"Playwright link extraction failed for {page.url}: {e}")
-            playwright_urls = []
-
-        # Strategy 3: Extract from navigation menus specifically
-        try:
-            nav_links_from_js = await page.evaluate("""
-                (params) => {
-                    const baseDomain = params.baseDomain;
-                    const excludePatterns = params.excludePatterns;
-                    const navLinks = new Set();
-                    const navSelectors = [
-                        'nav a[href]', '.nav a[href]', '.navigation a[href]', '.menu a[href]',
-                        '.navbar a[href]', 'header a[href]', '[role="navigation"] a[href]',
-                        '.main-menu a[href]', '.primary-menu a[href]'
-                    ];
-                    navSelectors.forEach(selector => {
-                        try {
-                            const elements = document.querySelectorAll(selector);
-                            elements.forEach(link => {
-                                try {
-                                    if (link.href) {
-                                        const absoluteUrl = new URL(link.href, document.baseURI).href;
-                                        const linkUrl = new URL(absoluteUrl);
-                                        if (['http:', 'https:'].includes(linkUrl.protocol)) {
-                                            const linkDomain = linkUrl.hostname.replace(/^www\\./i, '');
-                                            if (linkDomain.toLowerCase() === baseDomain.toLowerCase()) { // case-insensitive
-                                                const shouldExclude = excludePatterns.some(pattern =>
-                                                    absoluteUrl.toLowerCase().includes(pattern.toLowerCase())
-                                                );
-                                                if (!shouldExclude) {
-                                                    navLinks.add(absoluteUrl);
-                                                }
-                                            }
-                                        }
-                                    }
-                                } catch (e) {}
-                            });
-                        } catch (e) {}
-                    });
-                    return Array.from(navLinks);
-                }
-            """, {"baseDomain": base_domain_check_part, "excludePatterns": exclude_patterns})
-            if nav_links_from_js:
-                logging.info(f"Navigation-specific extraction found {len(nav_links_from_js)} links on {page.url}")
-
-        except Exception as e:
-            logging.warning(f"Navigation link extraction failed for {page.url}: {e}")
-            nav_links_from_js = []
-
-        # Strategy 4: Extract from structured data (JSON-LD, microdata)
+    async def _extract_tagged_internal_links(self, page: Page, base_domain_check_part: str, site_canonical_base_url: str, exclude_patterns: List[str]) -> Dict[str, List[str]]:
+        """
+        Internal links of the page, normalized, each tagged with where it was found
+        (nav, content, footer, pagination, structured-data, interactive).
+        One DOM pass in the page does the domain and exclude filtering (see link_extractor.py).
+        """
         try:
-            structured_links_raw = await page.evaluate("""
-                () => {
-                    const links = new Set();
-                    const jsonLdScripts = document.querySelectorAll('script[type="application/ld+json"]');
-                    jsonLdScripts.forEach(script => {
-                        try {
-                            const data = JSON.parse(script.textContent);
-                            const extractUrls = (obj) => {
-                                if (typeof obj === 'string' && (obj.startsWith('http://') || obj.startsWith('https://'))) {
-                                    links.add(obj);
-                                } else if (typeof obj === 'object' && obj !== null) {
-                                    Object.values(obj).forEach(extractUrls);
-                                } else if (Array.isArray(obj)) {
-                                    obj.forEach(extractUrls);
-                                }
-                            };
-                            extractUrls(data);
-                        } catch (e) {}
-                    });
-                    const microdataElements = document.querySelectorAll('[itemscope] [itemprop*="url"], [itemscope] [itemprop*="href"]');
-                    microdataElements.forEach(el => {
-                        const content = el.getAttribute('content') || el.getAttribute('href') || el.textContent;
-                        if (content && (content.startsWith('http://') || content.startsWith('https://'))) {
-                            links.add(content);
-                        }
-                    });
-                    return Array.from(links);
-                }
-            """)
-
-            filtered_structured_links = []
-            for link_str in structured_links_raw:
-                try:
-                    parsed_link = urlparse(link_str)
-                    if parsed_link.netloc.replace('www.', '', 1).lower() == base_domain_check_part.lower():
-                        if not any(exclude.lower() in link_str.lower() for exclude in exclude_patterns):
-                            filtered_structured_links.append(link_str)
-                except:
-                    continue
-            if filtered_structured_links:
-                logging.info(f"Structured data extraction found {len(filtered_structured_links)} internal links on {page.url}")
-
+            raw_links = await extract_page_links(page, base_domain_check_part, exclude_patterns)
         except Exception as e:
-            logging.warning(f"Structured data link extraction failed for {page.url}: {e}")
-            filtered_structured_links = []
+            logging.error(f"Link extraction failed for {page.url}: {e}")
+            return {}
 
-        # --- MODIFICATION START: Improved Blog Post Detection ---
-        # Strategy 5: Blog and Pagination Link Extraction (runs on all pages)
-        blog_specific_links = []
-        try:
-            # This logic now runs on every page to find blog links from anywhere on the site,
-            # such as a "Latest Posts" section on the homepage.
-            blog_links_raw = await page.evaluate("""
-                () => {
-                    const links = new Set();
-                    // Selectors for individual blog post links
-                    const postSelectors = [
-                        'article a[href]', '.post a[href]', '.blog-post a[href]',
-                        '.entry-title a[href]', 'h2.entry-title a', '.post-title a',
-                        '.post-preview a', '.article-title a', 'a.blog-item-link', '.read-more',
-                        '.latest-posts a[href]', '.recent-posts a[href]' // Added selectors for common homepage sections
-                    ];
-                    // Selectors for blog pagination (next/previous page links)
-                    const paginationSelectors = [
-                        '.pagination a[href]', '.nav-links a[href]', 'a.next', 'a.page-numbers',
-                        '.wp-pagenavi a', '.blog-pagination a'
-                    ];
-                    const allSelectors = postSelectors.concat(paginationSelectors);
-
-                    allSelectors.forEach(selector => {
-                        try { // Inner try-catch for robustness against invalid selectors on some pages
-                            document.querySelectorAll(selector).forEach(link => {
-                                if (link.href) {
-                                    const hrefAttr = link.getAttribute('href');
-                                    // Ensure we don't capture empty, anchor, or javascript links
-                                    if (hrefAttr && hrefAttr.trim() !== '#' && !hrefAttr.startsWith('javascript:')) {
-                                         links.add(new URL(link.href, document.baseURI).href);
-                                    }
-                                }
-                            });
-                        } catch (e) {
-                           // Silently ignore errors from a single selector failing
-                        }
-                    });
-                    return Array.from(links);
-                }
-            """)
-
-            # Filter and process the raw links found by the blog-specific strategy
-            for link_str in blog_links_raw:
-                try:
-                    parsed_link = urlparse(link_str)
-                    # Check if it's an internal link and not in exclude patterns
-                    if parsed_link.netloc.replace('www.', '', 1).lower() == base_domain_check_part.lower():
-                        if not any(exclude.lower() in link_str.lower() for exclude in exclude_patterns):
-                            blog_specific_links.append(link_str)
-                except:
-                    # Ignore errors parsing individual URLs from this list
-                    continue
-            if blog_specific_links:
-                logging.info(f"Blog/Pagination-specific extraction found {len(blog_specific_links)} potential links on {page.url}")
-
-        except Exception as e:
-            logging.warning(f"Blog/Pagination-specific link extraction failed for {page.url}: {e}")
-        # --- MODIFICATION END ---
-
-        all_found_links_raw = set(links_js_enhanced_links + playwright_urls + nav_links_from_js + filtered_structured_links + blog_specific_links)
-
-        normalized_final_links: Set[str] = set()
-        for link_str in all_found_links_raw:
+        tagged_links: Dict[str, Set[str]] = {}
+        for link_str, sources in raw_links.items():
             normalized_link = self._normalize_url(link_str, site_canonical_base_url)
             if normalized_link:
-                normalized_final_links.add(normalized_link)
+                tagged_links.setdefault(normalized_link, set()).update(sources)
 
-        logging.info(f"Total unique internal links found on {page.url}: {len(normalized_final_links)}")
-        return normalized_final_links
+        logging.info(f"Total unique internal links found on {page.url}: {len(tagged_links)}")
+        return {link: sorted(sources) for link, sources in tagged_links.items()}
 
-    async def _wait_for_dynamic_content(self, page: Page, max_wait_seconds: int = 10) -> None:
+    async def _extract_internal_links_from_page_enhanced(self, page: Page, base_domain_check_part: str, site_canonical_base_url: str, exclude_patterns: List[str]) -> Set[str]:
+        """Normalized internal links of the page (see _extract_tagged_internal_links)."""
+        return set(await self._extract_tagged_internal_links(page, base_domain_check_part, site_canonical_base_url, exclude_patterns))
+
+    async def _wait_for_dynamic_content(self, page: Page, max_wait_seconds: Optional[float] = None) -> Dict[str, Any]:
         """
-        Wait for dynamic content to load using a more flexible strategy,
-        less prone to timeouts on low-compute environments.
-        This version corrects the TypeError from the previous suggestion.
+        Waits until the page is quiet (DOM mutation rate settled and no requests in flight),
+        at most `max_wait_seconds` (default config.QUIESCENCE_MAX_WAIT). Static pages return after
+        one quiet window instead of a fixed multi-second wait. Returns how long the wait took and
+        why it ended (see quiescence.py).
         """
-        logging.info(f"Waiting for dynamic content on {page.url} (max {max_wait_seconds}s)...")
-        try:
-            # 1. Wait for the initial DOM to be ready. 'load' is a good baseline.
-            initial_load_timeout = max_wait_seconds * 1000 * 0.5
-            await page.wait_for_load_state('load', timeout=initial_load_timeout)
-            logging.info(f"Initial 'load' state reached for {page.url}.")
-
-            # 2. Execute a scroll to trigger lazy-loaded content.
-            await page.evaluate("""
-                () => {
-                    window.scrollTo(0, document.body.scrollHeight / 2);
-                    return new Promise(resolve => setTimeout(resolve, 500)); // Brief pause after scroll
-                }
-            """)
-            await page.evaluate("() => window.scrollTo(0, 0)") # Scroll back to top
-
-            # 3. Implement a smarter wait that checks for DOM stability, with the timeout handled by asyncio.
-            js_stability_check_timeout_seconds = max_wait_seconds * 0.4
-        
-            js_code_for_stability_check = """
-                () => new Promise((resolve) => {
-                    let lastBodyHeight = document.body.scrollHeight;
-                    let stableChecks = 0;
-                    const maxStableChecks = 3; // Require 3 stable checks (1.5 seconds)
-                    const checkInterval = 500; // Check every 500ms
-
-                    const intervalId = setInterval(() => {
-                        const currentBodyHeight = document.body.scrollHeight;
-                        if (currentBodyHeight === lastBodyHeight) {
-                            stableChecks++;
-                            if (stableChecks >= maxStableChecks) {
-                                clearInterval(intervalId);
-                                resolve();
-                            }
-                        } else {
-                            stableChecks = 0;
-                            lastBodyHeight = currentBodyHeight;
-                        }
-                    }, checkInterval);
-
-                    // As a fallback, resolve after a max duration slightly less than the python timeout
-                    setTimeout(() => {
-                        clearInterval(intervalId);
-                        resolve();
-                    }, (js_stability_check_timeout_seconds * 1000) - 500);
-                })
-            """.replace('js_stability_check_timeout_seconds', str(js_stability_check_timeout_seconds)) # Inject variable
-
-            await asyncio.wait_for(
-                page.evaluate(js_code_for_stability_check),
-                timeout=js_stability_check_timeout_seconds
-            )
-
-            logging.info(f"Dynamic content wait finished for {page.url}.")
-
-        except PlaywrightTimeoutError:
-            logging.warning(
-                f"PlaywrightTimeoutError during the initial 'load' state wait for {page.url}. "
-                "The page is very slow to load its main resources."
-            )
-        except asyncio.TimeoutError:
-            logging.warning(
-                f"asyncio.TimeoutError during JavaScript stability check for {page.url}. "
-                "DOM did not stabilize in time, but proceeding with analysis."
-            )
-        except Exception as e:
-            # This will now catch other potential errors without being masked by the incorrect TypeError
-            logging.warning(f"Dynamic content wait for {page.url} failed: {type(e).__name__} - {e}")
+        max_wait_ms = round(max_wait_seconds * 1000) if max_wait_seconds else None
+        wait_info = await wait_for_quiescence(page, max_wait_ms=max_wait_ms)
+        if wait_info['settled']:
+            logging.info(f"Page {page.url} settled after {wait_info['waited_ms']} ms ({wait_info['mutations']} mutations, {wait_info['requests']} requests).")
+        else:
+            logging.info(f"Page {page.url} still busy ({wait_info['reason']}) after {wait_info['waited_ms']} ms; proceeding with analysis.")
+        return wait_info
 
     async def _extract_links_with_context(self, page: Page, base_domain_check_part: str, site_canonical_base_url: str, exclude_patterns: List[str]) -> Dict[str, Any]:
         """Extract links with additional context information."""
@@ -530,16 +229,44 @@ class SEOAnalyzer:
             logging.error(f"Link extraction with context failed for {page.url}: {e}")
             return {'links': set(), 'context': {}}
 
-    async def analyze_url(self, url: str) -> Optional[Dict[str, Any]]:
+    async def analyze_url(
+        self,
+        url: str,
+        concurrency: Optional[int] = None,
+        shards: Optional[int] = None,
+        shared_browser: Optional[Union[Browser, BrowserLease]] = None,
+        page_budget: Optional[PageBudget] = None,
+        cancel_handle: Optional[CancelHandle] = None,
+        on_queue: Optional[Callable[[int], None]] = None,
+        on_event: Optional[Callable[[CrawlEvent], None]] = None,
+        pg_frontier: Optional[Any] = None
+    ) -> Optional[Dict[str, Any]]:
         """
         Analyzes a given URL for SEO metrics.
         Delegates core processing to seomainfunctions.analyze_url_standalone.
         Ensures 'page_statistics' contains full details for all crawled pages.
+        `concurrency` overrides config.CRAWL_CONCURRENCY (number of crawl workers) for this run.
+        `shards` overrides config.CRAWL_SHARDS (number of crawl worker processes) for this run.
+        `shared_browser` / `page_budget` are used by batch_analysis.analyze_urls_batch to run many sites on one browser pool.
+        `cancel_handle` (see cancellation.py) stops the analysis early; the partial result then has status 'cancelled'.
+        `on_queue(position)` reports the queue position while waiting for a slot of the process-wide browser governor.
+        `on_event(event)` receives per-page results and progress while crawling (see analyze_url_stream).
+        `pg_frontier` (a pg_frontier.PgFrontier) shares the crawl queue with other worker containers.
         """
         # Delegate to the standalone function, passing 'self' as analyzer_instance
         # This allows analyze_url_standalone to use helper methods from this SEOAnalyzer instance
         # and access/modify its attributes (like self.initial_page_llm_report, self.saver).
-        analysis_result = await seomainfunctions.analyze_url_standalone(self, url)
+        analysis_result = await seomainfunctions.analyze_url_standalone(
+            self, url,
+            concurrency=concurrency,
+            shards=shards,
+            shared_browser=shared_browser,
+            page_budget=page_budget,
+            cancel_handle=cancel_handle,
+            on_queue=on_queue,
+            on_event=on_event,
+            pg_frontier=pg_frontier
+        )
 
         # THE FOLLOWING POST-PROCESSING BLOCK IS REMOVED:
         # The purpose is to ensure that 'page_statistics' as populated by
@@ -566,4 +293,45 @@ class SEOAnalyzer:
         # The crucial part is that this method now returns the 'analysis_result'
         # with 'page_statistics' intact.
 
-        return analysis_result
\ No newline at end of file
+        return analysis_result
+
+    async def analyze_url_stream(
+        self,
+        url: str,
+        cancel_handle: Optional[CancelHandle] = None,
+        **analyze_kwargs: Any
+    ) -> AsyncIterator[CrawlEvent]:
+        """
+        Streaming variant of analyze_url: yields a PageResult for every analyzed page and
+        CrawlProgress updates while the crawl continues, then one AnalysisComplete carrying
+        the same aggregate dict analyze_url returns.
+        Stopping the iteration early (break / aclose) cancels the crawl; its partial
+        result is saved with status 'cancelled' (never replacing a saved report) and the
+        checkpoint lets the next run resume.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        cancel_handle = cancel_handle or CancelHandle(label=url)
+        analysis_task = asyncio.create_task(
+            self.analyze_url(url, cancel_handle=cancel_handle, on_event=events.put_nowait, **analyze_kwargs)
+        )
+        analysis_task.add_done_callback(lambda _: events.put_nowait(None))
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+            yield AnalysisComplete(analysis_task.result())
+        finally:
+            if not analysis_task.done():
+                cancel_handle.cancel('stream consumer stopped')
+                await asyncio.gather(analysis_task, return_exceptions=True)
+
+    @staticmethod
+    async def analyze_urls(urls: List[str], **batch_limits: Any) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Batch entry point: analyzes many start URLs concurrently under one shared browser pool.
+        See batch_analysis.analyze_urls_batch for the supported limits.
+        """
+        from analyzer.batch_analysis import analyze_urls_batch
+        return await analyze_urls_batch(urls, **batch_limits)
\ No newline at end of file
@@ -4,16 +4,38 @@ import logging
 import time
 import random
 import asyncio
-from collections import deque
-from playwright.async_api import async_playwright, Page, TimeoutError as PlaywrightTimeoutError
+from contextlib import AsyncExitStack, asynccontextmanager, nullcontext
+from playwright.async_api import Browser, Page, TimeoutError as PlaywrightTimeoutError
 import aiohttp
-from typing import Set, Dict, List, Any, Optional
+from typing import Set, Dict, List, Any, Optional, Callable, Union
 from urllib.parse import urlparse, urljoin, urlunparse
 
 import analyzer.config as config
 from analyzer.methods import validate_url, extract_text
 from analyzer.sitemap import discover_sitemap_urls, fetch_all_pages_from_sitemaps
 from analyzer.llm_analysis_mainpage import llm_analysis_start
+from analyzer.crawl_pool import CrawlWorkerPool
+from analyzer.crawl_shards import ShardedPageFetcher
+from analyzer.http_fetch import HttpFirstFetcher, MODE_BROWSER, apply_parsed_page
+from analyzer.dom_snapshot import capture_dom_snapshot, parse_snapshot, save_snapshot
+from analyzer.js_mode import JsModeCache, compare_js_results, SOURCE_CACHE, SOURCE_DEFAULT, SOURCE_PROBE
+from analyzer.pg_frontier import PgFrontier, connect as pg_connect, crawl_job as pg_crawl_job
+from analyzer.page_budget import PageBudget
+from analyzer.politeness import PolitenessController, parse_retry_after, THROTTLE_STATUS_CODES
+from analyzer.frontier import CrawlFrontier
+from analyzer.adaptive_timeouts import AdaptiveTimeouts
+from analyzer.novelty import NoveltyTracker
+from analyzer.url_clusters import UrlTemplateClusterer
+from analyzer.checkpoint import CrawlCheckpoint
+from analyzer.cancellation import CancelHandle
+from analyzer.browser_governor import browser_governor
+from analyzer.browser_pool import browser_pool, BrowserLease
+from analyzer.page_pool import PagePool
+from analyzer.page_metrics import extract_page_metrics
+from analyzer.page_timing import TIMING_FIELDS, PageNetworkRecorder, navigation_timing, redirect_chain, timing_stats
+from analyzer.request_blocking import MODE_ROUTE, install_page_blocking, route_blocker
+from analyzer.quiescence import track_requests
+from analyzer.crawl_events import CrawlEvent, CrawlProgress, PageResult, PHASE_CRAWLING, PHASE_SITEMAP, PHASE_START_PAGE
 
 # Configure logging for this module if necessary, or rely on root configuration
 # For simplicity, we'll assume root configuration is sufficient or use `analyzer_instance.logger` if available.
@@ -30,6 +52,131 @@ def log_discovery_status(analyzer_instance, config):
     else:
         print(f"Links discovered: {links_discovered}/{links_limit}")
 
+@asynccontextmanager
+async def _page_slot(page_budget: Optional[PageBudget], domain: str):
+    """Holds the shared page budget slot for `domain` (if any) and one of the process-wide page slots."""
+    async with (page_budget.slot(domain) if page_budget else nullcontext()):
+        async with browser_governor.page_slot(domain):
+            yield
+
+async def _new_crawl_context(browser, javascript_enabled: bool = True):
+    """
+    Creates a browser context with the crawler's user agent and viewport.
+    Resource blocking is installed per page by _new_crawl_page (in the browser, over CDP);
+    only in 'route' mode does the context route every request through Python.
+    `javascript_enabled=False` gives pages without a JS engine (see js_mode.py).
+    """
+    context = await browser.new_context(
+        user_agent=config.USER_AGENT,
+        viewport={'width': config.VIEWPORT_WIDTH, 'height': config.VIEWPORT_HEIGHT},
+        java_script_enabled=javascript_enabled,
+    )
+    if config.REQUEST_BLOCKING_MODE == MODE_ROUTE:
+        await context.route("**/*", route_blocker())
+    return context
+
+async def _new_crawl_page(context) -> Page:
+    """Opens a crawl page with resource blocking installed before its first navigation."""
+    page = await context.new_page()
+    track_requests(page)
+    if config.REQUEST_BLOCKING_MODE != MODE_ROUTE:
+        await install_page_blocking(page)
+    return page
+
+def _new_page_pool(context, page_budget: Optional[PageBudget], analyzer_instance) -> PagePool:
+    """A page pool for the crawl whose open pages, idle ones included, each hold a page slot."""
+    return PagePool(
+        context, page_factory=_new_crawl_page,
+        slot=lambda: _page_slot(page_budget, analyzer_instance.start_domain_normal_part),
+    )
+
+async def _render_without_javascript(analyzer_instance, browser, url_to_probe: str,
+                                     page_budget: Optional[PageBudget]) -> Dict[str, Any]:
+    """Processes `url_to_probe` like the start page, but in a throwaway context with JavaScript disabled."""
+    probe_context = await _new_crawl_context(browser, javascript_enabled=False)
+    try:
+        async with _page_slot(page_budget, analyzer_instance.start_domain_normal_part):
+            probe_page = await _new_crawl_page(probe_context)
+            return await _process_page_standalone(
+                analyzer_instance,
+                probe_page, url_to_probe,
+                analyzer_instance.start_domain_normal_part,
+                analyzer_instance.site_base_for_normalization,
+                config.EXCLUDE_PATTERNS,
+                header_snippets_to_remove=None,
+                footer_snippets_to_remove=None,
+                needless_info_snippets_to_remove=None,
+                extract_with_context=True
+            )
+    finally:
+        await probe_context.close()
+
+def _empty_page_result(url_to_crawl: str) -> Dict[str, Any]:
+    return {
+        'url': url_to_crawl,
+        'cleaned_text': '',
+        'new_links': set(),
+        'link_context': {},
+        'link_sources': {}, # normalized link -> page regions it was found in
+        'title': '',
+        'headings_count': 0,
+        'images_count': 0,
+        'missing_alt_tags_count': 0,
+        'has_mobile_viewport': False,
+        'cleaned_content_length': 0,
+        'headings_by_level': {},
+        'meta_tags': {},
+        'canonical_url': None,
+        'html_lang': None,
+        # Navigation outcome, consumed by the politeness controller
+        'status_code': None,
+        'ttfb_seconds': None,
+        'retry_after': None,
+        'navigation_seconds': None,
+        'redirect_chain': [], # [{'url', 'status'}] hops before the final document
+        'dom_content_loaded_seconds': None, # Navigation Timing, from navigation start
+        'transfer_bytes': 0, # Document plus sub-resources loaded by DOMContentLoaded
+        'requests_count': 0,
+        'blocked_requests_count': 0, # Dropped by BLOCKED_DOMAINS / BLOCKED_RESOURCES
+        'failed_requests_count': 0,
+        'timed_out': False,
+        'dynamic_wait': None, # Quiescence wait report, if the page waited for dynamic content
+        # Why the page produced no result, and whether trying again may help
+        'error': None,
+        'retryable': False,
+    }
+
+async def _navigate(page: Page, url_to_crawl: str, result: Dict[str, Any], page_timeout: Optional[int] = None) -> None:
+    """
+    Loads `url_to_crawl` and records the navigation outcome in `result`: status, Retry-After,
+    redirect chain, TTFB and DOMContentLoaded (Navigation Timing), transfer bytes and
+    request / blocked / failed request counts.
+    """
+    recorder = PageNetworkRecorder(page)
+    recorder.attach()
+    try:
+        navigation_started = time.monotonic()
+        response = await page.goto(url_to_crawl, wait_until='domcontentloaded', timeout=page_timeout or config.PAGE_TIMEOUT)
+        if response is not None:
+            result['status_code'] = response.status
+            result['retry_after'] = response.headers.get('retry-after')
+            response_start_ms = (response.request.timing or {}).get('responseStart', -1)
+            result['ttfb_seconds'] = response_start_ms / 1000 if response_start_ms and response_start_ms > 0 \
+                else time.monotonic() - navigation_started
+            result['redirect_chain'] = await redirect_chain(response)
+        result['navigation_seconds'] = time.monotonic() - navigation_started
+        timing = await navigation_timing(page)
+        if timing.get('responseStart'):
+            result['ttfb_seconds'] = timing['responseStart'] / 1000
+        if timing.get('domContentLoaded'):
+            result['dom_content_loaded_seconds'] = timing['domContentLoaded'] / 1000
+        result['transfer_bytes'] = int(timing.get('documentBytes', 0) + timing.get('resourceBytes', 0))
+    finally:
+        recorder.detach()
+        result['requests_count'] = recorder.requests_count
+        result['blocked_requests_count'] = recorder.blocked_requests_count
+        result['failed_requests_count'] = recorder.failed_requests_count
+
 async def _process_page_standalone(
     analyzer_instance,  # Instance of SEOAnalyzer
     page: Page,
@@ -41,58 +188,46 @@ async def _process_page_standalone(
     footer_snippets_to_remove: Optional[List[str]] = None,
     needless_info_snippets_to_remove: Optional[List[str]] = None,
     extract_with_context: bool = False,
-    skip_link_extraction: bool = False # MODIFICATION: Added flag to control link extraction
+    skip_link_extraction: bool = False, # MODIFICATION: Added flag to control link extraction
+    page_timeout: Optional[int] = None # Navigation timeout in ms; defaults to config.PAGE_TIMEOUT
 ) -> Dict[str, Any]:
-    result = {
-        'url': url_to_crawl,
-        'cleaned_text': '',
-        'new_links': set(),
-        'link_context': {},
-        'title': '',
-        'headings_count': 0,
-        'images_count': 0,
-        'missing_alt_tags_count': 0,
-        'has_mobile_viewport': False,
-        'cleaned_content_length': 0,
-    }
+    result = _empty_page_result(url_to_crawl)
     
     try:
-        await page.goto(url_to_crawl, wait_until='domcontentloaded', timeout=config.PAGE_TIMEOUT)
+        await _navigate(page, url_to_crawl, result, page_timeout)
         
-        if extract_with_context: # Typically only for the main page
-            await analyzer_instance._wait_for_dynamic_content(page)
+        if extract_with_context or config.QUIESCENCE_WAIT_ALL_PAGES: # Typically only for the main page
+            result['dynamic_wait'] = await analyzer_instance._wait_for_dynamic_content(page)
         
         actual_landed_url_str = page.url
         normalized_landed_url = analyzer_instance._normalize_url(actual_landed_url_str, site_canonical_base_url)
 
         if not normalized_landed_url:
             result['url'] = None 
+            result['error'] = f"Landed on a URL outside the site: {actual_landed_url_str}"
             return result
         
         parsed_landed = urlparse(normalized_landed_url)
         if parsed_landed.netloc.replace('www.','',1).lower() != start_domain_check_part.lower():
             result['url'] = None 
+            result['error'] = f"Redirected off site to {normalized_landed_url}"
             return result
 
         result['url'] = normalized_landed_url
 
-        result['title'] = await page.title()
-        result['headings_count'] = await page.locator('h1,h2,h3,h4,h5,h6').count()
-        
-        image_elements = await page.locator('img').all()
-        result['images_count'] = len(image_elements)
-        missing_alts = 0
-        for img_element in image_elements:
-            try:
-                alt_text = await img_element.get_attribute('alt')
-                if alt_text is None or alt_text.strip() == "":
-                    missing_alts += 1
-            except Exception:
-                pass
-        result['missing_alt_tags_count'] = missing_alts
-        result['has_mobile_viewport'] = await page.locator('meta[name="viewport"]').count() > 0
-
-        text_content = await page.evaluate('() => document.body ? document.body.innerText : ""')
+        # One round trip for title, headings, images/alt, viewport, meta tags and innerText.
+        page_metrics = await extract_page_metrics(page)
+        result['title'] = page_metrics['title']
+        result['headings_by_level'] = page_metrics['headings']
+        result['headings_count'] = sum(page_metrics['headings'].values())
+        result['images_count'] = page_metrics['images_count']
+        result['missing_alt_tags_count'] = page_metrics['missing_alt_tags_count']
+        result['has_mobile_viewport'] = page_metrics['has_mobile_viewport']
+        result['meta_tags'] = page_metrics['meta']
+        result['canonical_url'] = page_metrics['canonical']
+        result['html_lang'] = page_metrics['lang']
+
+        text_content = page_metrics['text']
         
         if text_content:
             try:
@@ -120,9 +255,11 @@ async def _process_page_standalone(
             result['link_context'] = link_data['context']
         elif not skip_link_extraction:
             # For sub-pages, only extract links if the skip flag is NOT set
-            result['new_links'] = await analyzer_instance._extract_internal_links_from_page_enhanced(
+            link_sources = await analyzer_instance._extract_tagged_internal_links(
                 page, start_domain_check_part, site_canonical_base_url, exclude_patterns
             )
+            result['new_links'] = set(link_sources)
+            result['link_sources'] = link_sources
         else:
             # If skipping, log it for clarity. 'new_links' will correctly remain an empty set.
             logging.info(f"Skipping link extraction for {url_to_crawl} as sufficient links were found initially.")
@@ -132,15 +269,126 @@ async def _process_page_standalone(
     except PlaywrightTimeoutError:
         logging.warning(f"Timeout processing {url_to_crawl}")
         result['url'] = None 
+        result['error'] = f"Timeout after {page_timeout or config.PAGE_TIMEOUT} ms"
+        result['retryable'] = True
+        result['timed_out'] = True
         return result
     except Exception as e:
         logging.error(f"Error processing {url_to_crawl}: {e}")
         result['url'] = None
+        result['error'] = f"{type(e).__name__}: {str(e)[:300]}"
+        result['retryable'] = True
         return result
 
 
-async def analyze_url_standalone(analyzer_instance, url: str) -> Optional[Dict[str, Any]]:
+async def _process_page_snapshot(
+    analyzer_instance,  # Instance of SEOAnalyzer
+    page_pool: PagePool,
+    url_to_crawl: str,
+    skip_link_extraction: bool = False,
+    page_timeout: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    DOM snapshot variant of _process_page_standalone for crawled pages: the pooled page is leased
+    for the navigation and one DOMSnapshot capture only; metrics, links and text are then
+    extracted offline (dom_snapshot.parse_snapshot), off the event loop.
+    """
+    result = _empty_page_result(url_to_crawl)
+    try:
+        async with page_pool.page() as page:
+            await _navigate(page, url_to_crawl, result, page_timeout)
+            if config.QUIESCENCE_WAIT_ALL_PAGES:
+                result['dynamic_wait'] = await analyzer_instance._wait_for_dynamic_content(page)
+            snapshot = await capture_dom_snapshot(page)
+    except PlaywrightTimeoutError:
+        logging.warning(f"Timeout processing {url_to_crawl}")
+        result['url'] = None
+        result['error'] = f"Timeout after {page_timeout or config.PAGE_TIMEOUT} ms"
+        result['retryable'] = True
+        result['timed_out'] = True
+        return result
+    except Exception as e:
+        logging.error(f"Error processing {url_to_crawl}: {e}")
+        result['url'] = None
+        result['error'] = f"{type(e).__name__}: {str(e)[:300]}"
+        result['retryable'] = True
+        return result
+
+    if config.DOM_SNAPSHOT_STORE_DIR:
+        await asyncio.to_thread(save_snapshot, url_to_crawl, snapshot)
+    parsed = await asyncio.to_thread(parse_snapshot, snapshot)
+    result['url'] = None # Set by apply_parsed_page once the landed URL checks out
+    return apply_parsed_page(analyzer_instance, result, snapshot['url'], parsed, skip_link_extraction)
+
+def prioritize_and_add_links(
+    analyzer_instance,
+    new_links,
+    frontier: CrawlFrontier,
+    parent_depth: int = 0,
+    url_clusters: Optional[UrlTemplateClusterer] = None
+) -> int:
+    """
+    Add links in priority order, respecting MAX_LINKS_TO_DISCOVER limit.
+    Links are ranked by the frontier's scoring rules so the most important ones
+    are kept when the discovery limit cuts the list short. With `url_clusters`,
+    links whose URL template already has its sample are left out.
+    """
+    candidates = [
+        link for link in new_links
+        if link not in analyzer_instance.visited_urls and link not in frontier
+    ]
+    candidates.sort(key=lambda link: (frontier.score(link), link))
+
+    added_count = 0
+    for link in candidates:
+        if len(analyzer_instance.all_discovered_links) >= config.MAX_LINKS_TO_DISCOVER:
+            break
+        if url_clusters is not None and not url_clusters.admit(link):
+            analyzer_instance.visited_urls.add(link)
+            continue
+        analyzer_instance.all_discovered_links.add(link)
+        frontier.add(link, depth=parent_depth + 1)
+        analyzer_instance.visited_urls.add(link)
+        added_count += 1
+    return added_count
+
+async def analyze_url_standalone(
+    analyzer_instance,
+    url: str,
+    concurrency: Optional[int] = None,
+    shards: Optional[int] = None,
+    shared_browser: Optional[Union[Browser, BrowserLease]] = None,
+    page_budget: Optional[PageBudget] = None,
+    cancel_handle: Optional[CancelHandle] = None,
+    on_queue: Optional[Callable[[int], None]] = None,
+    on_event: Optional[Callable[[CrawlEvent], None]] = None,
+    pg_frontier: Optional[PgFrontier] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Crawls and analyzes a site starting from `url`.
+    `concurrency` sets the number of crawl workers for this run (defaults to config.CRAWL_CONCURRENCY).
+    `shards` > 1 renders pages in that many worker processes, each with its own browser
+    (defaults to config.CRAWL_SHARDS). The start page is always processed in this process.
+    `shared_browser` runs the crawl in a new context of a caller-owned browser instead of launching one
+    (pass the caller's BrowserLease rather than its browser so the pages count toward the pool's recycling),
+    and `page_budget` caps the pages this crawl may open alongside other crawls (see batch_analysis.py).
+    `cancel_handle` stops the analysis early: open pages, the context and the browser are closed right away
+    and the partial result is returned with status 'cancelled' (not saved; the checkpoint is kept).
+    `on_queue(position)` is called while the analysis waits for a browser slot of the process-wide governor.
+    `on_event(event)` receives a PageResult per analyzed page and CrawlProgress updates while the crawl runs
+    (see crawl_events.py and SEOAnalyzer.analyze_url_stream).
+    `pg_frontier` moves the crawl frontier into Postgres so other worker containers can join the crawl
+    (see pg_frontier.py); with config.PG_FRONTIER_ENABLED a connection is opened from the configured DSN.
+    """
     start_time = time.time()
+
+    def emit(event):
+        if on_event is None:
+            return
+        try:
+            on_event(event)
+        except Exception as e_event:
+            logging.warning(f"on_event callback failed for {type(event).__name__}: {e_event}")
     
     raw_validated_url = validate_url(url)
     if not raw_validated_url:
@@ -162,7 +410,18 @@ async def analyze_url_standalone(analyzer_instance, url: str) -> Optional[Dict[s
         logging.error(f"Could not normalize the start URL '{raw_validated_url}'")
         return None
 
+    if cancel_handle and cancel_handle.poll():
+        logging.info(f"Analysis of {analysis_url_input} was cancelled before it started.")
+        return None
+
     print(f"Starting analysis of: {analysis_url_input}")
+
+    checkpoint = CrawlCheckpoint(analysis_url_input) if config.CHECKPOINT_ENABLED else None
+    resumed_state = checkpoint.load() if checkpoint else None
+    if resumed_state:
+        print(f"Resuming analysis of {analysis_url_input} from checkpoint "
+              f"({len(resumed_state['url_in_report'])} pages already analyzed)")
+        start_time -= resumed_state.get('elapsed_seconds', 0)
     
     analyzer_instance.identified_header_texts = []
     analyzer_instance.identified_footer_texts = []
@@ -176,46 +435,57 @@ async def analyze_url_standalone(analyzer_instance, url: str) -> Optional[Dict[s
     sitemap_urls_discovered: List[str] = []
     robots_txt_found_status = False
 
-    async with aiohttp.ClientSession(headers={'User-Agent': config.USER_AGENT}) as session:
-        sitemap_urls_discovered = await discover_sitemap_urls(analysis_url_input, session) 
-        if sitemap_urls_discovered:
-            sitemap_pages_raw = await fetch_all_pages_from_sitemaps(sitemap_urls_discovered, session)
+    if resumed_state is None:
+        async with aiohttp.ClientSession(headers={'User-Agent': config.USER_AGENT}) as session:
+            sitemap_urls_discovered = await discover_sitemap_urls(analysis_url_input, session) 
+            if sitemap_urls_discovered:
+                sitemap_pages_raw = await fetch_all_pages_from_sitemaps(sitemap_urls_discovered, session)
         
-        robots_url = urljoin(analysis_url_input, '/robots.txt')
-        try:
-            async with session.get(robots_url, timeout=10) as response:
-                robots_txt_found_status = response.status == 200
-        except Exception as e_robots:
-            logging.warning(f"Could not fetch robots.txt from {robots_url}: {e_robots}")
-            robots_txt_found_status = False
+            robots_url = urljoin(analysis_url_input, '/robots.txt')
+            try:
+                async with session.get(robots_url, timeout=10) as response:
+                    robots_txt_found_status = response.status == 200
+            except Exception as e_robots:
+                logging.warning(f"Could not fetch robots.txt from {robots_url}: {e_robots}")
+                robots_txt_found_status = False
     
     sitemap_pages_list = list(sitemap_pages_raw)
 
-    # Sorts URLs so that blog posts come first, followed by other key pages, then the rest.
-    sitemap_pages_list.sort(key=lambda url: (
-        # This check correctly finds any URL with '/blog' OR '/icerik'
-        0 if any(p in url.lower() for p in ['/blog', '/icerik']) else
-        (1 if any(pattern in url.lower() for pattern in ['/about', '/contact', '/services', '/products']) else 2),
-        url
-    ))
+    # The frontier's scoring rules (config.FRONTIER_PRIORITY_RULES) decide the crawl order:
+    # blog posts first, then other key pages, then the rest.
+    frontier = CrawlFrontier()
+
+    # Sort by the same rules so the MAX_LINKS_TO_DISCOVER cut below keeps the most important sitemap URLs.
+    sitemap_pages_list.sort(key=lambda url: (frontier.score(url), url))
+
+    # Template-heavy sites list thousands of URLs of a few shapes (/urun/<slug>, /blog/<yyyy>/<slug>);
+    # crawl a sample of each shape instead of the first N in sort order.
+    url_clusters = UrlTemplateClusterer() if config.CLUSTER_SAMPLING_ENABLED else None
     
     # --- MODIFICATION START: Use a list to preserve order and a set for uniqueness ---
-    ordered_sitemap_urls: List[str] = []
+    normalized_sitemap_urls: List[str] = []
     # Use a set to efficiently track uniqueness, pre-populating with the start URL
     seen_normalized_urls: Set[str] = {analysis_url_input} 
 
     for page_url in sitemap_pages_list:
-        if len(ordered_sitemap_urls) >= config.MAX_LINKS_TO_DISCOVER - 10:
-            print(f"Limiting sitemap URLs to respect MAX_LINKS_TO_DISCOVER limit")
-            break
-        
         norm_page_url = analyzer_instance._normalize_url(page_url, analyzer_instance.site_base_for_normalization)
         # Check if URL is valid, not excluded, and not already seen
         if norm_page_url and norm_page_url not in seen_normalized_urls and not any(exclude in norm_page_url for exclude in config.EXCLUDE_PATTERNS):
-            ordered_sitemap_urls.append(norm_page_url)
+            normalized_sitemap_urls.append(norm_page_url)
             seen_normalized_urls.add(norm_page_url)
 
+    if url_clusters is not None:
+        url_clusters.observe(analysis_url_input)
+        normalized_sitemap_urls = url_clusters.sample(normalized_sitemap_urls)
+
+    ordered_sitemap_urls: List[str] = normalized_sitemap_urls[:max(0, config.MAX_LINKS_TO_DISCOVER - 10)]
+    if len(ordered_sitemap_urls) < len(normalized_sitemap_urls):
+        print(f"Limiting sitemap URLs to respect MAX_LINKS_TO_DISCOVER limit")
+    seen_normalized_urls = {analysis_url_input, *ordered_sitemap_urls}
+
     print(f"Found {len(ordered_sitemap_urls)} unique, prioritized URLs in sitemaps. Robots.txt found: {robots_txt_found_status}")
+    emit(CrawlProgress(PHASE_SITEMAP, 0, config.MAX_PAGES_TO_ANALYZE, queued=len(ordered_sitemap_urls),
+                       elapsed_seconds=round(time.time() - start_time, 2)))
     
     analysis = {
         'url': analysis_url_input, 
@@ -223,6 +493,7 @@ async def analyze_url_standalone(analyzer_instance, url: str) -> Optional[Dict[s
         'crawled_internal_pages_count': 0,
         'crawled_urls': [],
         'page_statistics': {},
+        'dynamic_content_waits': {}, # url -> quiescence wait report
         'analysis_duration_seconds': 0,
         'sitemap_found': bool(sitemap_urls_discovered),
         'sitemap_urls_discovered': sitemap_urls_discovered,
@@ -242,12 +513,14 @@ async def analyze_url_standalone(analyzer_instance, url: str) -> Optional[Dict[s
     analyzer_instance.all_discovered_links.update(seen_normalized_urls)
     
     url_in_report_dict: Dict[str, bool] = {} 
-    urls_to_visit = deque()
+    failed_urls: Dict[str, Dict[str, Any]] = {} # url -> {'reason', 'attempts'} for pages given up on
+    retried_urls: Set[str] = set()
+    frontier.mark_seen(analysis_url_input, depth=0)
 
-    # Populate the queue from the ORDERED list, preserving the sort priority
+    # Sitemap URLs count as one hop from the start page
     for s_url in ordered_sitemap_urls:
         if s_url not in analyzer_instance.visited_urls:
-            urls_to_visit.append(s_url)
+            frontier.add(s_url, depth=1)
             analyzer_instance.visited_urls.add(s_url) 
     # --- MODIFICATION END ---
 
@@ -259,317 +532,628 @@ async def analyze_url_standalone(analyzer_instance, url: str) -> Optional[Dict[s
     current_total_missing_alt_tags_count = 0
     current_pages_with_mobile_viewport_count = 0
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
+    async with AsyncExitStack() as playwright_stack:
+        browser_lease = None
+        if shared_browser is None:
+            # A warm browser from the process-wide pool; waits (with a visible queue position)
+            # while other sessions hold all governor browser slots or memory is high.
+            browser_lease = await playwright_stack.enter_async_context(
+                browser_pool.lease(analysis_url_input, on_queue=on_queue)
+            )
+            browser = browser_lease.browser
+        elif isinstance(shared_browser, BrowserLease):
+            # Batch mode: the leased browser belongs to the caller, we only own (and track) our context.
+            browser_lease = shared_browser
+            browser = shared_browser.browser
+        else:
+            # The browser belongs to the caller, we only own our context.
+            browser = shared_browser
         # MODIFICATION: Define flag with a default value before it might be set.
         skip_subsequent_link_extraction = False
+        sharded_fetcher = None
+        http_fetcher = None
+        initial_result_navigation_seconds = None
+        js_probe_baseline = None # The start page's JS-on result, compared against a JS-off render
+        javascript_enabled = True
+        novelty = NoveltyTracker()
+        crawl_stop_reason = None
+        crawl_body_running = True
+        cancel_watch_task = None
+        if cancel_handle:
+            analysis_task = asyncio.current_task()
+
+            async def cancel_watcher():
+                await cancel_handle.wait()
+                # Only interrupt the crawl itself; cleanup and the partial save must run to completion.
+                if crawl_body_running:
+                    analysis_task.cancel()
+
+            cancel_watch_task = asyncio.create_task(cancel_watcher())
         try:
-            context = await browser.new_context(
-                user_agent=config.USER_AGENT,
-                viewport={'width': config.VIEWPORT_WIDTH, 'height': config.VIEWPORT_HEIGHT},
-            )
-            await context.route("**/*", lambda route: route.abort() if 
-                route.request.resource_type in config.BLOCKED_RESOURCES or 
-                any(domain in route.request.url for domain in config.BLOCKED_DOMAINS) 
-                else route.continue_())
+            context = await _new_crawl_context(browser)
+            if browser_lease:
+                browser_lease.track(context)
+            page_pool = _new_page_pool(context, page_budget, analyzer_instance)
             
-            initial_page_obj = await context.new_page()
-            raw_initial_cleaned_text = "" 
             initial_page_tech_stats = {}
-            try:
-                initial_result = await _process_page_standalone(
-                    analyzer_instance,
-                    initial_page_obj, 
-                    analysis_url_input, 
-                    analyzer_instance.start_domain_normal_part,
-                    analyzer_instance.site_base_for_normalization,
-                    config.EXCLUDE_PATTERNS,
-                    header_snippets_to_remove=None, 
-                    footer_snippets_to_remove=None,
-                    needless_info_snippets_to_remove=None,
-                    extract_with_context=True
-                )
-                actual_initial_url = initial_result['url'] 
-
-                if actual_initial_url:
-                    initial_page_tech_stats = {
-                        'title': initial_result['title'],
-                        'headings_count': initial_result['headings_count'],
-                        'images_count': initial_result['images_count'],
-                        'missing_alt_tags_count': initial_result['missing_alt_tags_count'],
-                        'has_mobile_viewport': initial_result['has_mobile_viewport'],
-                        'cleaned_content_length': initial_result['cleaned_content_length']
-                    }
-                    current_total_cleaned_content_length += initial_page_tech_stats['cleaned_content_length']
-                    current_total_headings_count += initial_page_tech_stats['headings_count']
-                    current_total_images_count += initial_page_tech_stats['images_count']
-                    current_total_missing_alt_tags_count += initial_page_tech_stats['missing_alt_tags_count']
-                    if initial_page_tech_stats['has_mobile_viewport']:
-                        current_pages_with_mobile_viewport_count +=1
-
-                    if initial_result['cleaned_text']:
-                        raw_initial_cleaned_text = initial_result['cleaned_text'] 
+            if resumed_state:
+                # Resume: the start page, its LLM findings and every page analyzed so far come from the
+                # checkpoint, so the crawl continues with the pages that were still queued or in flight.
+                analysis = resumed_state['analysis']
+                frontier = CrawlFrontier.from_snapshot(resumed_state['frontier'])
+                analyzer_instance.visited_urls = set(resumed_state['visited_urls'])
+                analyzer_instance.all_discovered_links = set(resumed_state['all_discovered_links'])
+                analyzer_instance.initial_page_llm_report = resumed_state['initial_page_llm_report']
+                analyzer_instance.identified_header_texts = resumed_state['identified_header_texts']
+                analyzer_instance.identified_footer_texts = resumed_state['identified_footer_texts']
+                analyzer_instance.identified_needless_info_texts = resumed_state['identified_needless_info_texts']
+                url_in_report_dict = {u: True for u in resumed_state['url_in_report']}
+                failed_urls = resumed_state['failed_urls']
+                retried_urls = set(resumed_state['retried_urls'])
+                actual_initial_url = resumed_state['actual_initial_url']
+                initial_cleaned_text_for_main_url = resumed_state['initial_cleaned_text_for_main_url']
+                initial_page_tech_stats = resumed_state['initial_page_tech_stats']
+                skip_subsequent_link_extraction = resumed_state['skip_subsequent_link_extraction']
+                aggregates = resumed_state['aggregates']
+                current_total_cleaned_content_length = aggregates['total_cleaned_content_length']
+                current_total_headings_count = aggregates['total_headings_count']
+                current_total_images_count = aggregates['total_images_count']
+                current_total_missing_alt_tags_count = aggregates['total_missing_alt_tags_count']
+                current_pages_with_mobile_viewport_count = aggregates['pages_with_mobile_viewport_count']
+                for restored_page in analysis['page_statistics'].values():
+                    novelty.observe(restored_page.get('cleaned_text'), restored_page.get('title'))
+                if url_clusters is not None:
+                    if resumed_state.get('url_clusters'):
+                        # Same templates and per-template sample counts as before the restart.
+                        url_clusters = UrlTemplateClusterer.from_snapshot(resumed_state['url_clusters'])
+                    else:
+                        for known_url in analyzer_instance.visited_urls:
+                            url_clusters.observe(known_url)
+                for restored_page in analysis['page_statistics'].values():
+                    emit(PageResult(**restored_page))
+            else:
+                initial_page_slot = AsyncExitStack()
+                await initial_page_slot.enter_async_context(_page_slot(page_budget, analyzer_instance.start_domain_normal_part))
+                initial_page_obj = await _new_crawl_page(context)
+                raw_initial_cleaned_text = "" 
+                try:
+                    initial_result = await _process_page_standalone(
+                        analyzer_instance,
+                        initial_page_obj, 
+                        analysis_url_input, 
+                        analyzer_instance.start_domain_normal_part,
+                        analyzer_instance.site_base_for_normalization,
+                        config.EXCLUDE_PATTERNS,
+                        header_snippets_to_remove=None, 
+                        footer_snippets_to_remove=None,
+                        needless_info_snippets_to_remove=None,
+                        extract_with_context=True
+                    )
+                    actual_initial_url = initial_result['url'] 
+                    initial_result_navigation_seconds = initial_result.get('navigation_seconds')
+                    if actual_initial_url:
+                        js_probe_baseline = initial_result
+                    if initial_result.get('dynamic_wait'):
+                        analysis['dynamic_content_waits'][actual_initial_url or analysis_url_input] = initial_result['dynamic_wait']
+                    if actual_initial_url:
+                        # The start page seeds the novelty baseline (site-wide navigation, header and footer text).
+                        novelty.observe(initial_result['cleaned_text'], initial_result['title'], initial_result.get('new_links'))
+
+                    if actual_initial_url:
+                        initial_page_tech_stats = {
+                            'title': initial_result['title'],
+                            'headings_count': initial_result['headings_count'],
+                            'images_count': initial_result['images_count'],
+                            'missing_alt_tags_count': initial_result['missing_alt_tags_count'],
+                            'has_mobile_viewport': initial_result['has_mobile_viewport'],
+                            'cleaned_content_length': initial_result['cleaned_content_length']
+                        }
+                        current_total_cleaned_content_length += initial_page_tech_stats['cleaned_content_length']
+                        current_total_headings_count += initial_page_tech_stats['headings_count']
+                        current_total_images_count += initial_page_tech_stats['images_count']
+                        current_total_missing_alt_tags_count += initial_page_tech_stats['missing_alt_tags_count']
+                        if initial_page_tech_stats['has_mobile_viewport']:
+                            current_pages_with_mobile_viewport_count +=1
+
+                        if initial_result['cleaned_text']:
+                            raw_initial_cleaned_text = initial_result['cleaned_text'] 
                     
-                        if 'link_context' in initial_result and initial_result['link_context']:
-                            initial_page_link_context = initial_result['link_context']
+                            if 'link_context' in initial_result and initial_result['link_context']:
+                                initial_page_link_context = initial_result['link_context']
                     
-                        print("Analyzing main page content...")
-                        initial_page_data_for_llm = {
-                            'url': actual_initial_url,
-                            'cleaned_text': raw_initial_cleaned_text, 
-                            'headings': {} 
-                        }
-                        try:
-                            analyzer_instance.initial_page_llm_report = await llm_analysis_start(initial_page_data_for_llm)
-                            if analyzer_instance.initial_page_llm_report and not analyzer_instance.initial_page_llm_report.get("error"):
-                                analyzer_instance.identified_header_texts = analyzer_instance.initial_page_llm_report.get("header", [])
-                                analyzer_instance.identified_footer_texts = analyzer_instance.initial_page_llm_report.get("footer", [])
-                                analyzer_instance.identified_needless_info_texts = analyzer_instance.initial_page_llm_report.get("needless_info", [])
-                                if analyzer_instance.identified_header_texts or analyzer_instance.identified_footer_texts or analyzer_instance.identified_needless_info_texts:
-                                    print(f"Identified {len(analyzer_instance.identified_header_texts)} header, {len(analyzer_instance.identified_footer_texts)} footer, and {len(analyzer_instance.identified_needless_info_texts)} needless info elements via LLM")
-                            else: 
-                                error_msg = analyzer_instance.initial_page_llm_report.get('error', 'Unknown LLM error') if analyzer_instance.initial_page_llm_report else 'No LLM report'
-                                logging.warning(f"LLM analysis for initial page failed: {error_msg}")
-                                if not isinstance(analyzer_instance.initial_page_llm_report, dict): 
-                                    analyzer_instance.initial_page_llm_report = {}
-                                analyzer_instance.initial_page_llm_report.setdefault('url', actual_initial_url)
-                                analyzer_instance.initial_page_llm_report.setdefault('error', error_msg)
-
-                        except Exception as e_llm_init:
-                            logging.error(f"Error in LLM analysis for initial page: {e_llm_init}")
-                            analyzer_instance.initial_page_llm_report = {
-                                "url": actual_initial_url, "error": f"Exception in llm_analysis_start: {str(e_llm_init)}",
-                                "keywords": [], "content_summary": "", "other_information_and_contacts": [],
-                                "suggested_keywords_for_seo": [], "header": [], "footer": [], "needless_info": []
+                            print("Analyzing main page content...")
+                            initial_page_data_for_llm = {
+                                'url': actual_initial_url,
+                                'cleaned_text': raw_initial_cleaned_text, 
+                                'headings': {} 
                             }
-                        
-                        if isinstance(analyzer_instance.initial_page_llm_report, dict):
-                            analyzer_instance.initial_page_llm_report['tech_stats'] = initial_page_tech_stats
-                        else: 
-                            analyzer_instance.initial_page_llm_report = {'tech_stats': initial_page_tech_stats}
-
-                        final_initial_cleaned_text = raw_initial_cleaned_text 
-                        if analyzer_instance.identified_header_texts or analyzer_instance.identified_footer_texts or analyzer_instance.identified_needless_info_texts:
                             try:
-                                final_initial_cleaned_text = extract_text(
-                                    raw_initial_cleaned_text, 
-                                    header_snippets=analyzer_instance.identified_header_texts,
-                                    footer_snippets=analyzer_instance.identified_footer_texts,
-                                    needless_info_snippets=analyzer_instance.identified_needless_info_texts
-                                )
-                                new_length = len(final_initial_cleaned_text)
-                                if new_length != initial_page_tech_stats['cleaned_content_length']:
-                                    current_total_cleaned_content_length -= initial_page_tech_stats['cleaned_content_length']
-                                    current_total_cleaned_content_length += new_length
-                                    initial_page_tech_stats['cleaned_content_length'] = new_length
-                                    if isinstance(analyzer_instance.initial_page_llm_report, dict) and 'tech_stats' in analyzer_instance.initial_page_llm_report:
-                                        analyzer_instance.initial_page_llm_report['tech_stats']['cleaned_content_length'] = new_length
-                            except Exception as extract_error_hfn:
-                                logging.error(f"extract_text failed during header/footer/needless_info removal for initial page: {extract_error_hfn}")
+                                analyzer_instance.initial_page_llm_report = await llm_analysis_start(initial_page_data_for_llm)
+                                if analyzer_instance.initial_page_llm_report and not analyzer_instance.initial_page_llm_report.get("error"):
+                                    analyzer_instance.identified_header_texts = analyzer_instance.initial_page_llm_report.get("header", [])
+                                    analyzer_instance.identified_footer_texts = analyzer_instance.initial_page_llm_report.get("footer", [])
+                                    analyzer_instance.identified_needless_info_texts = analyzer_instance.initial_page_llm_report.get("needless_info", [])
+                                    if analyzer_instance.identified_header_texts or analyzer_instance.identified_footer_texts or analyzer_instance.identified_needless_info_texts:
+                                        print(f"Identified {len(analyzer_instance.identified_header_texts)} header, {len(analyzer_instance.identified_footer_texts)} footer, and {len(analyzer_instance.identified_needless_info_texts)} needless info elements via LLM")
+                                else: 
+                                    error_msg = analyzer_instance.initial_page_llm_report.get('error', 'Unknown LLM error') if analyzer_instance.initial_page_llm_report else 'No LLM report'
+                                    logging.warning(f"LLM analysis for initial page failed: {error_msg}")
+                                    if not isinstance(analyzer_instance.initial_page_llm_report, dict): 
+                                        analyzer_instance.initial_page_llm_report = {}
+                                    analyzer_instance.initial_page_llm_report.setdefault('url', actual_initial_url)
+                                    analyzer_instance.initial_page_llm_report.setdefault('error', error_msg)
+
+                            except Exception as e_llm_init:
+                                logging.error(f"Error in LLM analysis for initial page: {e_llm_init}")
+                                analyzer_instance.initial_page_llm_report = {
+                                    "url": actual_initial_url, "error": f"Exception in llm_analysis_start: {str(e_llm_init)}",
+                                    "keywords": [], "content_summary": "", "other_information_and_contacts": [],
+                                    "suggested_keywords_for_seo": [], "header": [], "footer": [], "needless_info": []
+                                }
                         
-                        initial_cleaned_text_for_main_url = final_initial_cleaned_text
-                        analysis['crawled_urls'].append(actual_initial_url)
-                        url_in_report_dict[actual_initial_url] = True 
+                            if isinstance(analyzer_instance.initial_page_llm_report, dict):
+                                analyzer_instance.initial_page_llm_report['tech_stats'] = initial_page_tech_stats
+                            else: 
+                                analyzer_instance.initial_page_llm_report = {'tech_stats': initial_page_tech_stats}
+
+                            final_initial_cleaned_text = raw_initial_cleaned_text 
+                            if analyzer_instance.identified_header_texts or analyzer_instance.identified_footer_texts or analyzer_instance.identified_needless_info_texts:
+                                try:
+                                    final_initial_cleaned_text = extract_text(
+                                        raw_initial_cleaned_text, 
+                                        header_snippets=analyzer_instance.identified_header_texts,
+                                        footer_snippets=analyzer_instance.identified_footer_texts,
+                                        needless_info_snippets=analyzer_instance.identified_needless_info_texts
+                                    )
+                                    new_length = len(final_initial_cleaned_text)
+                                    if new_length != initial_page_tech_stats['cleaned_content_length']:
+                                        current_total_cleaned_content_length -= initial_page_tech_stats['cleaned_content_length']
+                                        current_total_cleaned_content_length += new_length
+                                        initial_page_tech_stats['cleaned_content_length'] = new_length
+                                        if isinstance(analyzer_instance.initial_page_llm_report, dict) and 'tech_stats' in analyzer_instance.initial_page_llm_report:
+                                            analyzer_instance.initial_page_llm_report['tech_stats']['cleaned_content_length'] = new_length
+                                except Exception as extract_error_hfn:
+                                    logging.error(f"extract_text failed during header/footer/needless_info removal for initial page: {extract_error_hfn}")
                         
-                        def prioritize_and_add_links(analyzer_instance, new_links, urls_to_visit):
-                            """Add links with priority, respecting MAX_LINKS_TO_DISCOVER limit"""
-                            links_to_add = []
-                            
-                            priority_patterns = ['/about', '/contact', '/services', '/products', '/blog' , '/blog/icerik' ,'/icerik']
-                            
-                            priority_links = []
-                            regular_links = []
-                            
-                            for link in new_links:
-                                if link not in analyzer_instance.visited_urls and link not in urls_to_visit:
-                                    if any(pattern in link.lower() for pattern in priority_patterns):
-                                        priority_links.append(link)
-                                    else:
-                                        regular_links.append(link)
-                            
-                            for link in priority_links:
-                                if len(analyzer_instance.all_discovered_links) < config.MAX_LINKS_TO_DISCOVER:
-                                    analyzer_instance.all_discovered_links.add(link)
-                                    urls_to_visit.append(link)
-                                    analyzer_instance.visited_urls.add(link)
-                                    links_to_add.append(link)
-                            
-                            for link in regular_links:
-                                if len(analyzer_instance.all_discovered_links) < config.MAX_LINKS_TO_DISCOVER:
-                                    analyzer_instance.all_discovered_links.add(link)
-                                    urls_to_visit.append(link)
-                                    analyzer_instance.visited_urls.add(link)
-                                    links_to_add.append(link)
-                            
-                            return len(links_to_add)
+                            initial_cleaned_text_for_main_url = final_initial_cleaned_text
+                            emit(PageResult(
+                                url=actual_initial_url,
+                                cleaned_text=final_initial_cleaned_text,
+                                title=initial_page_tech_stats['title'],
+                                headings_count=initial_page_tech_stats['headings_count'],
+                                images_count=initial_page_tech_stats['images_count'],
+                                missing_alt_tags_count=initial_page_tech_stats['missing_alt_tags_count'],
+                                has_mobile_viewport=initial_page_tech_stats['has_mobile_viewport'],
+                                cleaned_content_length=initial_page_tech_stats['cleaned_content_length'],
+                                is_start_page=True,
+                            ))
+                            analysis['crawled_urls'].append(actual_initial_url)
+                            url_in_report_dict[actual_initial_url] = True 
                         
-                        if initial_result['new_links']:
-                            added_count = prioritize_and_add_links(
-                                analyzer_instance, 
-                                initial_result['new_links'], 
-                                urls_to_visit
-                            )
-                            if added_count > 0:
-                                print(f"Added {added_count} new links from initial page")
+                            if initial_result['new_links']:
+                                added_count = prioritize_and_add_links(
+                                    analyzer_instance, 
+                                    initial_result['new_links'], 
+                                    frontier,
+                                    parent_depth=0,
+                                    url_clusters=url_clusters
+                                )
+                                if added_count > 0:
+                                    print(f"Added {added_count} new links from initial page")
                         
-                        # --- MODIFICATION START: Set the skip flag after processing initial page ---
-                        # We have 1 page in the report (main) and a queue of other pages.
-                        # If this is enough to meet our analysis goal, we don't need to find more links.
-                        num_links_ready_for_analysis = len(url_in_report_dict) + len(urls_to_visit)
-                        skip_subsequent_link_extraction = num_links_ready_for_analysis >= config.MAX_PAGES_TO_ANALYZE
-
-                        if skip_subsequent_link_extraction:
-                            print(
-                                f"Sitemap and initial page provided enough links ({num_links_ready_for_analysis}) to meet the "
-                                f"analysis goal of {config.MAX_PAGES_TO_ANALYZE}. Skipping link extraction on subsequent pages."
-                            )
-                        # --- MODIFICATION END ---
+                            # --- MODIFICATION START: Set the skip flag after processing initial page ---
+                            # We have 1 page in the report (main) and a queue of other pages.
+                            # If this is enough to meet our analysis goal, we don't need to find more links.
+                            num_links_ready_for_analysis = len(url_in_report_dict) + len(frontier)
+                            skip_subsequent_link_extraction = num_links_ready_for_analysis >= config.MAX_PAGES_TO_ANALYZE
+
+                            if skip_subsequent_link_extraction:
+                                print(
+                                    f"Sitemap and initial page provided enough links ({num_links_ready_for_analysis}) to meet the "
+                                    f"analysis goal of {config.MAX_PAGES_TO_ANALYZE}. Skipping link extraction on subsequent pages."
+                                )
+                            # --- MODIFICATION END ---
+                        else: 
+                             if isinstance(analyzer_instance.initial_page_llm_report, dict):
+                                analyzer_instance.initial_page_llm_report['tech_stats'] = initial_page_tech_stats
+                             analysis['crawled_urls'].append(actual_initial_url) 
+                             url_in_report_dict[actual_initial_url] = True
                     else: 
-                         if isinstance(analyzer_instance.initial_page_llm_report, dict):
-                            analyzer_instance.initial_page_llm_report['tech_stats'] = initial_page_tech_stats
-                         analysis['crawled_urls'].append(actual_initial_url) 
-                         url_in_report_dict[actual_initial_url] = True
-                else: 
-                    logging.error(f"Initial page processing failed for {analysis_url_input}. Cannot proceed with LLM or content analysis for it.")
+                        logging.error(f"Initial page processing failed for {analysis_url_input}. Cannot proceed with LLM or content analysis for it.")
+                        analyzer_instance.initial_page_llm_report = {
+                            "url": analysis_url_input, 
+                            "error": "Initial page processing failed (e.g. timeout, navigation error)",
+                            "tech_stats": initial_page_tech_stats 
+                        }
+
+                except Exception as e_initial:
+                    logging.error(f"Error during initial page analysis for {analysis_url_input}: {e_initial}")
                     analyzer_instance.initial_page_llm_report = {
-                        "url": analysis_url_input, 
-                        "error": "Initial page processing failed (e.g. timeout, navigation error)",
-                        "tech_stats": initial_page_tech_stats 
+                        "url": analysis_url_input, "error": f"Outer error during initial page processing: {e_initial}",
+                        "tech_stats": {}
                     }
+                finally:
+                    if initial_page_obj and not initial_page_obj.is_closed():
+                        await initial_page_obj.close()
+                    await initial_page_slot.aclose()
 
-            except Exception as e_initial:
-                logging.error(f"Error during initial page analysis for {analysis_url_input}: {e_initial}")
-                analyzer_instance.initial_page_llm_report = {
-                    "url": analysis_url_input, "error": f"Outer error during initial page processing: {e_initial}",
-                    "tech_stats": {}
-                }
-            finally:
-                if initial_page_obj and not initial_page_obj.is_closed():
-                    await initial_page_obj.close()
+            # Reads page_pool at call time, so it follows the JS-off context swap below.
+            async def fetch_page(url_to_fetch, page_timeout=None):
+                if config.DOM_SNAPSHOT_MODE:
+                    return await _process_page_snapshot(
+                        analyzer_instance, page_pool, url_to_fetch,
+                        skip_link_extraction=skip_subsequent_link_extraction, page_timeout=page_timeout
+                    )
+                # Each worker leases a pooled page for its URL and hands it back (reset to about:blank)
+                # as soon as the page is done; the pool holds a page slot for every page it keeps open.
+                async with page_pool.page() as page:
+                    return await _process_page_standalone(
+                        analyzer_instance,
+                        page, url_to_fetch,
+                        analyzer_instance.start_domain_normal_part,
+                        analyzer_instance.site_base_for_normalization,
+                        config.EXCLUDE_PATTERNS,
+                        header_snippets_to_remove=analyzer_instance.identified_header_texts,
+                        footer_snippets_to_remove=analyzer_instance.identified_footer_texts,
+                        needless_info_snippets_to_remove=analyzer_instance.identified_needless_info_texts,
+                        skip_link_extraction=skip_subsequent_link_extraction,
+                        page_timeout=page_timeout
+                    )
+
+            crawl_shards = shards if shards is not None else config.CRAWL_SHARDS
+            use_shards = bool(crawl_shards and crawl_shards > 1 and frontier)
+            if not use_shards and config.HTTP_FIRST_ENABLED and frontier:
+                # Server-rendered pages skip the browser; client-rendered ones still go through fetch_page.
+                http_fetcher = HttpFirstFetcher(analyzer_instance, fetch_page, skip_link_extraction=skip_subsequent_link_extraction)
+                http_probe = await http_fetcher.probe_site(actual_initial_url or analysis_url_input, initial_cleaned_text_for_main_url)
+                print(f"Fetch mode: {http_fetcher.site_mode} (raw HTML has {http_probe['text_ratio']:.0%} of the rendered start page text)")
+
+            # JavaScript mode: with scripts blocked, many sites render the same without a JS engine.
+            # When the crawl goes through the browser (HTTP-first is off or the probe above found the raw
+            # HTML insufficient), the start page is rendered once more with JS off; if text and links hold
+            # up, the crawl runs in a JS-disabled context. Decisions are cached per domain for later runs.
+            js_domain = analyzer_instance.start_domain_normal_part
+            js_mode = {'javascript_enabled': True, 'source': SOURCE_DEFAULT}
+            crawl_uses_browser = http_fetcher is None or http_fetcher.site_mode == MODE_BROWSER
+            if (config.JS_MODE_DETECTION and crawl_uses_browser and frontier
+                    and len(url_in_report_dict) < config.MAX_PAGES_TO_ANALYZE):
+                js_mode_cache = JsModeCache()
+                cached_js_mode = await asyncio.to_thread(js_mode_cache.get, js_domain)
+                if cached_js_mode:
+                    js_mode = dict(cached_js_mode, source=SOURCE_CACHE)
+                elif js_probe_baseline is not None:
+                    try:
+                        js_off_result = await _render_without_javascript(analyzer_instance, browser, actual_initial_url, page_budget)
+                        if js_off_result['url']:
+                            js_mode = dict(compare_js_results(js_probe_baseline, js_off_result), source=SOURCE_PROBE)
+                            await asyncio.to_thread(
+                                js_mode_cache.put, js_domain, {k: v for k, v in js_mode.items() if k != 'source'}
+                            )
+                        else:
+                            logging.warning(f"JavaScript-off probe of {actual_initial_url} failed: {js_off_result.get('error')}")
+                    except Exception as e_js_probe:
+                        logging.warning(f"JavaScript-off probe failed for {actual_initial_url}: {e_js_probe}")
+            javascript_enabled = js_mode['javascript_enabled']
+            analysis['javascript_mode'] = js_mode
+            if not javascript_enabled:
+                print(f"Crawling {js_domain} with JavaScript disabled ({js_mode['source']}: "
+                      f"text ratio {js_mode.get('text_ratio')}, link ratio {js_mode.get('link_ratio')})")
+                await page_pool.close()
+                await context.close()
+                context = await _new_crawl_context(browser, javascript_enabled=False)
+                if browser_lease:
+                    browser_lease.track(context)
+                page_pool = _new_page_pool(context, page_budget, analyzer_instance)
             
-            async def process_batch_wrapper(batch_urls_to_crawl):
-                tasks = []
-                pages_for_batch = []
-                try:
-                    for batch_url_item in batch_urls_to_crawl:
-                        page = await context.new_page()
-                        pages_for_batch.append(page)
-                        # --- MODIFICATION: Pass the skip_link_extraction flag ---
-                        # This uses the flag defined in the outer scope.
-                        tasks.append(_process_page_standalone(
+            def handle_failed_page(intended_url, reason, retryable):
+                attempts = frontier.attempts(intended_url)
+                if retryable and attempts < config.RETRY_MAX_ATTEMPTS:
+                    backoff = config.RETRY_BASE_DELAY * (2 ** (attempts - 1))
+                    backoff = min(config.RETRY_MAX_DELAY, backoff) * random.uniform(0.8, 1.2)
+                    frontier.schedule_retry(intended_url, backoff)
+                    retried_urls.add(intended_url)
+                    logging.info(f"Retrying {intended_url} in {backoff:.1f}s (attempt {attempts + 1}/{config.RETRY_MAX_ATTEMPTS}): {reason}")
+                    return
+                frontier.mark_failed(intended_url)
+                failed_urls[intended_url] = {'reason': reason or 'Unknown error', 'attempts': attempts}
+                logging.warning(f"Giving up on {intended_url} after {attempts} attempt(s): {reason}")
+
+            def record_page_result(intended_url, page_result_data):
+                nonlocal current_total_cleaned_content_length, current_total_headings_count
+                nonlocal current_total_images_count, current_total_missing_alt_tags_count
+                nonlocal current_pages_with_mobile_viewport_count
+                nonlocal crawl_stop_reason
+
+                if isinstance(page_result_data, Exception):
+                    logging.warning(f"Page {intended_url} failed with exception: {page_result_data}")
+                    handle_failed_page(intended_url, f"{type(page_result_data).__name__}: {page_result_data}", retryable=True)
+                    return
+
+                actual_processed_url = page_result_data['url']
+                if not actual_processed_url:
+                    handle_failed_page(intended_url, page_result_data.get('error'), page_result_data.get('retryable', False))
+                    return
+                if page_result_data.get('status_code') in THROTTLE_STATUS_CODES:
+                    # The server asked us to slow down; the content is an error page, so try again later.
+                    handle_failed_page(intended_url, f"HTTP {page_result_data['status_code']}", retryable=True)
+                    return
+                frontier.mark_done(intended_url)
+                if page_result_data.get('dynamic_wait'):
+                    analysis.setdefault('dynamic_content_waits', {})[actual_processed_url] = page_result_data['dynamic_wait']
+                if actual_processed_url != intended_url:
+                    # Redirect target: remember it so it is not crawled a second time.
+                    frontier.mark_seen(actual_processed_url, depth=frontier.depth_of(intended_url))
+                parent_depth = frontier.depth_of(intended_url)
+
+                if actual_processed_url in url_in_report_dict:
+                    # If we are skipping link extraction, we don't need to process new links here.
+                    if not skip_subsequent_link_extraction and page_result_data.get('new_links'):
+                        prioritize_and_add_links(
                             analyzer_instance,
-                            page, batch_url_item, 
-                            analyzer_instance.start_domain_normal_part, 
-                            analyzer_instance.site_base_for_normalization, 
-                            config.EXCLUDE_PATTERNS,
-                            header_snippets_to_remove=analyzer_instance.identified_header_texts, 
-                            footer_snippets_to_remove=analyzer_instance.identified_footer_texts,
-                            needless_info_snippets_to_remove=analyzer_instance.identified_needless_info_texts,
-                            skip_link_extraction=skip_subsequent_link_extraction
-                        ))
-                    batch_proc_results = await asyncio.gather(*tasks, return_exceptions=True)
-                    return batch_proc_results, pages_for_batch
-                except Exception as e_batch_create:
-                    logging.error(f"Error creating batch tasks: {e_batch_create}")
-                    return [e_batch_create] * len(batch_urls_to_crawl), pages_for_batch
-
-            batch_size = 3
-            if config.MAX_PAGES_TO_ANALYZE == 0: batch_size = 0
-
-            while urls_to_visit and len(url_in_report_dict) < config.MAX_PAGES_TO_ANALYZE and batch_size > 0:
-                current_batch_urls = []
-                
-                while urls_to_visit and len(current_batch_urls) < batch_size:
-                    if len(url_in_report_dict) + len(current_batch_urls) >= config.MAX_PAGES_TO_ANALYZE:
-                        break
-                    url_from_queue = urls_to_visit.popleft()
-                    if url_from_queue not in url_in_report_dict: 
-                       current_batch_urls.append(url_from_queue)
-
-                if not current_batch_urls:
-                    break 
-                    
-                print(f"Processing batch of {len(current_batch_urls)} pages... ({len(url_in_report_dict)}/{config.MAX_PAGES_TO_ANALYZE} analyzed)")
-                
-                # The wrapper will now use the skip_subsequent_link_extraction flag internally
-                batch_results_data, batch_pages_created = await process_batch_wrapper(current_batch_urls)
-                
-                try: 
-                    successful_pages_in_batch = 0
-                    for intended_url, page_result_data in zip(current_batch_urls, batch_results_data):
-                        if isinstance(page_result_data, Exception):
-                            logging.warning(f"Page {intended_url} failed with exception: {page_result_data}")
-                            continue 
-
-                        actual_processed_url = page_result_data['url'] 
-
-                        if not actual_processed_url: 
-                            continue
-                        
-                        if actual_processed_url in url_in_report_dict:
-                            # If we are skipping link extraction, we don't need to process new links here.
-                            if not skip_subsequent_link_extraction and page_result_data.get('new_links'):
-                                prioritize_and_add_links(
-                                    analyzer_instance, 
-                                    page_result_data.get('new_links', set()), 
-                                    urls_to_visit
-                                )
-                            if len(analyzer_instance.all_discovered_links) >= config.MAX_LINKS_TO_DISCOVER: break
-                            continue
-
-                        if actual_processed_url != analysis_url_input: 
-                            if len(url_in_report_dict) < config.MAX_PAGES_TO_ANALYZE :
-                                page_stats_data = {
-                                    'url': actual_processed_url,
-                                    'cleaned_text': page_result_data['cleaned_text'],
-                                    'title': page_result_data['title'],
-                                    'headings_count': page_result_data['headings_count'],
-                                    'images_count': page_result_data['images_count'],
-                                    'missing_alt_tags_count': page_result_data['missing_alt_tags_count'],
-                                    'has_mobile_viewport': page_result_data['has_mobile_viewport'],
-                                    'cleaned_content_length': page_result_data['cleaned_content_length']
-                                }
-                                analysis['page_statistics'][actual_processed_url] = page_stats_data
-                                
-                                current_total_cleaned_content_length += page_stats_data['cleaned_content_length']
-                                current_total_headings_count += page_stats_data['headings_count']
-                                current_total_images_count += page_stats_data['images_count']
-                                current_total_missing_alt_tags_count += page_stats_data['missing_alt_tags_count']
-                                if page_stats_data['has_mobile_viewport']:
-                                    current_pages_with_mobile_viewport_count +=1
-                                
-                                url_in_report_dict[actual_processed_url] = True
-                                analysis['crawled_urls'].append(actual_processed_url)
-                                successful_pages_in_batch += 1
-                        
-                        # Only add new links if we are not skipping and below discovery limits
-                        if not skip_subsequent_link_extraction:
-                            for new_link in page_result_data.get('new_links', set()): 
-                                if len(analyzer_instance.all_discovered_links) < config.MAX_LINKS_TO_DISCOVER:
-                                    if new_link not in analyzer_instance.visited_urls and new_link not in urls_to_visit: 
-                                        analyzer_instance.all_discovered_links.add(new_link)
-                                        urls_to_visit.append(new_link)
-                                        analyzer_instance.visited_urls.add(new_link) 
-                                else: break 
-                        
-                        if len(url_in_report_dict) >= config.MAX_PAGES_TO_ANALYZE:
-                            print("Reached max pages to analyze.")
-                            break
-                    
-                    if successful_pages_in_batch > 0:
-                        print(f"Successfully processed {successful_pages_in_batch} pages in this batch.")
-                        
+                            page_result_data.get('new_links', set()),
+                            frontier,
+                            parent_depth,
+                            url_clusters
+                        )
+                    return
+
+                if actual_processed_url != analysis_url_input:
+                    if len(url_in_report_dict) < config.MAX_PAGES_TO_ANALYZE:
+                        page_stats_data = {
+                            'url': actual_processed_url,
+                            'cleaned_text': page_result_data['cleaned_text'],
+                            'title': page_result_data['title'],
+                            'headings_count': page_result_data['headings_count'],
+                            'images_count': page_result_data['images_count'],
+                            'missing_alt_tags_count': page_result_data['missing_alt_tags_count'],
+                            'has_mobile_viewport': page_result_data['has_mobile_viewport'],
+                            'cleaned_content_length': page_result_data['cleaned_content_length'],
+                            **{field: page_result_data.get(field) for field in TIMING_FIELDS},
+                        }
+                        analysis['page_statistics'][actual_processed_url] = page_stats_data
+
+                        current_total_cleaned_content_length += page_stats_data['cleaned_content_length']
+                        current_total_headings_count += page_stats_data['headings_count']
+                        current_total_images_count += page_stats_data['images_count']
+                        current_total_missing_alt_tags_count += page_stats_data['missing_alt_tags_count']
+                        if page_stats_data['has_mobile_viewport']:
+                            current_pages_with_mobile_viewport_count +=1
+
+                        url_in_report_dict[actual_processed_url] = True
+                        analysis['crawled_urls'].append(actual_processed_url)
+                        page_gain = novelty.observe(
+                            page_stats_data['cleaned_text'], page_stats_data['title'], page_result_data.get('new_links')
+                        )
+                        print(f"Processed {actual_processed_url} ({len(url_in_report_dict)}/{config.MAX_PAGES_TO_ANALYZE} analyzed, {crawl_pool.in_flight} in flight, gain {page_gain:.2f})")
+                        emit(PageResult(**page_stats_data))
+                        if on_event is not None:
+                            emit(crawl_progress())
+                        if config.NOVELTY_STOP_ENABLED and crawl_stop_reason is None and novelty.should_stop():
+                            crawl_stop_reason = 'low_novelty'
+                            print(f"Stopping early: the last {novelty.window} pages added little new content "
+                                  f"(mean gain {novelty.window_gain():.3f} < {novelty.threshold}).")
+                            crawl_pool.stop()
+                            return
+
+                # Only add new links if we are not skipping and below discovery limits
+                if not skip_subsequent_link_extraction and page_result_data.get('new_links'):
+                    prioritize_and_add_links(
+                        analyzer_instance,
+                        page_result_data.get('new_links', set()),
+                        frontier,
+                        parent_depth,
+                        url_clusters
+                    )
+
+                if len(url_in_report_dict) >= config.MAX_PAGES_TO_ANALYZE:
+                    print("Reached max pages to analyze.")
+                    if crawl_stop_reason is None:
+                        crawl_stop_reason = 'max_pages'
+                    crawl_pool.stop()
+
+            def checkpoint_state():
+                return {
+                    'elapsed_seconds': round(time.time() - start_time, 2),
+                    'analysis': analysis,
+                    'frontier': frontier.snapshot(),
+                    'visited_urls': list(analyzer_instance.visited_urls),
+                    'all_discovered_links': list(analyzer_instance.all_discovered_links),
+                    'url_in_report': list(url_in_report_dict),
+                    'failed_urls': failed_urls,
+                    'retried_urls': list(retried_urls),
+                    'initial_page_llm_report': analyzer_instance.initial_page_llm_report,
+                    'identified_header_texts': analyzer_instance.identified_header_texts,
+                    'identified_footer_texts': analyzer_instance.identified_footer_texts,
+                    'identified_needless_info_texts': analyzer_instance.identified_needless_info_texts,
+                    'actual_initial_url': actual_initial_url,
+                    'initial_cleaned_text_for_main_url': initial_cleaned_text_for_main_url,
+                    'initial_page_tech_stats': initial_page_tech_stats,
+                    'skip_subsequent_link_extraction': skip_subsequent_link_extraction,
+                    'url_clusters': url_clusters.snapshot() if url_clusters is not None else None,
+                    'aggregates': {
+                        'total_cleaned_content_length': current_total_cleaned_content_length,
+                        'total_headings_count': current_total_headings_count,
+                        'total_images_count': current_total_images_count,
+                        'total_missing_alt_tags_count': current_total_missing_alt_tags_count,
+                        'pages_with_mobile_viewport_count': current_pages_with_mobile_viewport_count,
+                    },
+                }
+
+            def record_and_checkpoint(intended_url, page_result_data):
+                record_page_result(intended_url, page_result_data)
+                if checkpoint:
+                    checkpoint.page_done(checkpoint_state)
+                if cancel_handle and cancel_handle.poll():
+                    # Cooperative checkpoint between pages: start nothing new.
+                    crawl_pool.stop()
+
+            if checkpoint and actual_initial_url:
+                # The start page (and its LLM call) is the most expensive step; never redo it after a crash.
+                checkpoint.save_soon(checkpoint_state())
+            emit(CrawlProgress(PHASE_START_PAGE, len(url_in_report_dict), config.MAX_PAGES_TO_ANALYZE,
+                               queued=len(frontier), failed=len(failed_urls),
+                               elapsed_seconds=round(time.time() - start_time, 2)))
+
+            def crawl_progress():
+                return CrawlProgress(
+                    PHASE_CRAWLING, len(url_in_report_dict), config.MAX_PAGES_TO_ANALYZE,
+                    queued=len(frontier), in_flight=crawl_pool.in_flight, failed=len(failed_urls),
+                    elapsed_seconds=round(time.time() - start_time, 2),
+                )
+
+            def has_crawl_capacity(in_flight):
+                # Pages in flight count against the budget so workers never overshoot MAX_PAGES_TO_ANALYZE.
+                return len(url_in_report_dict) + in_flight < config.MAX_PAGES_TO_ANALYZE
+
+            crawl_fetch = http_fetcher.fetch if http_fetcher else fetch_page
+            if use_shards:
+                # Sharded mode: this process keeps the frontier and aggregates, the shard processes
+                # render pages and clean text on the other cores.
+                sharded_fetcher = ShardedPageFetcher(
+                    num_shards=crawl_shards,
+                    lanes_per_shard=config.CRAWL_SHARD_CONCURRENCY,
+                    settings={
+                        'site_base_for_normalization': analyzer_instance.site_base_for_normalization,
+                        'start_domain_normal_part': analyzer_instance.start_domain_normal_part,
+                        'exclude_patterns': config.EXCLUDE_PATTERNS,
+                        'header_snippets': analyzer_instance.identified_header_texts,
+                        'footer_snippets': analyzer_instance.identified_footer_texts,
+                        'needless_info_snippets': analyzer_instance.identified_needless_info_texts,
+                        'skip_link_extraction': skip_subsequent_link_extraction,
+                        'javascript_enabled': javascript_enabled,
+                    },
+                )
+                sharded_fetcher.start()
+                crawl_fetch = sharded_fetcher.fetch
+                print(f"Sharded crawl mode: {sharded_fetcher.num_shards} worker processes x {sharded_fetcher.lanes_per_shard} pages each")
+
+            if concurrency is not None:
+                crawl_concurrency = concurrency
+            elif sharded_fetcher:
+                crawl_concurrency = sharded_fetcher.total_lanes
+            else:
+                crawl_concurrency = config.CRAWL_CONCURRENCY
+            # Request pacing adapts to how each host responds instead of sleeping a fixed random delay.
+            politeness = PolitenessController(max_concurrency=crawl_concurrency)
+            navigation_timeouts = AdaptiveTimeouts()
+            if initial_result_navigation_seconds is not None:
+                navigation_timeouts.record(analysis_url_input, navigation_seconds=initial_result_navigation_seconds)
+
+            async def polite_fetch(url_to_fetch, attempts=None):
+                # `attempts` comes from the Postgres frontier's claim; local crawls read it from the frontier.
+                if attempts is None:
+                    attempts = frontier.attempts(url_to_fetch)
+                async with politeness.slot(url_to_fetch):
+                    # The timeout follows the host's observed latency; retries get a smaller budget
+                    # so dead URLs do not hold a slot for long.
+                    page_timeout = navigation_timeouts.timeout_for(url_to_fetch)
+                    if attempts > 1:
+                        page_timeout = min(page_timeout, config.RETRY_PAGE_TIMEOUT)
+                    try:
+                        page_result = await crawl_fetch(url_to_fetch, page_timeout=page_timeout)
+                    except Exception:
+                        politeness.record(url_to_fetch, None, None, failed=True)
+                        raise
+                    navigation_timeouts.record(
+                        url_to_fetch,
+                        navigation_seconds=page_result.get('navigation_seconds'),
+                        timed_out_after_ms=page_timeout if page_result.get('timed_out') else None,
+                    )
+                    politeness.record(
+                        url_to_fetch,
+                        page_result.get('status_code'),
+                        page_result.get('ttfb_seconds'),
+                        retry_after_seconds=parse_retry_after(page_result.get('retry_after')),
+                        failed=page_result.get('status_code') is None,
+                    )
+                    return page_result
+
+            crawl_pool = CrawlWorkerPool(
+                concurrency=crawl_concurrency,
+                fetch=polite_fetch,
+                on_result=record_and_checkpoint,
+                has_capacity=has_crawl_capacity,
+            )
+
+            owns_pg_frontier = False
+            if pg_frontier is None and config.PG_FRONTIER_ENABLED and frontier:
+                pg_frontier = PgFrontier(await asyncio.to_thread(pg_connect))
+                owns_pg_frontier = True
+
+            if pg_frontier is not None and config.MAX_PAGES_TO_ANALYZE > 0 and crawl_concurrency > 0 and frontier:
+                # Distributed mode: the queue lives in Postgres and any number of worker containers
+                # (plus this process) claim URLs from it. Results are folded in once the job is drained.
+                await pg_frontier.ensure_schema()
+                pg_job_settings = {
+                    'site_base_for_normalization': analyzer_instance.site_base_for_normalization,
+                    'start_domain_normal_part': analyzer_instance.start_domain_normal_part,
+                    'exclude_patterns': config.EXCLUDE_PATTERNS,
+                    'header_snippets': analyzer_instance.identified_header_texts,
+                    'footer_snippets': analyzer_instance.identified_footer_texts,
+                    'needless_info_snippets': analyzer_instance.identified_needless_info_texts,
+                    'skip_link_extraction': skip_subsequent_link_extraction,
+                    'javascript_enabled': javascript_enabled,
+                    'max_pages': config.MAX_PAGES_TO_ANALYZE - len(url_in_report_dict),
+                }
+                pg_job_id = await pg_frontier.create_job(analysis_url_input, pg_job_settings)
+                pg_job_status = 'failed'
+                try:
+                    await pg_frontier.add_urls(pg_job_id, [(u, frontier.depth_of(u)) for u in frontier.queued_urls()],
+                                               max_urls=config.MAX_LINKS_TO_DISCOVER)
+                    print(f"Distributed crawl job {pg_job_id}: more workers can join with "
+                          f"`python -m analyzer.pg_frontier --job {pg_job_id}`")
+                    await pg_crawl_job(pg_frontier, pg_job_id, polite_fetch, crawl_concurrency, pg_job_settings)
+                    for page_stats in await pg_frontier.results(pg_job_id):
+                        record_page_result(page_stats['url'], page_stats)
+                    failed_urls.update(await pg_frontier.failures(pg_job_id))
+                    pg_job_counts = await pg_frontier.counts(pg_job_id)
+                    analysis['pg_frontier'] = {'job_id': pg_job_id, 'state_counts': pg_job_counts}
+                    pg_job_status = 'done'
+                except asyncio.CancelledError:
+                    pg_job_status = 'cancelled'
+                    raise
                 finally:
-                    for p_obj in batch_pages_created:
-                         if p_obj and not p_obj.is_closed():
-                            await p_obj.close()
-                
-                if len(url_in_report_dict) >= config.MAX_PAGES_TO_ANALYZE or \
-                   len(analyzer_instance.all_discovered_links) >= config.MAX_LINKS_TO_DISCOVER:
-                    print("Reached max pages to analyze or max links to discover.")
-                    break 
-                
-                await asyncio.sleep(random.uniform(config.CRAWL_DELAY_MIN / 2, config.CRAWL_DELAY_MAX / 2))
+                    try:
+                        await pg_frontier.finish_job(pg_job_id, pg_job_status)
+                    except Exception as e_pg:
+                        logging.warning(f"Could not close distributed crawl job {pg_job_id}: {e_pg}")
+                    if owns_pg_frontier:
+                        pg_frontier.close()
+                if crawl_stop_reason is None:
+                    crawl_stop_reason = 'max_pages' if len(url_in_report_dict) >= config.MAX_PAGES_TO_ANALYZE else 'frontier_exhausted'
+                analysis['politeness'] = politeness.stats()
+                analysis['navigation_timeouts'] = navigation_timeouts.stats()
+            elif config.MAX_PAGES_TO_ANALYZE > 0 and crawl_concurrency > 0 and frontier:
+                print(f"Crawling with {crawl_pool.concurrency} workers... ({len(url_in_report_dict)}/{config.MAX_PAGES_TO_ANALYZE} analyzed, {len(frontier)} queued)")
+                await crawl_pool.run(frontier)
+                if len(analyzer_instance.all_discovered_links) >= config.MAX_LINKS_TO_DISCOVER:
+                    print("Reached max links to discover.")
+                if crawl_stop_reason is None:
+                    if len(analyzer_instance.all_discovered_links) >= config.MAX_LINKS_TO_DISCOVER:
+                        crawl_stop_reason = 'max_links_discovered'
+                    else:
+                        crawl_stop_reason = 'frontier_exhausted'
+                analysis['politeness'] = politeness.stats()
+                analysis['navigation_timeouts'] = navigation_timeouts.stats()
+            if cancel_handle and cancel_handle.cancelled:
+                # The cooperative stop between pages ended the crawl before cancel_watcher interrupted it.
+                raise asyncio.CancelledError()
+            analysis['crawl_stop_reason'] = crawl_stop_reason or 'no_crawl'
+            analysis['page_pool'] = page_pool.stats()
+            await page_pool.close() # hands the idle pages' slots back before the post-crawl work
+            analysis['network_timing'] = timing_stats(analysis['page_statistics'].values())
+            if http_fetcher:
+                analysis['fetch_modes'] = http_fetcher.stats()
+            analysis['resumed_from_checkpoint'] = bool(resumed_state)
+            analysis['novelty'] = novelty.stats()
+            if url_clusters is not None:
+                analysis['url_clusters'] = url_clusters.stats()
+            analysis['frontier_state_counts'] = frontier.counts()
+            analysis['failed_urls'] = failed_urls
+            analysis['failed_urls_count'] = len(failed_urls)
+            analysis['retried_urls_count'] = len(retried_urls)
+            if failed_urls:
+                print(f"{len(failed_urls)} URLs failed permanently after retries.")
 
             if analyzer_instance.initial_page_llm_report and initial_cleaned_text_for_main_url:
                  if isinstance(analyzer_instance.initial_page_llm_report, dict):
@@ -610,9 +1194,36 @@ async def analyze_url_standalone(analyzer_instance, url: str) -> Optional[Dict[s
                     "tech_stats": {}
                 }
             
+            crawl_body_running = False
+            if checkpoint:
+                await checkpoint.discard()
             return analysis
-            
+
+        except asyncio.CancelledError:
+            crawl_body_running = False
+            if not (cancel_handle and cancel_handle.cancelled):
+                raise
+            current_task = asyncio.current_task()
+            if hasattr(current_task, 'uncancel'):
+                current_task.uncancel()
+            # The checkpoint is kept, so analyzing the same URL again resumes from here.
+            print(f"Analysis of {analysis_url_input} cancelled ({cancel_handle.reason}) after {len(analysis['crawled_urls'])} pages.")
+            analysis['status'] = 'cancelled'
+            analysis['cancel_reason'] = cancel_handle.reason
+            analysis['network_timing'] = timing_stats(analysis['page_statistics'].values())
+            analysis['crawled_internal_pages_count'] = len(analysis['crawled_urls'])
+            analysis['analysis_duration_seconds'] = round(time.time() - start_time, 2)
+            analysis['total_cleaned_content_length'] = current_total_cleaned_content_length
+            analysis['total_headings_count'] = current_total_headings_count
+            analysis['total_images_count'] = current_total_images_count
+            analysis['total_missing_alt_tags_count'] = current_total_missing_alt_tags_count
+            analysis['pages_with_mobile_viewport_count'] = current_pages_with_mobile_viewport_count
+            if analyzer_instance.initial_page_llm_report:
+                analysis['llm_analysis'] = analyzer_instance.initial_page_llm_report
+            return analysis
+
         except Exception as e_critical:
+            crawl_body_running = False
             logging.critical(f"Critical error in analysis workflow: {e_critical}", exc_info=True)
             analysis['error'] = f"Critical analysis error: {str(e_critical)}"
             analysis['analysis_duration_seconds'] = round(time.time() - start_time, 2)
@@ -620,7 +1231,25 @@ async def analyze_url_standalone(analyzer_instance, url: str) -> Optional[Dict[s
             if 'tech_stats' not in analysis['llm_analysis']: analysis['llm_analysis']['tech_stats'] = {}
             return analysis
         finally:
-            if 'browser' in locals() and browser.is_connected():
+            crawl_body_running = False
+            if cancel_watch_task:
+                cancel_watch_task.cancel()
+            if sharded_fetcher:
+                # A cancelled crawl kills the shards instead of letting them finish their queued pages.
+                await asyncio.to_thread(sharded_fetcher.close, terminate=bool(cancel_handle and cancel_handle.cancelled))
+            if http_fetcher:
+                await http_fetcher.close()
+            if checkpoint:
+                await checkpoint.flush()
+            if 'page_pool' in locals():
+                await page_pool.close()
+            if shared_browser is not None:
+                if 'context' in locals():
+                    try:
+                        await context.close()
+                    except Exception as e_context_close:
+                        logging.warning(f"Failed to close crawl context for {analysis_url_input}: {e_context_close}")
+            elif 'browser' in locals() and browser.is_connected():
                 await browser.close()
             
             final_analysis_data_to_save = analysis if 'analysis' in locals() and analysis else {}
@@ -640,8 +1269,12 @@ async def analyze_url_standalone(analyzer_instance, url: str) -> Optional[Dict[s
 
             if final_analysis_data_to_save and (final_analysis_data_to_save.get('crawled_internal_pages_count',0) > 0 or final_analysis_data_to_save.get('url')):
                 try:
+                    # A cancelled analysis is saved with status 'cancelled'; the saver never lets it replace a report.
                     await analyzer_instance.saver.save_reports(final_analysis_data_to_save) 
-                    print("Analysis report saved successfully!")
+                    if final_analysis_data_to_save.get('status') == 'cancelled':
+                        print("Partial results of the cancelled analysis saved.")
+                    else:
+                        print("Analysis report saved successfully!")
                 except Exception as e_save_final:
                     logging.error(f"Failed to save final analysis: {e_save_final}")
             else:
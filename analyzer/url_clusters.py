@@ -0,0 +1,193 @@
+# analyzer/url_clusters.py
+import logging
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import analyzer.config as config
+
+logger = logging.getLogger(__name__) # Module-specific logger
+
+# Segment shapes that are variable no matter how many siblings we have seen.
+_SEGMENT_CLASSES = [
+    (re.compile(r"^(19|20)\d{2}$"), '<yyyy>'),
+    (re.compile(r"^\d+$"), '<n>'),
+    (re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$"), '<id>'),
+    (re.compile(r"^[0-9a-f]{16,}$"), '<id>'),
+    (re.compile(r"^.*\d{3,}.*$"), '<slug>'),  # slugs carrying product codes or ids, e.g. 'shoe-12345'
+]
+
+
+def _segments(url: str) -> Tuple[str, ...]:
+    path = urlparse(url).path.lower()
+    return tuple(s for s in path.split('/') if s)
+
+
+def _segment_class(segment: str) -> Optional[str]:
+    for pattern, placeholder in _SEGMENT_CLASSES:
+        if pattern.match(segment):
+            return placeholder
+    return None
+
+
+class UrlTemplateClusterer:
+    """
+    Groups URLs by path shape, e.g. '/urun/<slug>' or '/blog/<yyyy>/<slug>', and
+    admits only CLUSTER_SAMPLE_SIZE URLs per template into the crawl.
+
+    A segment becomes a placeholder when it looks like a number, year, id or
+    code-bearing slug, or when URLs sharing the same parent template show at
+    least CLUSTER_MIN_VARIANTS different values at that position (top-level
+    segments only by shape). Templates are learned from every URL observed so
+    far, so observing the sitemap first gives discovered links a well-informed
+    template. When siblings merge into a placeholder, the URLs already admitted
+    under their literal templates count against the merged template's budget.
+    """
+
+    def __init__(self, sample_size: Optional[int] = None, min_variants: Optional[int] = None):
+        self.sample_size = max(1, int(sample_size or config.CLUSTER_SAMPLE_SIZE))
+        self.min_variants = max(2, int(min_variants or config.CLUSTER_MIN_VARIANTS))
+        # (path depth, parent template) -> distinct raw values seen at the next position
+        self._variants: Dict[Tuple[int, Tuple[str, ...]], Set[str]] = defaultdict(set)
+        # Insertion-ordered: templates depend on the order URLs were observed, so snapshots replay it.
+        self._observed: Dict[str, None] = {}
+        # url -> whether it was admitted, for every URL that went through admit() or sample()
+        self._decisions: Dict[str, bool] = {}
+        self._members: Dict[str, int] = defaultdict(int)
+        self._admitted: Dict[str, int] = defaultdict(int)
+        self._skipped: Dict[str, int] = defaultdict(int)
+        self._templates_changed = False
+
+    def observe(self, url: str) -> None:
+        """Adds `url` to the statistics that decide which segments are variable."""
+        if url in self._observed:
+            return
+        self._observed[url] = None
+        segments = _segments(url)
+        prefix: Tuple[str, ...] = ()
+        for segment in segments:
+            variants = self._variants[(len(segments), prefix)]
+            variants.add(segment)
+            if prefix and len(variants) == self.min_variants:
+                # These siblings now share a '<slug>' template.
+                self._templates_changed = True
+            prefix += (self._template_segment(len(segments), prefix, segment),)
+
+    def _template_segment(self, depth: int, prefix: Tuple[str, ...], segment: str) -> str:
+        placeholder = _segment_class(segment)
+        if placeholder:
+            return placeholder
+        # Top-level pages (/about, /contact, ...) are distinct pages, not instances of one template.
+        if prefix and len(self._variants.get((depth, prefix), ())) >= self.min_variants:
+            return '<slug>'
+        return segment
+
+    def template_of(self, url: str) -> str:
+        segments = _segments(url)
+        prefix: Tuple[str, ...] = ()
+        for segment in segments:
+            prefix += (self._template_segment(len(segments), prefix, segment),)
+        return '/' + '/'.join(prefix)
+
+    def _recount(self) -> None:
+        """Regroups the past decisions under the current templates after a merge."""
+        self._members.clear()
+        self._admitted.clear()
+        self._skipped.clear()
+        for url, admitted in self._decisions.items():
+            self._record(url, self.template_of(url), admitted)
+        self._templates_changed = False
+
+    def _record(self, url: str, template: str, admitted: bool) -> None:
+        self._decisions[url] = admitted
+        self._members[template] += 1
+        if admitted:
+            self._admitted[template] += 1
+        else:
+            self._skipped[template] += 1
+
+    def admit(self, url: str) -> bool:
+        """Observes a discovered URL and returns True while its cluster still has sample budget."""
+        if url in self._decisions:
+            return self._decisions[url]
+        self.observe(url)
+        if self._templates_changed:
+            self._recount()
+        template = self.template_of(url)
+        admitted = self._admitted[template] < self.sample_size
+        self._record(url, template, admitted)
+        return admitted
+
+    def sample(self, urls: Iterable[str]) -> List[str]:
+        """
+        Observes all `urls` (e.g. a sitemap) and returns the sampled subset in the
+        original order. Within a cluster the picks are spread evenly over the list
+        instead of taking its first entries.
+        """
+        urls = list(dict.fromkeys(urls))
+        for url in urls:
+            self.observe(url)
+        if self._templates_changed:
+            self._recount()
+
+        # URLs decided earlier keep their decision; only new ones compete for the remaining budget.
+        clusters: Dict[str, List[int]] = defaultdict(list)
+        for index, url in enumerate(urls):
+            if url not in self._decisions:
+                clusters[self.template_of(url)].append(index)
+
+        chosen: Set[int] = set()
+        for template, indexes in clusters.items():
+            budget = max(0, self.sample_size - self._admitted[template])
+            if len(indexes) <= budget:
+                picks = indexes
+            elif budget == 0:
+                picks = []
+            else:
+                step = len(indexes) / budget
+                picks = [indexes[int(i * step)] for i in range(budget)]
+            chosen.update(picks)
+            for index in indexes:
+                self._record(urls[index], template, index in chosen)
+
+        sampled = [url for url in urls if self._decisions[url]]
+        if len(sampled) < len(urls):
+            logger.info(f"URL clustering kept {len(sampled)} of {len(urls)} URLs across {len(clusters)} templates.")
+        return sampled
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable state for checkpoints (see checkpoint.py)."""
+        return {
+            'observed': list(self._observed),
+            'decisions': dict(self._decisions),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Dict[str, Any], sample_size: Optional[int] = None,
+                      min_variants: Optional[int] = None) -> 'UrlTemplateClusterer':
+        """Rebuilds a clusterer from snapshot(), with the same templates and per-template sample counts."""
+        clusterer = cls(sample_size, min_variants)
+        for url in snapshot.get('observed', []):
+            clusterer.observe(url)
+        clusterer._decisions.update(snapshot.get('decisions', {}))
+        clusterer._recount()
+        return clusterer
+
+    def stats(self, limit: int = 50) -> Dict[str, Any]:
+        """Largest clusters first, for the analysis report."""
+        largest = sorted(self._members.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return {
+            'sample_size': self.sample_size,
+            'templates_count': len(self._members),
+            'skipped_urls_count': sum(self._skipped.values()),
+            'clusters': [
+                {
+                    'template': template,
+                    'urls_seen': count,
+                    'sampled': self._admitted[template],
+                    'skipped': self._skipped[template],
+                }
+                for template, count in largest
+            ],
+        }
@@ -8,6 +8,7 @@ import json
 import re
 from datetime import datetime
 import time
+import uuid
 import plotly.express as px
 import plotly.graph_objects as go
 from urllib.parse import urlparse
@@ -18,6 +19,9 @@ from utils.shared_functions import (
     display_detailed_analysis_status_enhanced, update_page_history
 )
 from utils.s10tools import normalize_url
+from utils.singleflight import analysis_flights
+from analyzer.cancellation import cancel_registry
+from analyzer.browser_pool import browser_pool
 from utils.language_support import language_manager
 from supabase import create_client, Client
 from analyzer.llm_report.llm_analysis_end_processor import LLMAnalysisEndProcessor
@@ -117,9 +121,27 @@ def trigger_detailed_analysis_background_process(report_id: int): # report_id is
         return False
 
 # FIX: Added `supabase` client as a parameter
+def _session_gone_probe():
+    """Returns a callable that turns True once this Streamlit session disconnects (tab closed or left)."""
+    try:
+        from streamlit.runtime import Runtime
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is None:
+            return None
+        session_id = ctx.session_id
+        return lambda: Runtime.exists() and not Runtime.instance().is_active_session(session_id)
+    except Exception as e:
+        logging.debug(f"Session liveness probe unavailable: {e}")
+        return None
+
 async def process_url(url, supabase, lang="en"):
     st.session_state.analysis_in_progress = True
     st.session_state.url_being_analyzed = url
+    # One running analysis per session: a new submission cancels the previous one, and leaving the
+    # page cancels it too, so abandoned crawls do not keep their browser alive.
+    session_key = st.session_state.setdefault("analysis_session_key", uuid.uuid4().hex)
+    cancel_handle = cancel_registry.start(session_key, label=url, probe=_session_gone_probe())
     try:
         normalized_url = normalize_url(url)
         if not normalized_url:
@@ -163,8 +185,21 @@ async def process_url(url, supabase, lang="en"):
                             st.session_state.detailed_analysis_info["status_message"] = language_manager.get_text("detailed_analysis_trigger_failed_status", lang, fallback="Failed to start detailed analysis process.")
             else:
                 logging.info(f"Generating new report for {normalized_url}")
-                st.info(language_manager.get_text("generating_new_analysis", lang))
-                analysis_result = await analyze_website(normalized_url, supabase)
+                if analysis_flights.is_in_flight(normalized_url):
+                    # analyze_website attaches to the running crawl and returns its result.
+                    st.info(language_manager.get_text("analysis_already_in_progress", lang, fallback="This site is already being analyzed. Waiting for that analysis to finish..."))
+                else:
+                    st.info(language_manager.get_text("generating_new_analysis", lang))
+                queue_notice = st.empty()
+                def show_queue_position(position):
+                    # Called while all browser slots are busy; the crawl starts once this session reaches the front.
+                    queue_notice.info(language_manager.get_text("analysis_queued", lang, position=position, fallback=f"The server is busy. Your analysis is number {position} in the queue."))
+                analysis_result = await analyze_website(normalized_url, supabase, cancel_handle=cancel_handle, on_queue=show_queue_position)
+                queue_notice.empty()
+                if analysis_result and isinstance(analysis_result[1], dict) and analysis_result[1].get('status') == 'cancelled':
+                    st.warning(language_manager.get_text("analysis_cancelled", lang, fallback="The analysis was cancelled. Analyzing the site again continues where it stopped."))
+                    logging.info(f"Analysis cancelled for {normalized_url}")
+                    st.session_state.analysis_in_progress = False; st.session_state.url_being_analyzed = None; return
                 if analysis_result and analysis_result[0] and analysis_result[1]:
                     text_report, full_report = analysis_result
                     report_response = await asyncio.to_thread(lambda: supabase.table('seo_reports').select('id').eq('url', normalized_url).order('timestamp', desc=True).limit(1).execute())
@@ -187,6 +222,8 @@ async def process_url(url, supabase, lang="en"):
     except Exception as e:
         st.error(f"Error in process_url: {str(e)}"); logging.error(f"Error in process_url: {str(e)}", exc_info=True)
         st.session_state.analysis_in_progress = False; st.session_state.url_being_analyzed = None
+    finally:
+        cancel_registry.finish(session_key, cancel_handle)
 
 # --- DATA EXTRACTION AND VISUALIZATION FUNCTIONS ---
 
@@ -219,7 +256,7 @@ def extract_metrics_from_report(full_report_json):
         'site_health_indicators': { # Detailed site-wide health data for scoring
             'thin_content_page_count': 0,
             'bad_format_title_page_count': 0,
-            'internal_404_page_count': 0, # Will be 0 if no status_code in page_statistics
+            'internal_404_page_count': 0, # Counted from status_code in page_statistics
             'mobile_optimization_percentage': 0.0,
             'alt_text_coverage_percentage': 0.0,
             'average_content_length_chars': 0,
@@ -272,7 +309,16 @@ def extract_metrics_from_report(full_report_json):
     health['average_content_length_chars'] = full_report_json.get('average_cleaned_content_length_per_page', 0)
 
     analysis_duration = full_report_json.get('analysis_duration_seconds')
-    if isinstance(analysis_duration, (int, float)) and health['crawled_pages_count'] > 0:
+    network_timing = full_report_json.get('network_timing') or {}
+    dom_content_loaded = network_timing.get('dom_content_loaded_seconds') or {}
+    if isinstance(dom_content_loaded.get('p50'), (int, float)):
+        # Measured per page (Navigation Timing median) instead of estimated from the crawl duration
+        avg_crawl_time = dom_content_loaded['p50']
+        health['avg_crawl_time_per_page'] = avg_crawl_time
+        if avg_crawl_time < 2: tech_metrics['page_speed'] = 'good'
+        elif avg_crawl_time <= 4: tech_metrics['page_speed'] = 'warning'
+        else: tech_metrics['page_speed'] = 'error'
+    elif isinstance(analysis_duration, (int, float)) and health['crawled_pages_count'] > 0:
         avg_crawl_time = analysis_duration / health['crawled_pages_count']
         health['avg_crawl_time_per_page'] = avg_crawl_time
         if avg_crawl_time < 2: tech_metrics['page_speed'] = 'good'
@@ -748,6 +794,8 @@ def run_main_app():
     load_dotenv()
     init_shared_session_state()
     lang = st.session_state.language
+    # Starts the warm browser pool once per process (no-op on reruns); browsers launch in the background.
+    browser_pool.warm_up()
 
     # --- STEP 3: RENDER INITIAL UI ELEMENTS ---
     # Display static elements like the logo and title. This gives the user
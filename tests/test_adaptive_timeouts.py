@@ -0,0 +1,52 @@
+import analyzer.config as config
+from analyzer.adaptive_timeouts import AdaptiveTimeouts, percentile
+
+URL = 'https://www.example.com/page'
+
+
+def test_percentile_is_nearest_rank():
+    values = [0.5, 0.1, 0.4, 0.2, 0.3]
+    assert percentile(values, 50) == 0.3
+    assert percentile(values, 95) == 0.5
+    assert percentile(values, 0) == 0.1
+    assert percentile([], 50) is None
+
+
+def test_flat_timeout_until_enough_samples(monkeypatch):
+    monkeypatch.setattr(config, 'ADAPTIVE_TIMEOUT_MIN_SAMPLES', 3)
+    timeouts = AdaptiveTimeouts()
+    timeouts.record(URL, 2.0)
+    timeouts.record(URL, 2.0)
+    assert timeouts.timeout_for(URL) == config.PAGE_TIMEOUT
+
+    timeouts.record(URL, 2.0)
+    assert timeouts.timeout_for(URL) == int(2.0 * 1000 * config.ADAPTIVE_TIMEOUT_MULTIPLIER)
+    assert timeouts.stats()['chosen_timeouts_ms']['adaptive_count'] == 1
+
+
+def test_timeouts_are_clamped_and_tracked_per_host(monkeypatch):
+    monkeypatch.setattr(config, 'ADAPTIVE_TIMEOUT_MIN_SAMPLES', 2)
+    timeouts = AdaptiveTimeouts()
+    for _ in range(2):
+        timeouts.record('https://fast.example.com/', 0.01)
+        timeouts.record('https://slow.example.com/', 600.0)
+
+    assert timeouts.timeout_for('https://fast.example.com/x') == config.ADAPTIVE_TIMEOUT_FLOOR
+    assert timeouts.timeout_for('https://slow.example.com/x') == config.ADAPTIVE_TIMEOUT_CEILING
+    assert timeouts.timeout_for('https://other.example.com/') == config.PAGE_TIMEOUT
+
+
+def test_timed_out_navigations_push_the_timeout_up(monkeypatch):
+    monkeypatch.setattr(config, 'ADAPTIVE_TIMEOUT_MIN_SAMPLES', 2)
+    monkeypatch.setattr(config, 'ADAPTIVE_TIMEOUT_CEILING', 10 ** 9)
+    timeouts = AdaptiveTimeouts()
+    timeouts.record(URL, 3.0)
+    timeouts.record(URL, 3.0)
+    before = timeouts.timeout_for(URL)
+
+    timeouts.record(URL, timed_out_after_ms=before)
+    assert timeouts.timeout_for(URL) > before
+    # Negative or missing latencies are ignored.
+    timeouts.record(URL, -1.0)
+    timeouts.record(URL)
+    assert timeouts.stats()['hosts']['example.com']['samples'] == 3
@@ -0,0 +1,110 @@
+import asyncio
+
+import analyzer.browser_pool as browser_pool_module
+from analyzer.browser_governor import browser_governor
+from analyzer.browser_pool import CRAWL_LEASE, SCRAPER_LEASE, BrowserPool, _WarmBrowser, _launch_args
+
+
+class FakeDriver:
+    def __init__(self, log):
+        self.log = log
+
+    async def __aenter__(self):
+        self.log.append('start')
+        return self
+
+    async def __aexit__(self, *exc):
+        self.log.append('stop')
+        return False
+
+
+def test_leases_in_one_loop_share_one_driver(monkeypatch):
+    log = []
+    monkeypatch.setattr(browser_pool_module, 'async_playwright', lambda: FakeDriver(log))
+    pool = BrowserPool(size=1)
+
+    async def session():
+        first, second = await asyncio.gather(pool._driver(), pool._driver())
+        third = await pool._driver()
+        return first, second, third
+
+    first, second, third = asyncio.run(session())
+    assert first is second is third
+    # asyncio.run cancels the driver task when the session loop ends, which stops the driver.
+    assert log == ['start', 'stop']
+    assert pool._drivers == {}
+
+    asyncio.run(session())
+    assert log == ['start', 'stop', 'start', 'stop']
+
+
+def test_warm_browsers_are_capped(monkeypatch):
+    monkeypatch.setattr(browser_governor, 'memory_above_high_water', lambda: False)
+    pool = BrowserPool(size=2, max_browsers=3)
+    pool._browsers = [_WarmBrowser(i, browser=None, endpoint='') for i in range(2)]
+    assert pool._can_launch()
+
+    pool._browsers[0].retiring = True
+    pool._launching = 1
+    assert not pool._can_launch()
+
+
+def test_no_warm_launch_above_the_memory_high_water_mark(monkeypatch):
+    monkeypatch.setattr(browser_governor, 'memory_above_high_water', lambda: True)
+    pool = BrowserPool(size=2)
+    assert not pool._can_launch()
+
+
+class FakeWarmBrowser:
+    def __init__(self):
+        self.closed = False
+
+    def is_connected(self):
+        return not self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+def pool_with_fake_launches(monkeypatch, **kwargs):
+    monkeypatch.setattr(browser_governor, 'memory_above_high_water', lambda: False)
+    pool = BrowserPool(**kwargs)
+    launched = []
+
+    async def fake_launch(kind=CRAWL_LEASE):
+        warm = _WarmBrowser(len(pool._browsers) + len(launched) + 1, FakeWarmBrowser(), '', kind)
+        pool._browsers.append(warm)
+        launched.append(kind)
+        return warm
+
+    monkeypatch.setattr(pool, '_launch', fake_launch)
+    return pool, launched
+
+
+def test_crawl_browsers_do_not_get_the_scraper_flags():
+    assert '--disable-web-security' in _launch_args(SCRAPER_LEASE)
+    assert '--disable-web-security' not in _launch_args(CRAWL_LEASE)
+    assert '--disable-blink-features=AutomationControlled' not in _launch_args(CRAWL_LEASE)
+
+
+def test_leases_only_get_browsers_of_their_kind(monkeypatch):
+    pool, launched = pool_with_fake_launches(monkeypatch, size=1, max_browsers=3)
+    pool._browsers = [_WarmBrowser(1, FakeWarmBrowser(), '', CRAWL_LEASE)]
+
+    scraper = asyncio.run(pool._checkout_in_pool(SCRAPER_LEASE))
+    crawl = asyncio.run(pool._checkout_in_pool(CRAWL_LEASE))
+    assert launched == [SCRAPER_LEASE]
+    assert (scraper.kind, crawl.id) == (SCRAPER_LEASE, 1)
+    assert pool._warm_kinds == {CRAWL_LEASE, SCRAPER_LEASE}
+
+
+def test_an_idle_browser_of_the_other_kind_makes_room_at_the_cap(monkeypatch):
+    pool, launched = pool_with_fake_launches(monkeypatch, size=2, max_browsers=2)
+    idle, busy = _WarmBrowser(1, FakeWarmBrowser(), '', CRAWL_LEASE), _WarmBrowser(2, FakeWarmBrowser(), '', CRAWL_LEASE)
+    busy.active_leases = 1
+    pool._browsers = [idle, busy]
+
+    scraper = asyncio.run(pool._checkout_in_pool(SCRAPER_LEASE))
+    assert launched == [SCRAPER_LEASE]
+    assert idle.browser.closed and not busy.browser.closed
+    assert pool._browsers == [busy, scraper]
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import analyzer.config as config
+from analyzer.checkpoint import CrawlCheckpoint
+
+
+def test_save_and_load_round_trip(tmp_path):
+    checkpoint = CrawlCheckpoint('https://example.com', directory=str(tmp_path))
+    checkpoint.save({'visited_urls': {'https://example.com/a'}, 'analysis': {'crawled_urls': ['https://example.com/a']}})
+
+    state = CrawlCheckpoint('https://example.com', directory=str(tmp_path)).load()
+    assert state == {'visited_urls': ['https://example.com/a'], 'analysis': {'crawled_urls': ['https://example.com/a']}}
+    assert CrawlCheckpoint('https://other.org', directory=str(tmp_path)).load() is None
+
+
+def test_save_soon_writes_a_snapshot_off_the_event_loop(tmp_path, monkeypatch):
+    writer_threads = []
+    original_write = CrawlCheckpoint._write
+
+    def recording_write(self, payload):
+        writer_threads.append(threading.current_thread())
+        original_write(self, payload)
+
+    monkeypatch.setattr(CrawlCheckpoint, '_write', recording_write)
+
+    async def crawl():
+        checkpoint = CrawlCheckpoint('https://example.com', directory=str(tmp_path))
+        analysis = {'crawled_urls': ['https://example.com/a']}
+        checkpoint.save_soon({'analysis': analysis})
+        # The crawl keeps going while the write is pending; the checkpoint has the state as of save_soon.
+        analysis['crawled_urls'].append('https://example.com/b')
+        await checkpoint.flush()
+        return checkpoint.load()
+
+    state = asyncio.run(crawl())
+    assert state == {'analysis': {'crawled_urls': ['https://example.com/a']}}
+    assert writer_threads and threading.main_thread() not in writer_threads
+
+
+def test_page_done_saves_every_n_pages_and_coalesces_pending_states(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'CHECKPOINT_EVERY_PAGES', 2)
+    written = []
+    monkeypatch.setattr(CrawlCheckpoint, '_write', lambda self, payload: written.append(payload['state']['pages']))
+
+    async def crawl():
+        checkpoint = CrawlCheckpoint('https://example.com', directory=str(tmp_path))
+        for pages in range(1, 7):
+            checkpoint.page_done(lambda: {'pages': pages})
+        await checkpoint.flush()
+
+    asyncio.run(crawl())
+    # Saves were due after pages 2, 4 and 6, all before the writer got to run: only the newest is written.
+    assert written == [6]
+
+
+def test_discard_removes_the_file_after_pending_writes(tmp_path):
+    async def crawl():
+        checkpoint = CrawlCheckpoint('https://example.com', directory=str(tmp_path))
+        checkpoint.save_soon({'pages': 1})
+        checkpoint.save_soon({'pages': 2})
+        await checkpoint.discard()
+        await asyncio.sleep(0.05)
+        return checkpoint
+
+    checkpoint = asyncio.run(crawl())
+    assert checkpoint.load() is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,45 @@
+from analyzer.crawl_shards import ShardedPageFetcher
+
+
+class FakeProcess:
+    """A shard that never exits on its own."""
+
+    name = 'fake-shard'
+
+    def __init__(self):
+        self.alive = True
+        self.joins = []
+
+    def join(self, timeout=None):
+        self.joins.append(timeout)
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.alive = False
+
+
+def fetcher_with_shards(count):
+    fetcher = ShardedPageFetcher(num_shards=count, lanes_per_shard=2, settings={})
+    fetcher._processes = [FakeProcess() for _ in range(count)]
+    return fetcher
+
+
+def test_close_lets_shards_drain_before_terminating_them():
+    fetcher = fetcher_with_shards(2)
+    fetcher.close(timeout=0.01)
+
+    for process in fetcher._processes:
+        assert process.joins == [0.01, 5]
+        assert not process.alive
+
+
+def test_terminating_close_does_not_wait_for_queued_work():
+    fetcher = fetcher_with_shards(2)
+    fetcher.close(timeout=15.0, terminate=True)
+
+    for process in fetcher._processes:
+        assert process.joins == [5] # only the short wait after terminate()
+        assert not process.alive
+    assert fetcher._closing
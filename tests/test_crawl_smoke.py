@@ -0,0 +1,246 @@
+import asyncio
+
+import pytest
+
+import analyzer.config as config
+import analyzer.seomainfunctions as seomainfunctions
+from analyzer.browser_governor import browser_governor
+from analyzer.browser_pool import BrowserLease
+from analyzer.cancellation import CancelHandle
+from analyzer.crawl_events import CrawlProgress, PageResult, PHASE_CRAWLING
+from analyzer.http_fetch import MODE_BROWSER, MODE_HTTP, HttpFirstFetcher
+from analyzer.seo import SEOAnalyzer
+
+SITE = 'https://example.com'
+# Every page links to two deeper pages, so the crawl only gets past the start page's own
+# links if record_page_result queues the links of crawled pages.
+LINKS = {
+    f'{SITE}/': [f'{SITE}/a', f'{SITE}/b'],
+    f'{SITE}/a': [f'{SITE}/a1', f'{SITE}/a2'],
+    f'{SITE}/b': [f'{SITE}/b1', f'{SITE}/b2'],
+    f'{SITE}/a1': [f'{SITE}/c1'],
+}
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def on(self, event, handler):
+        pass
+
+    def remove_listener(self, event, handler):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url, **kwargs):
+        return None
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.page_handlers = []
+
+    def on(self, event, handler):
+        if event == 'page':
+            self.page_handlers.append(handler)
+
+    async def new_page(self):
+        page = FakePage()
+        for handler in self.page_handlers:
+            handler(page)
+        return page
+
+    async def route(self, pattern, handler):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    async def new_context(self, **kwargs):
+        return FakeContext()
+
+    def is_connected(self):
+        return True
+
+
+class FakeResponse:
+    status = 404
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def get(self, url, **kwargs):
+        return FakeResponse()
+
+
+class FakeSaver:
+    def __init__(self):
+        self.saved = []
+
+    async def save_reports(self, analysis):
+        self.saved.append(analysis)
+
+
+async def fake_process_page(analyzer_instance, page, url_to_crawl, *args, **kwargs):
+    result = seomainfunctions._empty_page_result(url_to_crawl)
+    result.update({
+        'cleaned_text': f'Unique content of {url_to_crawl} ' * 20,
+        'title': url_to_crawl,
+        'status_code': 200,
+        'new_links': set(LINKS.get(url_to_crawl, [])),
+        'navigation_seconds': 0.01,
+        'ttfb_seconds': 0.01,
+    })
+    result['cleaned_content_length'] = len(result['cleaned_text'])
+    return result
+
+
+async def fake_new_crawl_page(context):
+    return await context.new_page()
+
+
+async def fake_llm_analysis_start(page_data):
+    return {'url': page_data['url'], 'header': [], 'footer': [], 'needless_info': []}
+
+
+async def no_sitemaps(url, session):
+    return []
+
+
+@pytest.fixture
+def offline_crawl(monkeypatch):
+    monkeypatch.setattr(seomainfunctions, '_process_page_standalone', fake_process_page)
+    monkeypatch.setattr(seomainfunctions, '_new_crawl_page', fake_new_crawl_page)
+    monkeypatch.setattr(seomainfunctions, 'llm_analysis_start', fake_llm_analysis_start)
+    monkeypatch.setattr(seomainfunctions, 'discover_sitemap_urls', no_sitemaps)
+    monkeypatch.setattr(seomainfunctions.aiohttp, 'ClientSession', FakeSession)
+    for name, value in {
+        'MAX_PAGES_TO_ANALYZE': 6, 'CHECKPOINT_ENABLED': False, 'HTTP_FIRST_ENABLED': False,
+        'JS_MODE_DETECTION': False, 'PG_FRONTIER_ENABLED': False, 'CRAWL_SHARDS': 0,
+        'NOVELTY_STOP_ENABLED': False, 'CLUSTER_SAMPLING_ENABLED': False, 'REQUEST_BLOCKING_MODE': 'cdp',
+    }.items():
+        monkeypatch.setattr(config, name, value)
+
+
+def run_analysis(on_event=None, cancel_handle=None, shared_browser=None):
+    analyzer_instance = SEOAnalyzer()
+    analyzer_instance.saver = FakeSaver()
+    analysis = asyncio.run(seomainfunctions.analyze_url_standalone(
+        analyzer_instance, f'{SITE}/', concurrency=2, shared_browser=shared_browser or FakeBrowser(),
+        cancel_handle=cancel_handle, on_event=on_event
+    ))
+    # Cancelled analyses are saved too, with their 'cancelled' status (the saver never lets them replace a report).
+    assert analyzer_instance.saver.saved == [analysis]
+    # Pooled pages hand their page slots back when the crawl ends.
+    assert browser_governor.stats()['pages_in_use'] == 0
+    return analysis
+
+
+def test_crawl_follows_links_of_crawled_pages(offline_crawl):
+    analysis = run_analysis()
+
+    # Start page plus five pages, two of which are only linked from sub-pages.
+    assert analysis['crawled_internal_pages_count'] == 6
+    assert {f'{SITE}/a1', f'{SITE}/b1'} & set(analysis['page_statistics'])
+    assert analysis['crawl_stop_reason'] == 'max_pages'
+    assert all(stats['status_code'] == 200 for stats in analysis['page_statistics'].values())
+
+
+def test_pages_on_a_shared_lease_count_toward_recycling(offline_crawl):
+    # Batch mode hands each site the caller's lease, so its pages reach the pool's page count.
+    lease = BrowserLease(FakeBrowser(), warm=True)
+    run_analysis(shared_browser=lease)
+    assert lease.pages_opened > 0
+
+
+def test_crawl_streams_page_results_and_progress(offline_crawl):
+    events = []
+    analysis = run_analysis(on_event=events.append)
+
+    page_urls = {event.url for event in events if isinstance(event, PageResult)}
+    assert page_urls == set(analysis['crawled_urls'])
+    assert any(isinstance(event, CrawlProgress) and event.phase == PHASE_CRAWLING for event in events)
+
+
+def test_cancelled_crawl_is_saved_as_cancelled(offline_crawl):
+    cancel_handle = CancelHandle('smoke test')
+
+    def cancel_after_two_pages(event):
+        if isinstance(event, PageResult) and event.url != f'{SITE}/':
+            cancel_handle.cancel('user cancelled')
+
+    analysis = run_analysis(on_event=cancel_after_two_pages, cancel_handle=cancel_handle)
+
+    assert analysis['status'] == 'cancelled'
+    assert analysis['cancel_reason'] == 'user cancelled'
+    assert analysis['crawled_internal_pages_count'] < 6
+
+
+def test_checkpoint_is_kept_only_for_an_unfinished_crawl(offline_crawl, monkeypatch, tmp_path):
+    monkeypatch.setattr(config, 'CHECKPOINT_ENABLED', True)
+    monkeypatch.setattr(config, 'CHECKPOINT_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'CHECKPOINT_EVERY_PAGES', 1)
+
+    run_analysis()
+    assert list(tmp_path.iterdir()) == []
+
+    cancel_handle = CancelHandle('smoke test')
+
+    def cancel_after_two_pages(event):
+        if isinstance(event, PageResult) and event.url != f'{SITE}/':
+            cancel_handle.cancel('user cancelled')
+
+    analysis = run_analysis(on_event=cancel_after_two_pages, cancel_handle=cancel_handle)
+    assert analysis['status'] == 'cancelled'
+    assert [path.suffix for path in tmp_path.iterdir()] == ['.json']
+
+
+@pytest.mark.parametrize('site_mode, probes_js', [(MODE_HTTP, False), (MODE_BROWSER, True)])
+def test_javascript_probe_only_runs_for_browser_crawls(offline_crawl, monkeypatch, tmp_path, site_mode, probes_js):
+    monkeypatch.setattr(config, 'HTTP_FIRST_ENABLED', True)
+    monkeypatch.setattr(config, 'JS_MODE_DETECTION', True)
+    monkeypatch.setattr(config, 'CHECKPOINT_DIR', str(tmp_path))
+    js_off_renders = []
+
+    async def probe_site(self, start_url, rendered_cleaned_text):
+        self.site_mode = site_mode
+        return {'text_ratio': 1.0 if site_mode == MODE_HTTP else 0.1}
+
+    async def fetch_through_browser(self, url_to_fetch, page_timeout=None):
+        return await self.browser_fetch(url_to_fetch, page_timeout=page_timeout)
+
+    async def render_without_javascript(analyzer_instance, browser, url_to_probe, page_budget):
+        js_off_renders.append(url_to_probe)
+        return await fake_process_page(analyzer_instance, None, url_to_probe)
+
+    monkeypatch.setattr(HttpFirstFetcher, 'probe_site', probe_site)
+    monkeypatch.setattr(HttpFirstFetcher, 'fetch', fetch_through_browser)
+    monkeypatch.setattr(seomainfunctions, '_render_without_javascript', render_without_javascript)
+
+    analysis = run_analysis()
+
+    assert js_off_renders == ([f'{SITE}/'] if probes_js else [])
+    assert analysis['javascript_mode']['source'] == ('probe' if probes_js else 'default')
+    assert analysis['fetch_modes']['site_mode'] == site_mode
@@ -0,0 +1,95 @@
+from analyzer.dom_snapshot import FORMAT_CDP, FORMAT_HTML, load_snapshot, parse_snapshot, save_snapshot
+
+URL = 'https://example.com/'
+
+
+def cdp_snapshot(nodes):
+    """Builds a DOMSnapshot.captureSnapshot payload from (parent, type, name, value, attributes, rendered) rows."""
+    strings = []
+
+    def intern(value):
+        if value is None:
+            return -1
+        if value not in strings:
+            strings.append(value)
+        return strings.index(value)
+
+    document = {
+        'baseURL': intern(URL),
+        'nodes': {'parentIndex': [], 'nodeType': [], 'nodeName': [], 'nodeValue': [], 'attributes': []},
+        'layout': {'nodeIndex': []},
+    }
+    for index, (parent, node_type, name, value, attributes, rendered) in enumerate(nodes):
+        document['nodes']['parentIndex'].append(parent)
+        document['nodes']['nodeType'].append(node_type)
+        document['nodes']['nodeName'].append(intern(name))
+        document['nodes']['nodeValue'].append(intern(value))
+        document['nodes']['attributes'].append([intern(item) for pair in attributes.items() for item in pair])
+        if rendered:
+            document['layout']['nodeIndex'].append(index)
+    return {'url': URL, 'format': FORMAT_CDP, 'cdp': {'documents': [document], 'strings': strings}}
+
+
+def element(parent, name, **attributes):
+    return (parent, 1, name.upper(), None, attributes, True)
+
+
+def text(parent, value, rendered=True):
+    return (parent, 3, '#text', value, {}, rendered)
+
+
+PAGE_NODES = [
+    (-1, 9, '#document', None, {}, True),  # 0
+    element(0, 'html', lang='en'),  # 1
+    element(1, 'head'),  # 2
+    element(2, 'title'),  # 3
+    text(3, '  My   Page ', rendered=False),  # 4
+    element(1, 'body'),  # 5
+    element(5, 'nav'),  # 6
+    element(6, 'a', href='/about'),  # 7
+    text(7, 'About'),  # 8
+    element(5, 'div', style='display:none'),  # 9
+    text(9, 'Hidden', rendered=False),  # 10
+    element(5, 'h1'),  # 11
+    text(11, 'Welcome'),  # 12
+    element(11, '::before'),  # 13
+    element(5, 'footer'),  # 14
+    element(14, 'a', href='/contact'),  # 15
+    text(15, 'Contact'),  # 16
+]
+
+
+def test_parse_cdp_snapshot_rebuilds_the_page_structure():
+    parser = parse_snapshot(cdp_snapshot(PAGE_NODES))
+
+    assert parser.title == 'My Page'
+    assert parser.lang == 'en'
+    assert parser.headings['h1'] == 1
+    assert parser.links == {
+        'https://example.com/about': {'nav'},
+        'https://example.com/contact': {'footer'},
+    }
+    # Text nodes without a layout box are not rendered, except inside <title> and <script>.
+    assert 'Welcome' in parser.text
+    assert 'Hidden' not in parser.text
+
+
+def test_html_snapshot_falls_back_to_the_html_parser():
+    snapshot = {
+        'url': URL,
+        'format': FORMAT_HTML,
+        'html': '<html lang="tr"><title>Ana Sayfa</title><body><a href="/urun/1">Urun</a></body></html>',
+    }
+    parser = parse_snapshot(snapshot)
+    assert parser.title == 'Ana Sayfa'
+    assert parser.lang == 'tr'
+    assert parser.links == {'https://example.com/urun/1': {'content'}}
+
+
+def test_saved_snapshot_round_trips(tmp_path):
+    snapshot = cdp_snapshot(PAGE_NODES)
+    path = save_snapshot(URL, snapshot, directory=str(tmp_path))
+
+    loaded = load_snapshot(path)
+    assert loaded['page_url'] == URL
+    assert parse_snapshot(loaded).links == parse_snapshot(snapshot).links
@@ -0,0 +1,83 @@
+import time
+
+from analyzer.frontier import DONE, FAILED, IN_FLIGHT, QUEUED, RETRY_WAIT, CrawlFrontier, PatternRule, score_url
+
+RULES = [PatternRule(('/product',), 1), PatternRule(('/blog',), 3)]
+
+
+def drain(frontier):
+    urls = []
+    while True:
+        url = frontier.pop()
+        if url is None:
+            return urls
+        urls.append(url)
+
+
+def test_score_url_uses_the_first_matching_rule():
+    assert score_url('https://example.com/Products/1', RULES, default_class=5) == 1
+    assert score_url('https://example.com/blog/post', RULES, default_class=5) == 3
+    assert score_url('https://example.com/about', RULES, default_class=5) == 5
+
+
+def test_pop_order_is_priority_then_depth_then_insertion():
+    frontier = CrawlFrontier(RULES + [lambda url: 2])
+    frontier.add('https://example.com/blog/deep', depth=1)
+    frontier.add('https://example.com/about', depth=2)
+    frontier.add('https://example.com/contact', depth=1)
+    frontier.add('https://example.com/product/1', depth=3)
+
+    assert drain(frontier) == [
+        'https://example.com/product/1',
+        'https://example.com/contact',
+        'https://example.com/about',
+        'https://example.com/blog/deep',
+    ]
+
+
+def test_urls_are_added_once_and_tracked_by_state():
+    frontier = CrawlFrontier(RULES)
+    assert frontier.add('https://example.com/a')
+    assert not frontier.add('https://example.com/a')
+    frontier.mark_seen('https://example.com/')
+    assert not frontier.add('https://example.com/')
+
+    url = frontier.pop()
+    assert frontier.state(url) == IN_FLIGHT
+    assert frontier.attempts(url) == 1
+    frontier.mark_done(url)
+    assert frontier.counts()[DONE] == 2
+    assert len(frontier) == 0 and not frontier
+
+
+def test_retries_wait_for_their_backoff():
+    frontier = CrawlFrontier(RULES)
+    frontier.add('https://example.com/flaky')
+    url = frontier.pop()
+    frontier.schedule_retry(url, 0.05)
+
+    assert frontier.state(url) == RETRY_WAIT
+    assert len(frontier) == 1
+    assert frontier.pop() is None
+    assert 0 < frontier.next_retry_in() <= 0.05
+
+    time.sleep(0.06)
+    assert frontier.pop() == url
+    assert frontier.attempts(url) == 2
+
+
+def test_snapshot_round_trip_requeues_unfinished_pages():
+    frontier = CrawlFrontier(RULES)
+    for path in ('a', 'b', 'c', 'd'):
+        frontier.add(f'https://example.com/{path}', depth=1)
+    done, in_flight, failed = frontier.pop(), frontier.pop(), frontier.pop()
+    frontier.mark_done(done)
+    frontier.mark_failed(failed)
+
+    restored = CrawlFrontier.from_snapshot(frontier.snapshot(), RULES)
+
+    assert restored.state(done) == DONE
+    assert restored.state(failed) == FAILED
+    assert restored.state(in_flight) == QUEUED
+    assert set(drain(restored)) == {in_flight, 'https://example.com/d'}
+    assert restored.depth_of('https://example.com/d') == 1
@@ -0,0 +1,128 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import analyzer.config as config
+from analyzer.http_fetch import HttpFirstFetcher, client_rendered_reason, filter_internal_links, parse_html
+from analyzer.link_extractor import SOURCE_CONTENT, SOURCE_FOOTER, SOURCE_NAV
+
+PARAGRAPH = '<p>' + 'Server rendered paragraph text. ' * 30 + '</p>\n'
+# About 480 KB, sent in small slow chunks so the client never has the whole body buffered at once.
+LARGE_PAGE = (
+    '<html><head><title>Large page</title></head><body>'
+    + PARAGRAPH * 500
+    + '<a href="/last-link">Last</a></body></html>'
+).encode()
+
+
+async def stream_large_page(request):
+    response = web.StreamResponse(headers={'Content-Type': 'text/html; charset=utf-8'})
+    await response.prepare(request)
+    for start in range(0, len(LARGE_PAGE), 16 * 1024):
+        await response.write(LARGE_PAGE[start:start + 16 * 1024])
+        await asyncio.sleep(0.001)
+    await response.write_eof()
+    return response
+
+
+async def fetch_large_page():
+    app = web.Application()
+    app.router.add_get('/large', stream_large_page)
+    async with TestServer(app) as server:
+        fetcher = HttpFirstFetcher(analyzer_instance=None, browser_fetch=None)
+        try:
+            return await fetcher.fetch_html(str(server.make_url('/large')))
+        finally:
+            await fetcher.close()
+
+
+def test_fetch_html_reads_streamed_body_to_the_end():
+    outcome, html = asyncio.run(fetch_large_page())
+
+    assert outcome['status_code'] == 200
+    assert outcome['transfer_bytes'] == len(LARGE_PAGE)
+    assert outcome['truncated'] is False
+    assert html.endswith('<a href="/last-link">Last</a></body></html>')
+
+
+def test_fetch_html_truncates_only_past_the_cap(monkeypatch):
+    monkeypatch.setattr(config, 'HTTP_FIRST_MAX_BYTES', 100_000)
+    outcome, html = asyncio.run(fetch_large_page())
+
+    assert outcome['truncated'] is True
+    assert outcome['transfer_bytes'] == 100_000
+    assert len(html) == 100_000
+
+    monkeypatch.setattr(config, 'HTTP_FIRST_MAX_BYTES', len(LARGE_PAGE))
+    outcome, _ = asyncio.run(fetch_large_page())
+    assert outcome['truncated'] is False
+
+
+def test_parse_html_tags_links_by_region():
+    parsed = parse_html(
+        '<html lang="en"><head><title> Home \n page </title>'
+        '<meta name="viewport" content="width=device-width"><link rel="canonical" href="/home"></head>'
+        '<body><nav><a href="/about">About</a></nav>'
+        '<h1>Welcome</h1><p>Body text <a href="https://www.example.com/post">post</a></p>'
+        '<img src="a.png"><img src="b.png" alt="b">'
+        '<footer class="site-footer"><a href="/contact">Contact</a></footer>'
+        '<a href="https://other.org/x">external</a></body></html>',
+        'https://example.com/',
+    )
+
+    assert parsed.title == 'Home page'
+    assert parsed.lang == 'en'
+    assert parsed.has_mobile_viewport
+    assert parsed.canonical == 'https://example.com/home'
+    assert parsed.headings['h1'] == 1
+    assert (parsed.images_count, parsed.missing_alt_tags_count) == (2, 1)
+    assert 'Welcome' in parsed.text and 'Body text' in parsed.text
+
+    internal = filter_internal_links(parsed.links, 'example.com', [])
+    assert SOURCE_NAV in internal['https://example.com/about']
+    assert SOURCE_CONTENT in internal['https://www.example.com/post']
+    assert SOURCE_FOOTER in internal['https://example.com/contact']
+    assert 'https://other.org/x' not in internal
+
+
+def test_client_rendered_reason():
+    spa_shell = parse_html('<html><body><div id="root"></div><script src="/app.js"></script></body></html>', 'https://example.com/')
+    assert client_rendered_reason(spa_shell) == 'spa_shell'
+
+    server_rendered = parse_html('<html><body>' + PARAGRAPH + '<script src="/app.js"></script></body></html>', 'https://example.com/')
+    assert client_rendered_reason(server_rendered) is None
+
+
+async def fetch_slow_page(page_timeout):
+    async def slow_page(request):
+        await asyncio.sleep(1.0)
+        return web.Response(text='<html><body>' + PARAGRAPH + '</body></html>', content_type='text/html')
+
+    browser_fetches = []
+
+    async def browser_fetch(url, page_timeout=None):
+        browser_fetches.append(page_timeout)
+        return {'url': url, 'status_code': 200}
+
+    app = web.Application()
+    app.router.add_get('/slow', slow_page)
+    async with TestServer(app) as server:
+        fetcher = HttpFirstFetcher(analyzer_instance=None, browser_fetch=browser_fetch)
+        try:
+            await fetcher.fetch(str(server.make_url('/slow')), page_timeout=page_timeout)
+        finally:
+            await fetcher.close()
+    return fetcher, browser_fetches
+
+
+def test_fetch_applies_the_page_timeout_capped_by_the_http_timeout(monkeypatch):
+    # The per-request timeout is shorter than the server's delay, so the page falls back to the browser.
+    fetcher, browser_fetches = asyncio.run(fetch_slow_page(page_timeout=100))
+    assert fetcher.fallback_reasons == {'http_timeout': 1}
+    assert browser_fetches == [100]
+
+    # A longer page timeout never extends HTTP_FIRST_TIMEOUT.
+    monkeypatch.setattr(config, 'HTTP_FIRST_TIMEOUT', 100)
+    fetcher, _ = asyncio.run(fetch_slow_page(page_timeout=60_000))
+    assert fetcher.fallback_reasons == {'http_timeout': 1}
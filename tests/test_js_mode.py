@@ -0,0 +1,56 @@
+import json
+import time
+
+import analyzer.config as config
+from analyzer.js_mode import JsModeCache, compare_js_results
+
+
+def page(text_length, links, url='https://example.com/'):
+    return {'url': url, 'cleaned_text': 'x' * text_length, 'new_links': {f'https://example.com/{n}' for n in range(links)}}
+
+
+def test_javascript_is_not_needed_when_text_and_links_hold_up(monkeypatch):
+    monkeypatch.setattr(config, 'JS_MODE_MAX_DIFFERENCE', 0.1)
+    assert compare_js_results(page(1000, 20), page(950, 19)) == {
+        'javascript_enabled': False, 'text_ratio': 0.95, 'link_ratio': 0.95,
+    }
+
+
+def test_javascript_is_needed_when_text_or_links_are_lost(monkeypatch):
+    monkeypatch.setattr(config, 'JS_MODE_MAX_DIFFERENCE', 0.1)
+    assert compare_js_results(page(1000, 20), page(500, 20))['javascript_enabled']
+    assert compare_js_results(page(1000, 20), page(1000, 10))['javascript_enabled']
+    # A failed JS-off render never switches JavaScript off.
+    assert compare_js_results(page(0, 0), page(0, 0, url=None))['javascript_enabled']
+
+
+def test_empty_js_on_page_counts_as_unchanged():
+    decision = compare_js_results(page(0, 0), page(0, 0))
+    assert decision == {'javascript_enabled': False, 'text_ratio': 1.0, 'link_ratio': 1.0}
+
+
+def test_cache_round_trip_and_expiry(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'JS_MODE_CACHE_MAX_AGE_SECONDS', 60)
+    cache = JsModeCache(directory=str(tmp_path))
+    assert cache.get('example.com') is None
+
+    cache.put('example.com', {'javascript_enabled': False, 'text_ratio': 0.98})
+    entry = JsModeCache(directory=str(tmp_path)).get('example.com')
+    assert entry['javascript_enabled'] is False and entry['text_ratio'] == 0.98
+
+    stale = json.loads((tmp_path / 'js_modes.json').read_text())
+    stale['example.com']['decided_at'] = time.time() - 120
+    (tmp_path / 'js_modes.json').write_text(json.dumps(stale))
+    assert cache.get('example.com') is None
+
+    # Expired entries are dropped the next time the cache is written.
+    cache.put('other.org', {'javascript_enabled': True})
+    assert set(json.loads((tmp_path / 'js_modes.json').read_text())) == {'other.org'}
+
+
+def test_unreadable_cache_is_ignored(tmp_path):
+    (tmp_path / 'js_modes.json').write_text('{not json')
+    cache = JsModeCache(directory=str(tmp_path))
+    assert cache.get('example.com') is None
+    cache.put('example.com', {'javascript_enabled': True})
+    assert cache.get('example.com')['javascript_enabled'] is True
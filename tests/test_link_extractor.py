@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from playwright.async_api import async_playwright
+
+from analyzer.link_extractor import LINK_EXTRACTOR_SCRIPT, extract_page_links
+
+
+class FakePage:
+    """Returns a canned extractor payload and records what was evaluated."""
+
+    url = 'https://example.com/'
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = []
+
+    async def evaluate(self, script, params):
+        self.calls.append((script, params))
+        return self.payload
+
+
+def test_extract_page_links_runs_one_pass_and_maps_sources():
+    page = FakePage({
+        'links': [
+            ['https://example.com/about', ['nav', 'footer']],
+            ['https://example.com/blog/page/2', ['pagination']],
+        ],
+        'elementsVisited': 12,
+    })
+
+    links = asyncio.run(extract_page_links(page, 'example.com', ('/wp-admin', '.pdf')))
+
+    assert links == {
+        'https://example.com/about': ['nav', 'footer'],
+        'https://example.com/blog/page/2': ['pagination'],
+    }
+    assert len(page.calls) == 1
+    script, params = page.calls[0]
+    assert script is LINK_EXTRACTOR_SCRIPT
+    assert params == {'baseDomain': 'example.com', 'excludePatterns': ['/wp-admin', '.pdf']}
+
+
+def test_empty_payload_gives_no_links():
+    assert asyncio.run(extract_page_links(FakePage({}), 'example.com', [])) == {}
+
+
+PAGE_HTML = """
+<html><head>
+<script type="application/ld+json">{"@type": "Organization", "url": "https://example.com/about", "sameAs": ["https://twitter.com/example"]}</script>
+</head><body>
+<header><a href="/">Home</a><a href="/about">About</a></header>
+<nav class="menu"><a href="/products">Products</a></nav>
+<main>
+  <a href="post-1">Post 1</a>
+  <a href="https://www.example.com/post-2#comments">Post 2</a>
+  <a href="https://other.org/page">External</a>
+  <a href="mailto:hi@example.com">Mail</a>
+  <a href="/wp-admin/edit.php">Admin</a>
+  <a href="/about">About again</a>
+  <div data-href="/quick-view/1">Quick view</div>
+  <button onclick="window.location.href='/cart'">Cart</button>
+  <button onclick="javascript:void(0)">Nothing</button>
+  <div itemscope><meta itemprop="url" content="https://example.com/product/9"></div>
+  <div class="pagination"><a href="?page=2">2</a></div>
+  <a class="next" href="/blog/page/3">Next</a>
+</main>
+<footer><a href="/contact">Contact</a><a href="/about">About</a></footer>
+</body></html>
+"""
+
+
+def extract_from_html(html, exclude_patterns):
+    """Runs the extractor in headless Chromium on `html` served as https://example.com/blog/."""
+    async def scenario():
+        async with async_playwright() as p:
+            try:
+                browser = await p.chromium.launch(headless=True)
+            except Exception as e:
+                pytest.skip(f"Chromium is not available: {e}")
+            try:
+                page = await browser.new_page()
+                await page.route('**/*', lambda route: route.fulfill(status=200, content_type='text/html', body=html))
+                await page.goto('https://example.com/blog/')
+                return await extract_page_links(page, 'example.com', exclude_patterns)
+            finally:
+                await browser.close()
+
+    return asyncio.run(scenario())
+
+
+def test_single_pass_walk_tags_filters_and_deduplicates_links():
+    links = extract_from_html(PAGE_HTML, ['/wp-admin'])
+
+    assert {href: set(sources) for href, sources in links.items()} == {
+        'https://example.com/': {'nav'},
+        'https://example.com/about': {'nav', 'content', 'footer', 'structured-data'},
+        'https://example.com/products': {'nav'},
+        'https://example.com/blog/post-1': {'content'},
+        'https://www.example.com/post-2#comments': {'content'},
+        'https://example.com/quick-view/1': {'interactive'},
+        'https://example.com/cart': {'interactive'},
+        'https://example.com/product/9': {'structured-data'},
+        'https://example.com/blog/?page=2': {'pagination'},
+        'https://example.com/blog/page/3': {'pagination'},
+        'https://example.com/contact': {'footer'},
+    }
@@ -0,0 +1,43 @@
+from analyzer.novelty import NoveltyTracker, title_pattern
+
+
+def test_title_pattern_keeps_the_template():
+    assert title_pattern('Red Shoe 42 | Shop') == '* | shop'
+    assert title_pattern('Blue Bag - Shop') == '* | shop'
+    assert title_pattern('Page 12') == 'page #'
+    assert title_pattern(None) == ''
+
+
+def test_gain_drops_for_repeated_pages():
+    tracker = NoveltyTracker(window=2, threshold=0.1, min_pages=1)
+    first = tracker.observe('alpha beta gamma', 'Alpha | Shop', ['https://example.com/a'])
+    repeat = tracker.observe('alpha beta gamma', 'Beta | Shop', ['https://example.com/a'])
+    assert first == 1.0
+    assert repeat == 0.0
+
+    half_new = tracker.observe('alpha delta', 'Contact us', ['https://example.com/a', 'https://example.com/b'])
+    assert half_new == (0.5 + 0.5 + 1.0) / 3
+
+
+def test_should_stop_after_a_window_of_low_gain():
+    tracker = NoveltyTracker(window=3, threshold=0.2, min_pages=4)
+    tracker.observe('unique words here', 'Home', ['https://example.com/'])
+    for _ in range(2):
+        tracker.observe('unique words here', 'Home', ['https://example.com/'])
+    # The window is full of zero gain but fewer than min_pages pages were seen.
+    assert not tracker.should_stop()
+
+    tracker.observe('unique words here', 'Home', ['https://example.com/'])
+    assert tracker.should_stop()
+    stats = tracker.stats()
+    assert stats['pages_observed'] == 4
+    assert stats['window_gain'] == 0.0
+
+    tracker.observe('completely different vocabulary', 'Blog', ['https://example.com/blog'])
+    assert not tracker.should_stop()
+
+
+def test_empty_page_has_no_gain():
+    tracker = NoveltyTracker(window=1, threshold=0.5, min_pages=0)
+    assert tracker.observe(None, None) == 0.0
+    assert tracker.should_stop()
@@ -0,0 +1,116 @@
+import asyncio
+
+from analyzer.page_budget import PageBudget
+from analyzer.page_pool import PagePool
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.url = 'about:blank'
+
+    def on(self, event, handler):
+        pass
+
+    def remove_listener(self, event, handler):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+def budgeted_pool(budget, **kwargs):
+    return PagePool(FakeContext(), slot=lambda: budget.slot('example.com'), **kwargs)
+
+
+def test_pages_are_reused_between_leases():
+    async def scenario():
+        pool = PagePool(FakeContext())
+        async with pool.page() as first:
+            pass
+        async with pool.page() as second:
+            pass
+        return first, second, pool.stats()
+
+    first, second, stats = asyncio.run(scenario())
+    assert first is second
+    assert (stats['created'], stats['reused'], stats['idle']) == (1, 1, 1)
+
+
+def test_idle_pages_hold_their_slot_until_the_pool_closes():
+    async def scenario():
+        budget = PageBudget(max_open_pages=3)
+        pool = budgeted_pool(budget)
+        async def lease():
+            async with pool.page():
+                await asyncio.sleep(0.01)
+        await asyncio.gather(lease(), lease())
+        idle_open_pages = budget.open_pages
+        await pool.close()
+        return idle_open_pages, budget.open_pages, pool
+
+    idle_open_pages, open_after_close, pool = asyncio.run(scenario())
+    assert idle_open_pages == 2
+    assert open_after_close == 0
+    assert all(page.closed for page in pool.context.pages)
+
+
+def test_lease_waiting_for_a_slot_gets_the_slot_of_a_returned_page():
+    async def scenario():
+        budget = PageBudget(max_open_pages=1)
+        pool = budgeted_pool(budget, max_idle=4)
+        first_leased = asyncio.Event()
+
+        async def first():
+            async with pool.page():
+                first_leased.set()
+                await asyncio.sleep(0.05)
+
+        async def second():
+            await first_leased.wait()
+            async with pool.page() as page:
+                return page
+
+        _, second_page = await asyncio.wait_for(asyncio.gather(first(), second()), timeout=2)
+        peak = budget.peak_open_pages
+        await pool.close()
+        return pool, second_page, peak
+
+    pool, second_page, peak = asyncio.run(scenario())
+    # The first page was closed rather than pooled, so the budget never had two pages open.
+    assert peak == 1
+    assert pool.context.pages[0].closed
+    assert second_page is pool.context.pages[1]
+
+
+def test_pages_are_replaced_after_a_failed_lease():
+    async def scenario():
+        budget = PageBudget(max_open_pages=2)
+        pool = budgeted_pool(budget)
+        try:
+            async with pool.page():
+                raise RuntimeError('navigation broke the page')
+        except RuntimeError:
+            pass
+        return pool, budget.open_pages
+
+    pool, open_pages = asyncio.run(scenario())
+    assert pool.context.pages[0].closed
+    assert open_pages == 0
+    assert pool.stats()['idle'] == 0
@@ -0,0 +1,179 @@
+import asyncio
+import os
+
+import pytest
+
+import analyzer.config as config
+import analyzer.pg_frontier as pg_frontier_module
+from analyzer.pg_frontier import PgFrontier, connect, crawl_job
+
+# A scratch database: the tests create the frontier tables and delete the jobs they create.
+TEST_DSN = os.getenv('PG_FRONTIER_TEST_DSN')
+START_URL = 'https://pg-frontier-test.example.com/'
+
+pytestmark = pytest.mark.skipif(not TEST_DSN, reason="set PG_FRONTIER_TEST_DSN to a scratch Postgres database")
+
+
+def new_worker(worker_id):
+    if pg_frontier_module.psycopg is None:
+        pytest.skip("psycopg (or psycopg2) is not installed")
+    return PgFrontier(connect(TEST_DSN), worker_id=worker_id)
+
+
+@pytest.fixture
+def frontier(monkeypatch):
+    monkeypatch.setattr(config, 'FRONTIER_PRIORITY_RULES', [{'patterns': ['/product'], 'priority': 1}])
+    monkeypatch.setattr(config, 'FRONTIER_DEFAULT_PRIORITY', 2)
+    worker = new_worker('test-worker-a')
+    asyncio.run(worker.ensure_schema())
+    yield worker
+    asyncio.run(worker._run("DELETE FROM crawl_jobs WHERE start_url = %s", (START_URL,)))
+    worker.close()
+
+
+@pytest.fixture
+def second_worker(frontier):
+    worker = new_worker('test-worker-b')
+    yield worker
+    worker.close()
+
+
+def test_job_round_trip(frontier):
+    async def scenario():
+        job_id = await frontier.create_job(START_URL, {'max_pages': 5})
+        job = await frontier.job(job_id)
+        await frontier.finish_job(job_id)
+        return job_id, job, await frontier.job(job_id)
+
+    job_id, job, finished = asyncio.run(scenario())
+    assert job == {'job_id': job_id, 'start_url': START_URL, 'settings': {'max_pages': 5}, 'status': 'running'}
+    assert finished['status'] == 'done'
+
+
+def test_urls_are_queued_once_and_claimed_by_priority(frontier):
+    async def scenario():
+        job_id = await frontier.create_job(START_URL, {})
+        await frontier.add_urls(job_id, [(f'{START_URL}about', 1), (f'{START_URL}product/1', 2), (f'{START_URL}deep', 3)])
+        # The already queued /about is skipped by ON CONFLICT; max_urls=4 leaves room for one new row.
+        await frontier.add_urls(job_id, [(f'{START_URL}about', 1), (f'{START_URL}a', 1), (f'{START_URL}b', 1)], max_urls=4)
+        claims = [await frontier.claim(job_id) for _ in range(4)]
+        return claims, await frontier.counts(job_id)
+
+    claims, counts = asyncio.run(scenario())
+    assert claims == [
+        (f'{START_URL}product/1', 2, 1),
+        (f'{START_URL}about', 1, 1),
+        (f'{START_URL}deep', 3, 1),
+        None,
+    ]
+    assert counts == {'in_flight': 3}
+
+
+def test_concurrent_workers_never_claim_the_same_url(frontier, second_worker):
+    async def scenario():
+        job_id = await frontier.create_job(START_URL, {})
+        await frontier.add_urls(job_id, [(f'{START_URL}page/{n}', 1) for n in range(10)])
+        claims = await asyncio.gather(*(worker.claim(job_id) for _ in range(6) for worker in (frontier, second_worker)))
+        return [claim for claim in claims if claim]
+
+    claims = asyncio.run(scenario())
+    urls = [url for url, _, _ in claims]
+    assert len(urls) == 10
+    assert len(set(urls)) == 10
+
+
+def test_expired_leases_are_claimed_again(frontier, second_worker, monkeypatch):
+    async def scenario():
+        job_id = await frontier.create_job(START_URL, {})
+        await frontier.add_urls(job_id, [(f'{START_URL}slow', 0)])
+        first = await frontier.claim(job_id)
+        before_expiry = await second_worker.claim(job_id)
+        monkeypatch.setattr(config, 'PG_FRONTIER_LEASE_SECONDS', 0)
+        await asyncio.sleep(0.05)
+        return first, before_expiry, await second_worker.claim(job_id)
+
+    first, before_expiry, reclaimed = asyncio.run(scenario())
+    assert first == (f'{START_URL}slow', 0, 1)
+    assert before_expiry is None
+    assert reclaimed == (f'{START_URL}slow', 0, 2)
+
+
+
+def test_a_worker_that_lost_its_lease_cannot_overwrite_the_new_owner(frontier, second_worker, monkeypatch):
+    async def scenario():
+        job_id = await frontier.create_job(START_URL, {})
+        await frontier.add_urls(job_id, [(f'{START_URL}slow', 0)])
+        url, _, attempts = await frontier.claim(job_id)
+        monkeypatch.setattr(config, 'PG_FRONTIER_LEASE_SECONDS', 0)
+        await asyncio.sleep(0.05)
+        await second_worker.claim(job_id)
+        stale_complete = await frontier.complete(job_id, url, {'url': url, 'title': 'stale'})
+        stale_fail = await frontier.fail(job_id, url, 'Timeout', retryable=False, attempts=attempts)
+        owner_complete = await second_worker.complete(job_id, url, {'url': url, 'title': 'fresh'})
+        late_fail = await second_worker.fail(job_id, url, 'Timeout', retryable=True, attempts=attempts)
+        return stale_complete, stale_fail, owner_complete, late_fail, await frontier.results(job_id)
+
+    stale_complete, stale_fail, owner_complete, late_fail, results = asyncio.run(scenario())
+    assert (stale_complete, stale_fail) == (False, False)
+    assert owner_complete
+    assert not late_fail # the URL is no longer in flight
+    assert results == [{'url': f'{START_URL}slow', 'title': 'fresh'}]
+
+def test_retryable_failures_back_off_then_fail_for_good(frontier, monkeypatch):
+    monkeypatch.setattr(config, 'RETRY_BASE_DELAY', 60.0)
+    monkeypatch.setattr(config, 'RETRY_MAX_DELAY', 60.0)
+
+    async def scenario():
+        job_id = await frontier.create_job(START_URL, {})
+        await frontier.add_urls(job_id, [(f'{START_URL}one', 0), (f'{START_URL}two', 0)])
+        flaky = await frontier.claim(job_id)
+        broken = await frontier.claim(job_id) # both rows tie on priority, depth and created_at
+        await frontier.fail(job_id, flaky[0], 'Timeout', retryable=True, attempts=flaky[2])
+        await frontier.fail(job_id, broken[0], 'HTTP 404', retryable=False, attempts=broken[2])
+        return broken[0], await frontier.claim(job_id), await frontier.counts(job_id), await frontier.failures(job_id)
+
+    broken_url, claimed, counts, failures = asyncio.run(scenario())
+    assert claimed is None # still inside its backoff
+    assert counts == {'queued': 1, 'failed': 1}
+    assert failures == {broken_url: {'reason': 'HTTP 404', 'attempts': 1}}
+
+
+def test_failed_statements_roll_back(frontier):
+    with pytest.raises(Exception):
+        asyncio.run(frontier._run('SELECT * FROM crawl_frontier_missing_table'))
+    # The aborted transaction was rolled back, so the connection keeps working.
+    job_id = asyncio.run(frontier.create_job(START_URL, {}))
+    assert asyncio.run(frontier.job(job_id))['status'] == 'running'
+
+
+def test_crawl_job_follows_links_until_max_pages(frontier, monkeypatch):
+    monkeypatch.setattr(config, 'PG_FRONTIER_POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(config, 'RETRY_BASE_DELAY', 0.0)
+    throttled_once = set()
+    fetch_attempts = {}
+    links = {
+        START_URL: [f'{START_URL}about', f'{START_URL}product/1'],
+        f'{START_URL}about': [f'{START_URL}team', f'{START_URL}jobs'],
+    }
+
+    async def fetch(url, attempts):
+        fetch_attempts.setdefault(url, []).append(attempts)
+        if url.endswith('/product/1') and url not in throttled_once:
+            throttled_once.add(url)
+            return {'url': url, 'status_code': 429}
+        return {'url': url, 'status_code': 200, 'title': url, 'new_links': links.get(url, [])}
+
+    async def scenario():
+        job_id = await frontier.create_job(START_URL, {'max_pages': 4})
+        await frontier.add_urls(job_id, [(START_URL, 0)])
+        finished = await crawl_job(frontier, job_id, fetch, lanes=2, settings={'max_pages': 4})
+        return finished, await frontier.results(job_id), await frontier.counts(job_id)
+
+    finished, results, counts = asyncio.run(scenario())
+    assert finished == 4
+    assert counts['done'] == 4
+    assert results[0]['url'] == START_URL
+    # The throttled page went back to the queue and was crawled on its second attempt.
+    assert f'{START_URL}product/1' in {page['url'] for page in results}
+    assert fetch_attempts[f'{START_URL}product/1'] == [1, 2]
+    assert all(page['title'] == page['url'] and page['status_code'] == 200 for page in results)
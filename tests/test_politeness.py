@@ -0,0 +1,84 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import analyzer.config as config
+from analyzer.politeness import PolitenessController, parse_retry_after
+
+URL = 'https://www.example.com/page'
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    http_date = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 25 <= http_date <= 31
+
+
+def test_healthy_responses_raise_the_limit_up_to_the_maximum():
+    controller = PolitenessController(max_concurrency=4)
+    for _ in range(10):
+        controller.record(URL, 200, 0.2)
+    stats = controller.stats()['example.com']
+    assert stats['final_concurrency'] == 4
+    assert stats['backoffs'] == 0
+
+
+def test_throttling_halves_the_limit_and_spaces_requests():
+    controller = PolitenessController(max_concurrency=8)
+    for _ in range(6):
+        controller.record(URL, 200, 0.2)
+    before = controller.stats()['example.com']['final_concurrency']
+
+    controller.record(URL, 429, 0.2)
+    stats = controller.stats()['example.com']
+    assert stats['final_concurrency'] == before * config.POLITENESS_BACKOFF_FACTOR
+    assert stats['throttled_responses'] == 1
+    assert controller._state(URL).min_interval == config.POLITENESS_MIN_INTERVAL_STEP
+
+
+def test_rising_ttfb_counts_as_overload():
+    controller = PolitenessController(max_concurrency=8)
+    for _ in range(3):
+        controller.record(URL, 200, 0.1)
+    for _ in range(5):
+        controller.record(URL, 200, 2.0)
+    assert controller.stats()['example.com']['backoffs'] >= 1
+
+
+def test_retry_after_pauses_the_host(monkeypatch):
+    monkeypatch.setattr(config, 'POLITENESS_MAX_RETRY_AFTER', 0.2)
+    controller = PolitenessController(max_concurrency=2)
+    controller.record(URL, 503, None, retry_after_seconds=120)
+
+    async def next_request():
+        started = time.monotonic()
+        async with controller.slot(URL):
+            return time.monotonic() - started
+
+    waited = asyncio.run(next_request())
+    assert 0.15 <= waited < 1.0
+    assert controller.stats()['example.com']['retry_after_pauses'] == 1
+
+
+def test_slots_limit_requests_in_flight_per_host():
+    controller = PolitenessController(max_concurrency=2)
+    controller._state(URL).limit = 2
+    peak = 0
+    in_flight = 0
+
+    async def request(url):
+        nonlocal peak, in_flight
+        async with controller.slot(url):
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+    async def crawl():
+        await asyncio.gather(*(request(f'{URL}?{n}') for n in range(6)))
+
+    asyncio.run(crawl())
+    assert peak == 2
+    assert controller.stats()['example.com']['requests'] == 6
@@ -0,0 +1,81 @@
+import asyncio
+
+import analyzer.config as config
+from analyzer.quiescence import track_requests, wait_for_quiescence
+from analyzer.seo import SEOAnalyzer
+
+
+class FakeRequest:
+    resource_type = 'fetch'
+
+
+class FakePage:
+    """Emits request events on demand; the DOM is always quiet after one quiet window."""
+
+    url = 'https://example.com/'
+
+    def __init__(self):
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def remove_listener(self, event, handler):
+        self.handlers[event].remove(handler)
+
+    def emit(self, event, request):
+        for handler in list(self.handlers.get(event, [])):
+            handler(request)
+
+    async def evaluate(self, script, params):
+        await asyncio.sleep(params['quietMs'] / 1000)
+        return {'settled': True, 'mutations': 0}
+
+
+def test_request_started_before_the_wait_keeps_the_page_busy():
+    async def scenario():
+        page = FakePage()
+        track_requests(page)
+        request = FakeRequest()
+        page.emit('request', request) # e.g. an XHR fired during goto
+
+        async def finish_later():
+            await asyncio.sleep(0.2)
+            page.emit('requestfinished', request)
+
+        finisher = asyncio.create_task(finish_later())
+        info = await wait_for_quiescence(page, max_wait_ms=2000, quiet_ms=50, scroll=False)
+        await finisher
+        return info
+
+    info = asyncio.run(scenario())
+    assert info['settled']
+    assert info['waited_ms'] >= 200
+    assert info['requests'] == 1
+
+
+def test_untracked_page_only_sees_requests_started_during_the_wait():
+    async def scenario():
+        page = FakePage()
+        return await wait_for_quiescence(page, max_wait_ms=2000, quiet_ms=50, scroll=False)
+
+    info = asyncio.run(scenario())
+    assert info['settled']
+    assert info['waited_ms'] < 1000
+
+
+def test_dynamic_content_wait_defaults_to_the_configured_maximum(monkeypatch):
+    monkeypatch.setattr(config, 'QUIESCENCE_MAX_WAIT', 300)
+    monkeypatch.setattr(config, 'QUIESCENCE_QUIET_WINDOW', 50)
+
+    async def scenario():
+        page = FakePage()
+        track_requests(page)
+        page.emit('request', FakeRequest()) # never finishes
+        return await SEOAnalyzer()._wait_for_dynamic_content(page)
+
+    info = asyncio.run(scenario())
+    assert not info['settled']
+    assert info['reason'] == 'network'
+    assert info['pending_requests'] == 1
+    assert info['waited_ms'] < 2000
@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+from analyzer.seoreportsaver import SEOReportSaver
+
+URL = 'https://example.com'
+
+
+class FakeQuery:
+    def __init__(self, db):
+        self.db = db
+        self.operation = None
+        self.payload = None
+        self.filters = {}
+
+    def select(self, columns):
+        self.operation = 'select'
+        return self
+
+    def insert(self, data):
+        self.operation, self.payload = 'insert', data
+        return self
+
+    def update(self, data):
+        self.operation, self.payload = 'update', data
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def execute(self):
+        if self.operation == 'select':
+            rows = [{'id': row_id, 'status': row['report'].get('status')}
+                    for row_id, row in self.db.rows.items() if row['url'] == self.filters['url']]
+            return SimpleNamespace(data=rows, error=None)
+        if self.operation == 'insert':
+            row_id = len(self.db.rows) + 1
+            self.db.rows[row_id] = self.payload
+            return SimpleNamespace(data=[{'id': row_id}], error=None)
+        self.db.rows[self.filters['id']] = self.payload
+        return SimpleNamespace(data=[{'id': self.filters['id']}], error=None)
+
+
+class FakeSupabase:
+    """The seo_reports table as {id: row}; select returns the id and the report's status."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def table(self, name):
+        assert name == 'seo_reports'
+        return FakeQuery(self)
+
+
+def report(status=None, pages=3):
+    analysis = {'url': URL, 'timestamp': '2026-01-01 00:00:00', 'crawled_internal_pages_count': pages,
+                'llm_analysis': {'url': URL}, 'page_statistics': {}}
+    if status:
+        analysis.update(status=status, cancel_reason='user cancelled')
+    return analysis
+
+
+def saver_with(db):
+    saver = SEOReportSaver()
+    saver.supabase = db
+    return saver
+
+
+def test_cancelled_analysis_is_saved_with_its_status():
+    db = FakeSupabase()
+    result = asyncio.run(saver_with(db).save_reports(report('cancelled', pages=1)))
+
+    assert result['success'] and not result['existing']
+    assert db.rows[1]['report']['status'] == 'cancelled'
+    assert 'Status: Cancelled (user cancelled)' in db.rows[1]['text_report']
+
+
+def test_cancelled_analysis_never_replaces_a_report():
+    db = FakeSupabase()
+    saver = saver_with(db)
+    asyncio.run(saver.save_reports(report()))
+    result = asyncio.run(saver.save_reports(report('cancelled', pages=1)))
+
+    assert result['existing']
+    assert list(db.rows) == [1]
+    assert 'status' not in db.rows[1]['report']
+
+
+def test_complete_report_replaces_a_cancelled_one():
+    db = FakeSupabase()
+    saver = saver_with(db)
+    asyncio.run(saver.save_reports(report('cancelled', pages=1)))
+    asyncio.run(saver.save_reports(report('cancelled', pages=2)))
+    result = asyncio.run(saver.save_reports(report()))
+
+    assert result == {'success': True, 'report_id': 1, 'existing': False}
+    assert list(db.rows) == [1]
+    assert db.rows[1]['report']['crawled_internal_pages_count'] == 3
+    assert 'status' not in db.rows[1]['report']
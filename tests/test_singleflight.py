@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from analyzer.cancellation import AnalysisCancelled, CancelHandle
+from utils.singleflight import SingleFlight
+
+
+def make_work(calls, started, release, flight_handles):
+    async def work(flight_handle):
+        calls.append(1)
+        flight_handles.append(flight_handle)
+        started.set()
+        while not release.is_set():
+            if flight_handle.cancelled:
+                return 'cancelled'
+            await asyncio.sleep(0.005)
+        return 'done'
+    return work
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flights = SingleFlight()
+        calls, handles = [], []
+        started, release = asyncio.Event(), asyncio.Event()
+        work = make_work(calls, started, release, handles)
+        leader = asyncio.create_task(flights.run('site', work))
+        await started.wait()
+        assert flights.is_in_flight('site')
+        follower = asyncio.create_task(flights.run('site', work))
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await asyncio.gather(leader, follower)
+        return calls, results, flights.is_in_flight('site')
+
+    calls, results, still_in_flight = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert results == ['done', 'done']
+    assert not still_in_flight
+
+
+def test_followers_share_the_leaders_exception():
+    async def scenario():
+        flights = SingleFlight()
+        started = asyncio.Event()
+
+        async def failing(flight_handle):
+            started.set()
+            await asyncio.sleep(0.01)
+            raise ValueError('crawl failed')
+
+        leader = asyncio.create_task(flights.run('site', failing))
+        await started.wait()
+        follower = asyncio.create_task(flights.run('site', failing))
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_callers_in_other_threads_attach_to_the_flight():
+    flights = SingleFlight()
+    calls = []
+    started, release = threading.Event(), threading.Event()
+
+    async def work(flight_handle):
+        calls.append(1)
+        started.set()
+        while not release.is_set():
+            await asyncio.sleep(0.005)
+        return 'done'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(asyncio.run(flights.run('site', work))))
+    leader.start()
+    assert started.wait(timeout=1)
+    follower = threading.Thread(target=lambda: results.append(asyncio.run(flights.run('site', work))))
+    follower.start()
+    while flights._calls['site'].subscribers < 2:
+        time.sleep(0.005)
+    release.set()
+    leader.join(timeout=2)
+    follower.join(timeout=2)
+    assert results == ['done', 'done']
+    assert len(calls) == 1
+
+
+def test_leader_cancel_does_not_stop_a_crawl_others_wait_for():
+    async def scenario():
+        flights = SingleFlight()
+        calls, handles = [], []
+        started, release = asyncio.Event(), asyncio.Event()
+        work = make_work(calls, started, release, handles)
+        leader_handle, follower_handle = CancelHandle('leader'), CancelHandle('follower')
+        leader = asyncio.create_task(flights.run('site', work, cancel_handle=leader_handle))
+        await started.wait()
+        follower = asyncio.create_task(flights.run('site', work, cancel_handle=follower_handle))
+        await asyncio.sleep(0.01)
+        leader_handle.cancel('tab closed')
+        await asyncio.sleep(0.05)
+        flight_cancelled = handles[0].cancelled
+        release.set()
+        return flight_cancelled, await asyncio.gather(leader, follower, return_exceptions=True)
+
+    flight_cancelled, (leader_result, follower_result) = asyncio.run(scenario())
+    assert not flight_cancelled
+    assert isinstance(leader_result, AnalysisCancelled)
+    assert follower_result == 'done'
+
+
+def test_follower_cancel_stops_waiting_only_for_that_follower():
+    async def scenario():
+        flights = SingleFlight()
+        calls, handles = [], []
+        started, release = asyncio.Event(), asyncio.Event()
+        work = make_work(calls, started, release, handles)
+        follower_handle = CancelHandle('follower')
+        leader = asyncio.create_task(flights.run('site', work, cancel_handle=CancelHandle('leader')))
+        await started.wait()
+        follower = asyncio.create_task(flights.run('site', work, cancel_handle=follower_handle))
+        await asyncio.sleep(0.01)
+        follower_handle.cancel('user cancelled')
+        with pytest.raises(AnalysisCancelled):
+            await asyncio.wait_for(follower, timeout=1)
+        flight_cancelled = handles[0].cancelled
+        release.set()
+        return flight_cancelled, await leader
+
+    flight_cancelled, leader_result = asyncio.run(scenario())
+    assert not flight_cancelled
+    assert leader_result == 'done'
+
+
+def test_flight_is_cancelled_once_every_waiter_cancelled():
+    async def scenario():
+        flights = SingleFlight()
+        calls, handles = [], []
+        started, release = asyncio.Event(), asyncio.Event()
+        work = make_work(calls, started, release, handles)
+        leader_handle, follower_handle = CancelHandle('leader'), CancelHandle('follower')
+        leader = asyncio.create_task(flights.run('site', work, cancel_handle=leader_handle))
+        await started.wait()
+        follower = asyncio.create_task(flights.run('site', work, cancel_handle=follower_handle))
+        await asyncio.sleep(0.01)
+        follower_handle.cancel('user cancelled')
+        leader_handle.cancel('tab closed')
+        results = await asyncio.wait_for(asyncio.gather(leader, follower, return_exceptions=True), timeout=1)
+        return handles[0], results, flights.is_in_flight('site')
+
+    flight_handle, results, still_in_flight = asyncio.run(scenario())
+    assert flight_handle.cancelled
+    assert all(isinstance(result, AnalysisCancelled) for result in results)
+    assert not still_in_flight
@@ -0,0 +1,59 @@
+from analyzer.url_clusters import UrlTemplateClusterer
+
+
+def test_templates_from_segment_shapes_and_sibling_variants():
+    clusterer = UrlTemplateClusterer(sample_size=2, min_variants=2)
+    assert clusterer.template_of('https://example.com/urun/shoe-12345') == '/urun/<slug>'
+    assert clusterer.template_of('https://example.com/about') == '/about'
+
+    clusterer.observe('https://example.com/blog/2024/my-post')
+    assert clusterer.template_of('https://example.com/blog/2024/my-post') == '/blog/<yyyy>/my-post'
+    clusterer.observe('https://example.com/blog/2023/other-post')
+    assert clusterer.template_of('https://example.com/blog/2024/my-post') == '/blog/<yyyy>/<slug>'
+
+    # Top-level pages stay distinct however many there are.
+    for page in ('about', 'contact', 'pricing'):
+        clusterer.observe(f'https://example.com/{page}')
+    assert clusterer.template_of('https://example.com/contact') == '/contact'
+
+
+def test_admit_stops_at_the_sample_size_per_template():
+    clusterer = UrlTemplateClusterer(sample_size=2)
+    admitted = [clusterer.admit(f'https://example.com/product/{n}') for n in range(4)]
+    assert admitted == [True, True, False, False]
+    assert clusterer.admit('https://example.com/about')
+
+    stats = clusterer.stats()
+    assert stats['skipped_urls_count'] == 2
+    assert stats['clusters'][0] == {'template': '/product/<n>', 'urls_seen': 4, 'sampled': 2, 'skipped': 2}
+
+
+def test_sample_spreads_picks_and_keeps_order():
+    clusterer = UrlTemplateClusterer(sample_size=2)
+    urls = [f'https://example.com/p/{n}' for n in range(10)] + ['https://example.com/about']
+    assert clusterer.sample(urls) == ['https://example.com/p/0', 'https://example.com/p/5', 'https://example.com/about']
+    # The sitemap used up the budget, so discovered links of the same template are skipped.
+    assert not clusterer.admit('https://example.com/p/42')
+
+
+def test_early_admits_count_against_the_merged_template():
+    clusterer = UrlTemplateClusterer(sample_size=2, min_variants=3)
+    # 'red-shoe' and 'blue-shoe' are admitted under their literal templates; the third
+    # sibling merges them into '/shop/<slug>', which has then used up its budget.
+    admitted = [clusterer.admit(f'https://example.com/shop/{name}') for name in ('red-shoe', 'blue-shoe', 'green-shoe', 'pink-shoe')]
+    assert admitted == [True, True, False, False]
+    assert clusterer.stats()['clusters'] == [{'template': '/shop/<slug>', 'urls_seen': 4, 'sampled': 2, 'skipped': 2}]
+    # A URL keeps its first decision.
+    assert clusterer.admit('https://example.com/shop/red-shoe')
+
+
+def test_snapshot_restores_templates_and_sample_counts():
+    clusterer = UrlTemplateClusterer(sample_size=2, min_variants=2)
+    clusterer.sample([f'https://example.com/p/{n}' for n in range(5)])
+    clusterer.admit('https://example.com/blog/first-post')
+    clusterer.admit('https://example.com/blog/second-post')
+
+    restored = UrlTemplateClusterer.from_snapshot(clusterer.snapshot(), sample_size=2, min_variants=2)
+    assert restored.stats() == clusterer.stats()
+    assert not restored.admit('https://example.com/p/42')
+    assert not restored.admit('https://example.com/blog/third-post')
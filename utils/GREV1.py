@@ -1,6 +1,7 @@
 
 import asyncio
-from playwright.async_api import async_playwright
+from analyzer.browser_governor import browser_governor
+from analyzer.browser_pool import browser_pool, SCRAPER_LEASE
 import json
 import random
 import time
@@ -40,19 +41,12 @@ class GoogleSearchScraper:
         }
         config = search_configs.get(self.region, search_configs['en'])
 
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=[
-                    '--no-sandbox', '--disable-blink-features=AutomationControlled',
-                    '--disable-web-security', '--disable-features=VizDisplayCompositor',
-                    '--disable-dev-shm-usage', '--no-first-run', '--disable-extensions',
-                    '--disable-default-apps'
-                ]
-            )
-            
-            # Create a new browser context with region-specific settings
-            context = await browser.new_context(
+        # A warm scraper browser from the shared pool (launched with the anti-detection flags, see config.BROWSER_POOL_LAUNCH_ARGS).
+        # The governor caps browsers, open pages and memory across all sessions; a burst of lookups queues here.
+        async with browser_pool.lease(f"SERP lookup '{keyword}'", kind=SCRAPER_LEASE) as lease, \
+                browser_governor.page_slot(f"SERP lookup '{keyword}'"):
+            # Create a new, isolated browser context with region-specific settings
+            context = await lease.new_context(
                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
                 viewport={"width": 1366, "height": 768},
                 locale=config['locale'],
@@ -103,7 +97,7 @@ class GoogleSearchScraper:
             except Exception as e:
                 raise e
             finally:
-                await browser.close()
+                await context.close()
     
     async def handle_cookie_consent(self, page):
         """Handles various cookie consent dialogs."""
@@ -1,7 +1,8 @@
 # Seobot/utils/GREV2.py
 
 import asyncio
-from playwright.async_api import async_playwright
+from analyzer.browser_governor import browser_governor
+from analyzer.browser_pool import browser_pool, SCRAPER_LEASE
 import random
 from urllib.parse import urlparse
 import logging
@@ -65,18 +66,11 @@ class CompetitorContentScraper:
         config = search_configs.get(self.region, search_configs['en'])
 
         try:
-            async with async_playwright() as p:
-                # --- USING THE ADVANCED BROWSER CONFIGURATION FROM GREV1 ---
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox', '--disable-blink-features=AutomationControlled',
-                        '--disable-web-security', '--disable-features=VizDisplayCompositor',
-                        '--disable-dev-shm-usage', '--no-first-run', '--disable-extensions',
-                        '--disable-default-apps'
-                    ]
-                )
-                context = await browser.new_context(
+            # The governor caps browsers, open pages and memory across all sessions; a burst of lookups queues here.
+            async with browser_pool.lease(f"competitor lookup {competitor_domain}", kind=SCRAPER_LEASE) as lease, \
+                    browser_governor.page_slot(f"competitor lookup {competitor_domain}"):
+                # --- WARM POOLED BROWSER, LAUNCHED WITH THE ADVANCED CONFIGURATION FROM GREV1 (config.BROWSER_POOL_LAUNCH_ARGS) ---
+                context = await lease.new_context(
                     user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
                     viewport={"width": 1366, "height": 768},
                     locale=config['locale'],
@@ -132,7 +126,7 @@ class CompetitorContentScraper:
                 no_results_text = await no_results_locator.inner_text()
                 if "did not match any documents" in no_results_text or "ile eşleşen hiçbir belge bulunamadı" in no_results_text:
                     logging.info(f"GREV2: No results found for query: {search_query}")
-                    await browser.close()
+                    await context.close()
                     return self._format_results(keyword, competitor_domain)
 
                 result_container = page.locator("#rso")
@@ -161,7 +155,7 @@ class CompetitorContentScraper:
                         logging.warning(f"GREV2: Could not parse a result block. It might be an ad or other element. Error: {e}")
                         continue
                 
-                await browser.close()
+                await context.close()
         
         except Exception as e:
             error_message = f"An error occurred while analyzing competitor content: {e}"
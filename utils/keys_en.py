@@ -84,6 +84,9 @@ translations = {
     "analyze_with_ai": "Or, jump directly to AI tools (requires prior analysis for best results):",
     "generating_new_report": "Generating new SEO report...",
     "generating_new_analysis": "No existing report found. Generating a new analysis, this may take a few moments...",
+    "analysis_already_in_progress": "This site is already being analyzed. Waiting for that analysis to finish...",
+    "analysis_cancelled": "The analysis was cancelled. Analyzing the site again continues where it stopped.",
+    "analysis_queued": "The server is busy. Your analysis is number {position} in the queue and will start automatically.",
     "failed_to_analyze": "Sorry, we encountered an error while trying to analyze the website. Please try again or contact support.",
     "no_report_available_error": "An error occurred, and no report is available for this URL.",
     "full_site_analysis_complete": "✅ Full site analysis, including all sub-pages, is complete!",
@@ -82,6 +82,9 @@ translations = {
     "analyze_with_ai": "Veya doğrudan AI araçlarına geçin (en iyi sonuç için ön analiz gereklidir):",
     "generating_new_report": "Yeni SEO raporu oluşturuluyor...",
     "generating_new_analysis": "Mevcut rapor bulunamadı. Yeni analiz oluşturuluyor, bu birkaç dakika sürebilir...",
+    "analysis_already_in_progress": "Bu site şu anda zaten analiz ediliyor. Analizin tamamlanması bekleniyor...",
+    "analysis_cancelled": "Analiz iptal edildi. Siteyi yeniden analiz ettiğinizde kaldığı yerden devam eder.",
+    "analysis_queued": "Sunucu şu anda yoğun. Analiziniz kuyrukta {position}. sırada ve otomatik olarak başlayacak.",
     "failed_to_analyze": "Üzgünüz, web sitesini analiz etmeye çalışırken bir hata oluştu. Lütfen tekrar deneyin veya destekle iletişime geçin.",
     "no_report_available_error": "Bir hata oluştu ve bu URL için rapor mevcut değil.",
     "full_site_analysis_complete": "✅ Tüm alt sayfalar dahil olmak üzere tam site analizi tamamlandı!",
@@ -6,6 +6,9 @@ import time
 from supabase import Client
 from analyzer.seo import SEOAnalyzer # Assuming SEOAnalyzer class is defined elsewhere
 from utils.s10tools import normalize_url
+from utils.singleflight import analysis_flights
+from analyzer.cancellation import AnalysisCancelled, CancelHandle
+from typing import Callable, Optional
 from utils.language_support import language_manager
 import re # For generate_text_report_from_structured_data if used for parsing within it
 import traceback # For logging errors in analyze_website
@@ -574,13 +577,36 @@ def common_sidebar(page_specific_content_func=None):
         st.switch_page("main.py")
 
 
+async def analyze_website(url: str, supabase: Client, cancel_handle: Optional[CancelHandle] = None,
+                          on_queue: Optional[Callable[[int], None]] = None):
+    # Concurrent requests for the same site (other users, other tabs) attach to the crawl already
+    # running in this process instead of launching their own browser and racing on the upsert.
+    # The crawl has its own cancel handle and stops only once every caller waiting for it cancelled.
+    flight_key = normalize_url(url) or url
+    try:
+        return await analysis_flights.run(
+            flight_key,
+            lambda flight_cancel_handle: _run_website_analysis(url, supabase, flight_cancel_handle, on_queue),
+            cancel_handle=cancel_handle,
+        )
+    except AnalysisCancelled as e:
+        logging.info(f"analyze_website: Stopped waiting for the analysis of {url} ({e}).")
+        return None, {'url': url, 'status': 'cancelled', 'cancel_reason': str(e)}
+
 # THIS IS THE CORRECT AND COMPLETE VERSION OF analyze_website
-async def analyze_website(url: str, supabase: Client):
+async def _run_website_analysis(url: str, supabase: Client, cancel_handle: Optional[CancelHandle] = None,
+                                 on_queue: Optional[Callable[[int], None]] = None):
     analyzer = SEOAnalyzer()
     try:
         # Assuming analyzer.analyze_url() now returns the FULL, UNSIMPLIFIED analysis data.
         # This 'results' object also contains 'saver_status' and 'text_report' from SEOReportSaver.
-        results = await analyzer.analyze_url(url)
+        results = await analyzer.analyze_url(url, cancel_handle=cancel_handle, on_queue=on_queue)
+
+        if results and isinstance(results, dict) and results.get('status') == 'cancelled':
+            # The partial report was saved with status 'cancelled' by the analyzer (only if no report
+            # existed); it must not overwrite a complete report or start the detailed analysis.
+            logging.info(f"analyze_website: Analysis of {url} was cancelled ({results.get('cancel_reason')}).")
+            return None, results
 
         if results and isinstance(results, dict):
             logging.info(f"analyze_website: Raw analysis results received for {url}. Preparing to process.")
@@ -655,6 +681,12 @@ def load_saved_report(url: str, supabase: Client):
             if not isinstance(base_report_json, dict):
                 logging.warning(f"load_saved_report: 'report' field from DB was not a dict for {normalized_url}. Using empty dict.")
                 base_report_json = {}
+            if base_report_json.get('status') == 'cancelled':
+                # Partial results of a cancelled analysis; analyze again (resuming from its checkpoint) instead.
+                logging.info(f"load_saved_report: Report for {normalized_url} is from a cancelled analysis. Ignoring it.")
+                st.session_state.auto_suggestions_data = None
+                st.session_state.current_report_url_for_suggestions = None
+                return None, None
 
             current_full_report = base_report_json.copy() # Start with the base 'report' data
 
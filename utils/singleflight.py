@@ -0,0 +1,123 @@
+# utils/singleflight.py
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from analyzer.cancellation import AnalysisCancelled, CancelHandle
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    __slots__ = ('future', 'cancel_handle', 'subscribers')
+
+    def __init__(self, key: str):
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.cancel_handle = CancelHandle(label=key)
+        self.subscribers = 0
+
+
+class SingleFlight:
+    """
+    Process-wide de-duplication of concurrent calls with the same key.
+
+    Every Streamlit session runs its coroutines with asyncio.run in its own
+    thread, so the registry uses a threading.Lock and concurrent.futures.Future
+    rather than asyncio primitives: the first caller (the leader) runs the work,
+    later callers for the same key, from any thread or event loop, await the
+    leader's future and receive the same result or exception.
+
+    The work gets the flight's own CancelHandle rather than the leader's. A caller
+    whose `cancel_handle` is cancelled stops waiting (AnalysisCancelled); the flight
+    is cancelled only once every caller has stopped waiting. The work runs in the
+    leader's event loop, so a leader that stopped waiting still drives it until it ends.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Flight] = {}
+
+    def is_in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def _leave(self, key: str, flight: _Flight, reason: str) -> None:
+        with self._lock:
+            flight.subscribers -= 1
+            abandoned = flight.subscribers == 0 and not flight.future.done()
+            if abandoned and self._calls.get(key) is flight:
+                # Later callers start a new flight instead of joining one that is winding down.
+                del self._calls[key]
+        if abandoned:
+            flight.cancel_handle.cancel(f"every waiter stopped ({reason})")
+
+    async def run(self, key: str, work: Callable[[CancelHandle], Awaitable[Any]],
+                  cancel_handle: Optional[CancelHandle] = None) -> Any:
+        """
+        Runs `work(flight_cancel_handle)` unless a call for `key` is already in flight, in which
+        case its result is shared. Raises AnalysisCancelled once `cancel_handle` is cancelled.
+        """
+        with self._lock:
+            flight = self._calls.get(key)
+            is_leader = flight is None
+            if is_leader:
+                flight = _Flight(key)
+                self._calls[key] = flight
+            flight.subscribers += 1
+
+        left = False
+
+        def leave(reason: str) -> None:
+            nonlocal left
+            if not left:
+                left = True
+                self._leave(key, flight, reason)
+
+        def on_cancelled(task: asyncio.Future) -> None:
+            if not task.cancelled():
+                leave(cancel_handle.reason or 'cancelled')
+
+        watcher = None
+        if cancel_handle is not None:
+            watcher = asyncio.ensure_future(cancel_handle.wait())
+            watcher.add_done_callback(on_cancelled)
+        try:
+            if not is_leader:
+                logger.info(f"Attaching to the in-flight call for {key}")
+                # shield: a follower going away must not cancel the leader's shared future.
+                shared_result = asyncio.shield(asyncio.wrap_future(flight.future))
+                if watcher is not None:
+                    await asyncio.wait({shared_result, watcher}, return_when=asyncio.FIRST_COMPLETED)
+                    if not shared_result.done():
+                        shared_result.cancel()
+                        raise AnalysisCancelled(cancel_handle.reason)
+                return await shared_result
+
+            try:
+                result = await work(flight.cancel_handle)
+            except Exception as e:
+                flight.future.set_exception(e)
+                raise
+            except BaseException:
+                # Cancellation of the leader (or interpreter shutdown) must not leave followers waiting forever.
+                flight.future.set_exception(RuntimeError(f"The in-flight call for {key} was cancelled"))
+                raise
+            else:
+                flight.future.set_result(result)
+            finally:
+                with self._lock:
+                    if self._calls.get(key) is flight:
+                        del self._calls[key]
+            if left:
+                raise AnalysisCancelled(cancel_handle.reason)
+            return result
+        finally:
+            if watcher is not None and not watcher.done():
+                watcher.cancel()
+            leave('caller went away')
+
+
+# Shared by main.process_url and shared_functions.analyze_website, keyed by s10tools.normalize_url.
+analysis_flights = SingleFlight()